@@ -0,0 +1,212 @@
+# admission.py
+# Admission control for the inference routes (/translate, /translate_stream, /stt, /speech_translate).
+#
+# Each route has a gate, and translation also has one gate per direction. A gate lets up to
+# 'concurrency' requests run and up to 'queue' more wait; anything beyond that is shed at once
+# (429 with Retry-After) instead of piling up on server threads. A request may carry a
+# deadline, as a relative budget in milliseconds:
+#   header  X-Deadline-Ms: 2000
+#   or body {"deadline_ms": 2000} (JSON) / deadline_ms=2000 (form-data)
+# Waiting past its deadline sheds the request (503 with Retry-After), and the deadline is
+# passed on to generation so a request nobody will read stops early.
+#
+# Limits come from the environment (defaults in brackets):
+#   ADMISSION_TRANSLATE_CONCURRENCY [2]   ADMISSION_TRANSLATE_QUEUE [16]
+#   ADMISSION_DIRECTION_CONCURRENCY [1]   ADMISSION_DIRECTION_QUEUE [8]
+#   ADMISSION_STT_CONCURRENCY [1]         ADMISSION_STT_QUEUE [4]
+#   REQUEST_DEADLINE_DEFAULT_MS [0 = none]  REQUEST_DEADLINE_MAX_MS [120000]
+
+import math
+import os
+import threading
+import time
+
+from metrics import counter, gauge, histogram
+from scripts.model_registry import MODEL_PATHS
+
+DEADLINE_HEADER = "X-Deadline-Ms"
+DEADLINE_FIELD = "deadline_ms"
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        print(f"--- admission.py: WARNING: {name} is not an integer, using {default} ---")
+        return default
+
+
+GATE_LIMITS = {
+    # gate kind -> (max concurrent, max queued)
+    "translate": (_env_int("ADMISSION_TRANSLATE_CONCURRENCY", 2), _env_int("ADMISSION_TRANSLATE_QUEUE", 16)),
+    "direction": (_env_int("ADMISSION_DIRECTION_CONCURRENCY", 1), _env_int("ADMISSION_DIRECTION_QUEUE", 8)),
+    "stt": (_env_int("ADMISSION_STT_CONCURRENCY", 1), _env_int("ADMISSION_STT_QUEUE", 4)),
+}
+DEFAULT_DEADLINE_MS = _env_int("REQUEST_DEADLINE_DEFAULT_MS", 0)
+MAX_DEADLINE_MS = _env_int("REQUEST_DEADLINE_MAX_MS", 120000)
+
+QUEUE_DEPTH = gauge("admission_queue_depth", "Requests waiting for an admission slot.", ["gate"])
+IN_FLIGHT = gauge("admission_in_flight", "Requests holding an admission slot.", ["gate"])
+ADMITTED = counter("admission_admitted_total", "Requests admitted.", ["gate"])
+REJECTED = counter("admission_rejected_total", "Requests shed by admission control.", ["gate", "reason"])
+QUEUE_WAIT = histogram("admission_queue_wait_seconds", "Time admitted requests spent queued.", ["gate"])
+DEADLINE_EXCEEDED = counter("request_deadline_exceeded_total", "Requests whose deadline passed after admission.", ["route", "stage"])
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed. Carries the HTTP status and Retry-After seconds."""
+
+    status_code = 503
+    reason = "rejected"
+    message = "request rejected"
+
+    def __init__(self, gate, retry_after):
+        super().__init__(f"Server busy ({gate}): {self.message}. Retry after {retry_after}s.")
+        self.gate = gate
+        self.retry_after = retry_after
+
+
+class QueueFull(AdmissionRejected):
+    status_code = 429
+    reason = "queue_full"
+    message = "request queue is full"
+
+
+class DeadlineExceeded(AdmissionRejected):
+    status_code = 503
+    reason = "deadline"
+    message = "request deadline passed while queued"
+
+
+class AdmissionGate:
+    """A counting semaphore with a bounded wait queue and deadline-aware waiting."""
+
+    def __init__(self, name, max_concurrent, max_queue):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.in_flight = 0
+        self.waiting = 0
+        self._service_seconds = None # Moving average of how long a slot is held
+        self._cond = threading.Condition()
+
+    def retry_after(self):
+        """Seconds until a slot is likely free for a new arrival (at least 1)."""
+        service = self._service_seconds or 1.0
+        return max(1, math.ceil(service * (self.waiting + 1) / self.max_concurrent))
+
+    def acquire(self, deadline=None):
+        """Takes a slot, waiting in the queue if needed. Raises QueueFull or DeadlineExceeded."""
+        start = time.monotonic()
+        with self._cond:
+            if self.in_flight >= self.max_concurrent or self.waiting:
+                if self.waiting >= self.max_queue:
+                    REJECTED.inc(gate=self.name, reason=QueueFull.reason)
+                    raise QueueFull(self.name, self.retry_after())
+                self.waiting += 1
+                QUEUE_DEPTH.set(self.waiting, gate=self.name)
+                try:
+                    while self.in_flight >= self.max_concurrent:
+                        timeout = None if deadline is None else deadline - time.monotonic()
+                        if timeout is not None and timeout <= 0:
+                            REJECTED.inc(gate=self.name, reason=DeadlineExceeded.reason)
+                            if self.in_flight < self.max_concurrent:
+                                self._cond.notify() # Pass on a wake-up this waiter may have consumed
+                            raise DeadlineExceeded(self.name, self.retry_after())
+                        self._cond.wait(timeout)
+                finally:
+                    self.waiting -= 1
+                    QUEUE_DEPTH.set(self.waiting, gate=self.name)
+            self.in_flight += 1
+            IN_FLIGHT.set(self.in_flight, gate=self.name)
+        ADMITTED.inc(gate=self.name)
+        QUEUE_WAIT.observe(time.monotonic() - start, gate=self.name)
+        return time.monotonic()
+
+    def release(self, acquired_at):
+        held = time.monotonic() - acquired_at
+        with self._cond:
+            self.in_flight -= 1
+            IN_FLIGHT.set(self.in_flight, gate=self.name)
+            self._service_seconds = held if self._service_seconds is None else 0.8 * self._service_seconds + 0.2 * held
+            self._cond.notify()
+
+
+_GATES = {}
+_GATES_LOCK = threading.Lock()
+
+
+def get_gate(kind, name=None):
+    """The gate for 'kind' (a GATE_LIMITS key), created on first use; 'name' distinguishes e.g. directions."""
+    name = name or kind
+    with _GATES_LOCK:
+        if name not in _GATES:
+            max_concurrent, max_queue = GATE_LIMITS[kind]
+            _GATES[name] = AdmissionGate(name, max_concurrent, max_queue)
+        return _GATES[name]
+
+
+class AdmissionTicket:
+    """Slots held by one request; release() is idempotent so it can be wired to several exits."""
+
+    def __init__(self):
+        self._held = []
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            held, self._held = self._held, []
+        for gate, acquired_at in reversed(held):
+            gate.release(acquired_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+def admit(route, direction=None, deadline=None):
+    """
+    For translation, acquires the direction's gate and then the route's gate (always in that
+    order, so requests never wait on each other in a cycle). A request queued behind its own
+    direction holds no route slot, so it can't keep other directions from running.
+    Unknown directions only take the route gate (translate() rejects them straight away).
+    Returns an AdmissionTicket. Raises QueueFull / DeadlineExceeded.
+    """
+    gates = [get_gate(route)]
+    if direction in MODEL_PATHS:
+        gates.insert(0, get_gate("direction", f"{route}:{direction[0]}->{direction[1]}"))
+    ticket = AdmissionTicket()
+    try:
+        for gate in gates:
+            ticket._held.append((gate, gate.acquire(deadline)))
+    except AdmissionRejected:
+        ticket.release()
+        raise
+    return ticket
+
+
+def parse_deadline(headers, body=None):
+    """
+    Absolute time.monotonic() deadline for a request, or None for no deadline.
+    Raises ValueError for a malformed value.
+    """
+    value = headers.get(DEADLINE_HEADER)
+    if value is None and body is not None:
+        value = body.get(DEADLINE_FIELD)
+    if value in (None, ""):
+        budget_ms = DEFAULT_DEADLINE_MS
+    else:
+        try:
+            budget_ms = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"'{DEADLINE_FIELD}' must be a number of milliseconds")
+        if not math.isfinite(budget_ms):
+            raise ValueError(f"'{DEADLINE_FIELD}' must be a finite number of milliseconds") # NaN would never expire
+        if budget_ms <= 0:
+            raise ValueError(f"'{DEADLINE_FIELD}' must be positive")
+    if not budget_ms:
+        return None
+    return time.monotonic() + min(budget_ms, MAX_DEADLINE_MS) / 1000
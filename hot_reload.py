@@ -0,0 +1,116 @@
+# hot_reload.py
+# Zero-downtime model reloads for the translator and the Whisper recognizer.
+#
+# A reload loads the new checkpoint next to the serving model, warms it up, and swaps it into
+# LOADED_MODELS / LOADED_WHISPER_ASSETS (see reload_models() and reload_whisper_model());
+# requests already running finish on the old model. Reloads are triggered by:
+#   - POST /admin/reload (ADMIN_TOKEN), which runs one in the background and returns at once;
+#     GET /admin/reload reports its progress and per-model timings.
+#   - the checkpoint watcher, when MODEL_WATCH_INTERVAL_SECONDS > 0: it polls the model
+#     directories and reloads only the models whose checkpoint files changed.
+# Only one reload runs at a time per worker process.
+
+import os
+import threading
+import time
+import traceback
+
+from metrics import counter, gauge
+
+RELOAD_TARGETS = ("all", "translator", "whisper")
+MODEL_WATCH_INTERVAL_SECONDS = float(os.environ.get("MODEL_WATCH_INTERVAL_SECONDS", "0"))
+
+RELOADS = counter("model_reload_total", "Model reloads by target and outcome.", ["target", "status"])
+RELOAD_SECONDS = gauge("model_reload_last_duration_seconds", "Duration of the last reload (load + warm-up + swap).", ["target"])
+
+_state_lock = threading.Lock()
+_running = False
+_last_reload = {"status": "never run"}
+_watcher = None
+
+
+def _reload_translator(directions, only_changed):
+    from scripts.translator import reload_models
+    report = reload_models(directions, only_changed=only_changed)
+    for result in report["directions"].values():
+        if result["status"] != "unchanged":
+            RELOADS.inc(target="translator", status=result["status"].split(" ")[0])
+    RELOAD_SECONDS.set(report["total_ms"] / 1000, target="translator")
+    return report
+
+
+def _reload_whisper(only_changed):
+    from scripts.speech_recognizer import reload_whisper_model
+    report = reload_whisper_model(only_changed=only_changed)
+    if report["status"] != "unchanged":
+        RELOADS.inc(target="whisper", status=report["status"].split(" ")[0])
+        RELOAD_SECONDS.set(report.get("total_ms", report.get("load_ms", 0)) / 1000, target="whisper")
+    return report
+
+
+def run_reload(target="all", directions=None, only_changed=False, trigger="admin"):
+    """Runs a reload in the calling thread and records it as the last reload. Returns the report."""
+    global _running, _last_reload
+    start = time.perf_counter()
+    report = {"status": "running", "target": target, "trigger": trigger, "started_at": time.time()}
+    with _state_lock:
+        _last_reload = report
+    try:
+        if target in ("all", "translator"):
+            report["translator"] = _reload_translator(directions, only_changed)
+        if target in ("all", "whisper"):
+            report["whisper"] = _reload_whisper(only_changed)
+        report["status"] = "finished"
+    except Exception as e:
+        # e.g. the model modules failed to import (no torch): nothing was swapped
+        print(f"--- hot_reload.py: ERROR during {target} reload: {e} ---")
+        print(traceback.format_exc())
+        report["status"] = "failed"
+        report["error"] = f"{type(e).__name__}: {e}"
+    report["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    print(f"--- hot_reload.py: {target} reload ({trigger}) {report['status']} in {report['total_ms']} ms ---")
+    with _state_lock:
+        _running = False
+    return report
+
+
+def start_reload(target="all", directions=None, trigger="admin"):
+    """Starts a reload in a background thread. Returns False if one is already running."""
+    global _running
+    with _state_lock:
+        if _running:
+            return False
+        _running = True
+    threading.Thread(target=run_reload, args=(target, directions, False, trigger),
+                     name=f"model-reload-{target}", daemon=True).start()
+    return True
+
+
+def last_reload():
+    with _state_lock:
+        return dict(_last_reload, running=_running)
+
+
+def _watch(interval):
+    global _running
+    print(f"--- hot_reload.py: watching model checkpoints every {interval}s ---")
+    while True:
+        time.sleep(interval)
+        with _state_lock:
+            if _running:
+                continue
+            _running = True
+        # only_changed: each model compares its checkpoint files with what it was loaded from
+        report = run_reload("all", only_changed=True, trigger="watcher")
+        if report["status"] == "failed":
+            print("--- hot_reload.py: stopping the checkpoint watcher ---")
+            return
+
+
+def start_model_watcher(interval=MODEL_WATCH_INTERVAL_SECONDS):
+    """Starts the checkpoint watcher thread once per process (no-op when interval <= 0)."""
+    global _watcher
+    if interval <= 0 or _watcher is not None:
+        return
+    _watcher = threading.Thread(target=_watch, args=(interval,), name="model-watcher", daemon=True)
+    _watcher.start()
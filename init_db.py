@@ -1,6 +1,8 @@
 # init_db.py
 from config import app, db
-from models import Phrase, Speaker, AudioFile
+from models import Phrase, Speaker, AudioFile, TranslationLog, TranscriptionLog, TableVersion
+from search import ensure_search_index
+from response_cache import ensure_table_versions
 
 print("--- init_db.py: Starting DB Initialization ---")
 
@@ -10,5 +12,7 @@ with app.app_context():
     print(f"--- Tables BEFORE: {db.metadata.tables.keys()} ---")
     db.create_all()
     print(f"--- Tables AFTER: {db.metadata.tables.keys()} ---")
+    ensure_search_index()
+    ensure_table_versions()
 
 print("--- init_db.py: Done ---")
@@ -0,0 +1,113 @@
+# lexicon_fallback.py
+# Degraded translations from the corpus phrase table (utils/lexicon.py), used by /translate and
+# /translate_stream when admission control sheds a request or the direction's model is not
+# loaded. Such responses carry "degraded": true, the reason and the lexicon's word coverage,
+# plus an 'X-Translation-Degraded: lexicon' header, so clients can tell them apart.
+#
+# Lexicons are built from LEXICON_CORPUS_PATH (default data/sylheti_translation.json) in a
+# background thread at startup; a direction requested before that finishes is built on demand.
+# translation_fallback_total / translation_responses_total give the fallback rate.
+# A lexicon translation covering less than LEXICON_MIN_COVERAGE of the input words [0.5] is not
+# served (mostly copied-through source words); the route then sheds the request as usual.
+
+import json
+import os
+import threading
+import time
+
+from metrics import counter
+from utils.lexicon import Lexicon
+
+LEXICON_CORPUS_PATH = os.environ.get(
+    "LEXICON_CORPUS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sylheti_translation.json"))
+LANGUAGES = ("sylheti", "bengali", "english")
+DEGRADED_HEADER = "X-Translation-Degraded"
+DEFAULT_MIN_COVERAGE = 0.5
+
+
+def _min_coverage():
+    try:
+        value = float(os.environ.get("LEXICON_MIN_COVERAGE", DEFAULT_MIN_COVERAGE))
+    except ValueError:
+        value = None
+    if value is None or not 0 < value <= 1:
+        print(f"--- lexicon_fallback.py: WARNING: LEXICON_MIN_COVERAGE must be in (0, 1], using {DEFAULT_MIN_COVERAGE} ---")
+        return DEFAULT_MIN_COVERAGE
+    return value
+
+
+LEXICON_MIN_COVERAGE = _min_coverage()
+
+FALLBACKS = counter("translation_fallback_total", "Translations answered by the lexicon fallback.", ["direction", "reason"])
+RESPONSES = counter("translation_responses_total", "Translations served, by engine (model, table or lexicon).", ["route", "engine"])
+
+_LEXICONS = {} # (source_lang, target_lang) -> Lexicon, or None if the corpus has no pairs for it
+_lock = threading.Lock()
+_corpus = None
+
+
+def _load_corpus():
+    global _corpus
+    if _corpus is None:
+        try:
+            with open(LEXICON_CORPUS_PATH, "r", encoding="utf-8") as f:
+                _corpus = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"--- lexicon_fallback.py: WARNING: could not read '{LEXICON_CORPUS_PATH}': {e} ---")
+            _corpus = []
+    return _corpus
+
+
+def get_lexicon(source_lang, target_lang):
+    """The lexicon for a direction (built on first use), or None if there is no data for it."""
+    direction = (source_lang, target_lang)
+    if direction in _LEXICONS:
+        return _LEXICONS[direction]
+    if source_lang not in LANGUAGES or target_lang not in LANGUAGES or source_lang == target_lang:
+        return None
+    with _lock:
+        if direction not in _LEXICONS:
+            start = time.perf_counter()
+            pairs = [(row[source_lang], row[target_lang]) for row in _load_corpus()
+                     if row.get(source_lang) and row.get(target_lang)]
+            lexicon = Lexicon.from_sentence_pairs(pairs) if pairs else None
+            _LEXICONS[direction] = lexicon
+            if lexicon is not None:
+                print(f"--- lexicon_fallback.py: {source_lang} -> {target_lang} lexicon: {lexicon.size} phrases "
+                      f"from {len(pairs)} sentence pairs in {(time.perf_counter() - start) * 1000:.0f} ms ---")
+    return _LEXICONS[direction]
+
+
+def warm_up_lexicons():
+    """Builds every direction's lexicon in a background thread."""
+    def build_all():
+        for source_lang in LANGUAGES:
+            for target_lang in LANGUAGES:
+                if source_lang != target_lang:
+                    get_lexicon(source_lang, target_lang)
+    threading.Thread(target=build_all, name="lexicon-warm-up", daemon=True).start()
+
+
+def fallback_translate(text, source_lang, target_lang, reason):
+    """
+    A degraded translation response body, or None when no lexicon covers the direction or
+    the lexicon matched less than LEXICON_MIN_COVERAGE of the words.
+    'reason' is "overloaded" or "model_unavailable".
+    """
+    lexicon = get_lexicon(source_lang, target_lang)
+    if lexicon is None or not isinstance(text, str):
+        return None
+    translation, coverage = lexicon.translate(text)
+    if coverage < LEXICON_MIN_COVERAGE:
+        print(f"--- Lexicon fallback ({reason}) {source_lang} -> {target_lang}: coverage {coverage:.0%} is below "
+              f"{LEXICON_MIN_COVERAGE:.0%}; not served ---")
+        return None
+    FALLBACKS.inc(direction=f"{source_lang}->{target_lang}", reason=reason)
+    print(f"--- Lexicon fallback ({reason}) {source_lang} -> {target_lang}: '{translation}' (coverage {coverage:.0%}) ---")
+    return {
+        "translation": translation,
+        "degraded": True,
+        "degraded_reason": reason,
+        "engine": "lexicon",
+        "coverage": round(coverage, 2),
+    }
@@ -13,12 +13,21 @@ class Phrase(db.Model):
     BengaliText = db.Column(db.Text, nullable=False)
     EnglishText = db.Column(db.Text, nullable=True)
     audio_files = db.relationship('AudioFile', backref='phrase', lazy=True, cascade="all, delete-orphan")
+    # Prefix-search indexes for GET /phrases?q=...&match=prefix.
+    # text_pattern_ops lets Postgres use them for LIKE 'abc%' regardless of the DB collation.
+    __table_args__ = (
+        db.Index('ix_phrases_sylheti_prefix', 'SylhetiText', postgresql_ops={'SylhetiText': 'text_pattern_ops'}),
+        db.Index('ix_phrases_bengali_prefix', 'BengaliText', postgresql_ops={'BengaliText': 'text_pattern_ops'}),
+        db.Index('ix_phrases_english_prefix', 'EnglishText', postgresql_ops={'EnglishText': 'text_pattern_ops'}),
+        # Natural key: scripts/import_data.py upserts on it (INSERT ... ON CONFLICT)
+        db.Index('ux_phrases_natural_key', 'SylhetiText', 'BengaliText', unique=True),
+    )
 
 class Speaker(db.Model):
     print("--- models.py: Defining Speaker model ---")
     __tablename__ = 'speakers'
     SpeakerID = db.Column(db.Integer, primary_key=True)
-    Name = db.Column(db.String(100))
+    Name = db.Column(db.String(100), index=True)
     Gender = db.Column(db.Enum('Male', 'Female', 'Other', name='gender_enum_type'), nullable=False)
     Region = db.Column(db.String(100))
     audio_files = db.relationship('AudioFile', backref='speaker', lazy=True)
@@ -33,4 +42,37 @@ class AudioFile(db.Model):
     PhraseID = db.Column(db.Integer, db.ForeignKey('phrases.PhraseID', ondelete='CASCADE'), nullable=False, index=True)
     SpeakerID = db.Column(db.Integer, db.ForeignKey('speakers.SpeakerID'), nullable=False, index=True)
 
+# --- Request logs (written in batches by request_log.py, never on the request path) ---
+class TranslationLog(db.Model):
+    print("--- models.py: Defining TranslationLog model ---")
+    __tablename__ = 'translation_logs'
+    LogID = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    CreatedAt = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+    Route = db.Column(db.String(50), nullable=False)
+    SourceLang = db.Column(db.String(20), nullable=False)
+    TargetLang = db.Column(db.String(20), nullable=False)
+    SourceText = db.Column(db.Text, nullable=False)
+    Translation = db.Column(db.Text, nullable=True)
+    Engine = db.Column(db.String(20), nullable=False) # 'model', 'table' or 'lexicon'
+    DegradedReason = db.Column(db.String(50), nullable=True)
+    LatencyMs = db.Column(db.Float, nullable=True)
+
+class TranscriptionLog(db.Model):
+    print("--- models.py: Defining TranscriptionLog model ---")
+    __tablename__ = 'transcription_logs'
+    LogID = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    CreatedAt = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+    Route = db.Column(db.String(50), nullable=False)
+    SourceLanguageHint = db.Column(db.String(20), nullable=True)
+    DetectedLanguage = db.Column(db.String(20), nullable=True)
+    Transcription = db.Column(db.Text, nullable=True)
+    LatencyMs = db.Column(db.Float, nullable=True)
+
+# --- Reference data versions (bumped on every write; see response_cache.py) ---
+class TableVersion(db.Model):
+    print("--- models.py: Defining TableVersion model ---")
+    __tablename__ = 'table_versions'
+    TableName = db.Column(db.String(50), primary_key=True)
+    Version = db.Column(db.BigInteger, nullable=False, default=1)
+
 print("--- models.py: FINISHED LOADING (FULL VERSION) ---")
@@ -0,0 +1,202 @@
+# profiling.py
+# Opt-in profiling of live /translate and /stt requests.
+#
+# POST /admin/profile arms capture for the next N requests of a route. Each sampled request
+# is run under cProfile, a wall-clock stack sampler and (when torch is installed) the torch
+# profiler, and leaves a directory under PROFILE_DIR:
+#   meta.json             route, label, wall time, files
+#   cprofile.pstats       load with pstats / snakeviz
+#   cprofile.txt          top functions by cumulative time
+#   stacks.folded         sampled Python stacks, "frame;frame;frame count" lines for
+#                         flamegraph.pl / speedscope (covers tokenizer, generate, librosa)
+#   torch_trace.json      chrome://tracing / Perfetto trace of operator execution
+#   torch_stacks.folded   operator self CPU time by Python stack, flamegraph-ready
+# GET /admin/profiles lists captures and GET /admin/profiles/<capture>/<file> downloads them.
+#
+# When nothing is armed, profile_request() returns a shared no-op context manager after
+# one dictionary check, so requests pay nothing measurable.
+# Only one capture runs at a time (cProfile on Python 3.12+ and the torch profiler refuse a
+# second concurrent session); a sampled request arriving meanwhile runs unprofiled and the
+# sample is left armed for a later request. A request that raises still leaves its capture,
+# with the error recorded in meta.json.
+
+import contextlib
+import cProfile
+import io
+import itertools
+import json
+import os
+import pstats
+import shutil
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"))
+PROFILE_ROUTES = ("translate", "stt")
+MAX_SAMPLES = 50 # Upper bound on requests armed at once per route
+STACK_SAMPLE_INTERVAL_SECONDS = 0.005
+
+_ARMED = {} # route -> requests still to capture; empty when profiling is off
+_armed_lock = threading.Lock()
+_NOT_PROFILING = contextlib.nullcontext()
+_capture_ids = itertools.count(1)
+_capture_lock = threading.Lock() # Held for the whole of the (single) active capture
+
+
+def arm(route, samples):
+    """Captures the next 'samples' requests of 'route' (0 disarms). Returns the armed state."""
+    with _armed_lock:
+        if samples > 0:
+            _ARMED[route] = min(samples, MAX_SAMPLES)
+        else:
+            _ARMED.pop(route, None)
+        return dict(_ARMED)
+
+
+def armed():
+    with _armed_lock:
+        return dict(_ARMED)
+
+
+def profile_request(route, label=""):
+    """Context manager wrapping one request's work; captures it if 'route' is armed."""
+    if not _ARMED:
+        return _NOT_PROFILING
+    if not _capture_lock.acquire(blocking=False):
+        return _NOT_PROFILING # Another capture is running; keep the sample for a later request
+    with _armed_lock:
+        remaining = _ARMED.get(route, 0)
+        if remaining <= 0:
+            _capture_lock.release()
+            return _NOT_PROFILING
+        if remaining == 1:
+            del _ARMED[route]
+        else:
+            _ARMED[route] = remaining - 1
+    return _capture(route, label) # Releases _capture_lock on exit
+
+
+class _StackSampler:
+    """Samples one thread's Python stack at a fixed interval into folded-stack counts."""
+
+    def __init__(self, thread_id, interval=STACK_SAMPLE_INTERVAL_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _torch_profiler():
+    try:
+        from torch.profiler import profile, ProfilerActivity
+    except ImportError:
+        return None
+    activities = [ProfilerActivity.CPU]
+    import torch
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+    return profile(activities=activities, with_stack=True)
+
+
+@contextlib.contextmanager
+def _capture(route, label):
+    try:
+        capture_name = f"{time.strftime('%Y%m%d-%H%M%S')}_{route}_{os.getpid()}_{next(_capture_ids)}"
+        capture_dir = os.path.join(PROFILE_DIR, capture_name)
+        os.makedirs(capture_dir, exist_ok=True)
+        print(f"--- profiling.py: capturing {route} request ({label}) into {capture_dir} ---")
+
+        profiler = cProfile.Profile()
+        torch_profiler = _torch_profiler()
+        sampler = _StackSampler(threading.get_ident())
+        start = time.perf_counter()
+        error = None
+        try:
+            with contextlib.ExitStack() as stack:
+                if torch_profiler is not None:
+                    stack.enter_context(torch_profiler)
+                stack.enter_context(sampler)
+                profiler.enable()
+                try:
+                    yield
+                finally:
+                    profiler.disable()
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            wall_ms = round((time.perf_counter() - start) * 1000, 1)
+            # Written after the request's work is done; still on the request thread, but only for sampled requests
+            _write_capture(capture_dir, route, label, wall_ms, error, profiler, sampler, torch_profiler)
+    finally:
+        _capture_lock.release()
+
+
+def _write_capture(capture_dir, route, label, wall_ms, error, profiler, sampler, torch_profiler):
+    try:
+        profiler.dump_stats(os.path.join(capture_dir, "cprofile.pstats"))
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(60)
+        with open(os.path.join(capture_dir, "cprofile.txt"), "w", encoding="utf-8") as f:
+            f.write(report.getvalue())
+        sampler.write(os.path.join(capture_dir, "stacks.folded"))
+        if torch_profiler is not None:
+            torch_profiler.export_chrome_trace(os.path.join(capture_dir, "torch_trace.json"))
+            torch_profiler.export_stacks(os.path.join(capture_dir, "torch_stacks.folded"), "self_cpu_time_total")
+        meta = {
+            "route": route,
+            "label": label,
+            "wall_ms": wall_ms,
+            "captured_at": time.time(),
+            "error": error,
+            "stack_samples": sum(sampler.counts.values()),
+            "files": sorted(os.listdir(capture_dir)) + ["meta.json"],
+        }
+        with open(os.path.join(capture_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        print(f"--- profiling.py: {route} capture written ({wall_ms} ms request{', failed: ' + error if error else ''}) ---")
+    except Exception as e:
+        print(f"--- profiling.py: ERROR writing capture {os.path.basename(capture_dir)}: {e} ---")
+        shutil.rmtree(capture_dir, ignore_errors=True) # Don't leave a capture without meta.json behind
+
+
+def list_captures():
+    """meta.json of every capture, newest first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    captures = []
+    for name in os.listdir(PROFILE_DIR):
+        meta_path = os.path.join(PROFILE_DIR, name, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                captures.append(dict(json.load(f), name=name))
+    captures.sort(key=lambda meta: meta["captured_at"], reverse=True)
+    return captures
@@ -0,0 +1,169 @@
+# request_log.py
+# Write-behind logging of served translations and transcriptions (TranslationLog and
+# TranscriptionLog in models.py) for analytics and corpus growth.
+#
+# Routes call log_translation() / log_transcription(), which only append a dict to an
+# in-memory buffer. A background thread per table bulk-inserts the buffer in batches (one
+# executemany per batch) every REQUEST_LOG_FLUSH_SECONDS, or sooner once a batch is full.
+# Memory is bounded: when the buffer holds REQUEST_LOG_BUFFER records, new records are
+# dropped and counted. While the database is unreachable the flusher keeps the batch,
+# backs off, and retries; a batch the database rejects outright is dropped and counted.
+#
+# Environment (defaults in brackets):
+#   REQUEST_LOG_ENABLED [1]  REQUEST_LOG_BUFFER [10000]  REQUEST_LOG_BATCH [500]  REQUEST_LOG_FLUSH_SECONDS [1.0]
+
+import atexit
+import collections
+import datetime
+import os
+import threading
+import time
+
+from sqlalchemy.exc import InterfaceError, OperationalError, SQLAlchemyError
+
+from config import app, db
+from metrics import counter, gauge, histogram
+from models import TranslationLog, TranscriptionLog
+
+REQUEST_LOG_ENABLED = os.environ.get("REQUEST_LOG_ENABLED", "1") != "0"
+REQUEST_LOG_BUFFER = int(os.environ.get("REQUEST_LOG_BUFFER", "10000"))
+REQUEST_LOG_BATCH = int(os.environ.get("REQUEST_LOG_BATCH", "500"))
+REQUEST_LOG_FLUSH_SECONDS = float(os.environ.get("REQUEST_LOG_FLUSH_SECONDS", "1.0"))
+MAX_BACKOFF_SECONDS = 30.0
+MAX_TEXT_CHARS = 5000 # Longer texts are truncated before they are buffered
+
+ENQUEUED = counter("request_log_enqueued_total", "Log records buffered for writing.", ["table"])
+WRITTEN = counter("request_log_written_total", "Log records written to the database.", ["table"])
+DROPPED = counter("request_log_dropped_total", "Log records dropped (buffer full or rejected by the database).", ["table", "reason"])
+BUFFERED = gauge("request_log_buffered", "Log records waiting to be written.", ["table"])
+FLUSH_SECONDS = histogram("request_log_flush_seconds", "Time to insert one batch.", ["table"])
+
+
+class WriteBehindLog:
+    """A bounded buffer of rows for one table, drained by a background flusher thread."""
+
+    def __init__(self, model, max_buffer=REQUEST_LOG_BUFFER, batch_size=REQUEST_LOG_BATCH, flush_interval=REQUEST_LOG_FLUSH_SECONDS):
+        self.table = model.__table__
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = collections.deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._healthy = True # False while the database is unreachable (the flusher is backing off)
+
+    def append(self, row):
+        """Buffers one row (never blocks on the database). Returns False if it was dropped."""
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                DROPPED.inc(table=self.table.name, reason="buffer_full")
+                return False
+            self._buffer.append(row)
+            size = len(self._buffer)
+            if self._thread is None:
+                # Started on first use, so it runs in the worker process (not a pre-fork parent)
+                self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.table.name}", daemon=True)
+                self._thread.start()
+        ENQUEUED.inc(table=self.table.name)
+        BUFFERED.set(size, table=self.table.name)
+        if size >= self.batch_size and self._healthy:
+            self._wake.set()
+        return True
+
+    def _take_batch(self):
+        with self._lock:
+            return [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+
+    def _put_back(self, batch):
+        """Returns an unwritten batch to the front of the buffer, dropping what no longer fits."""
+        with self._lock:
+            room = max(0, self.max_buffer - len(self._buffer))
+            kept = batch[:room]
+            self._buffer.extendleft(reversed(kept))
+        if len(batch) > len(kept):
+            DROPPED.inc(len(batch) - len(kept), table=self.table.name, reason="buffer_full")
+
+    def flush(self):
+        """Writes everything buffered. Returns False if the database could not be reached."""
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return True
+            start = time.perf_counter()
+            try:
+                with app.app_context():
+                    with db.engine.begin() as connection:
+                        connection.execute(self.table.insert(), batch)
+            except (OperationalError, InterfaceError) as e:
+                if self._healthy:
+                    print(f"--- request_log.py: database unavailable, buffering '{self.table.name}' rows and retrying: {e.__class__.__name__} ---")
+                self._healthy = False
+                self._put_back(batch)
+                return False
+            except SQLAlchemyError as e:
+                print(f"--- request_log.py: ERROR: database rejected {len(batch)} '{self.table.name}' rows: {e} ---")
+                DROPPED.inc(len(batch), table=self.table.name, reason="rejected")
+                continue
+            finally:
+                BUFFERED.set(len(self._buffer), table=self.table.name)
+            FLUSH_SECONDS.observe(time.perf_counter() - start, table=self.table.name)
+            WRITTEN.inc(len(batch), table=self.table.name)
+            if not self._healthy:
+                print(f"--- request_log.py: database reachable again, writing buffered '{self.table.name}' rows ---")
+                self._healthy = True
+
+    def _run(self):
+        backoff = self.flush_interval
+        while True:
+            self._wake.wait(backoff)
+            self._wake.clear()
+            if self.flush():
+                backoff = self.flush_interval
+            else:
+                backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+
+
+TRANSLATION_LOG = WriteBehindLog(TranslationLog)
+TRANSCRIPTION_LOG = WriteBehindLog(TranscriptionLog)
+
+
+def _clip(text):
+    return text[:MAX_TEXT_CHARS] if isinstance(text, str) else text
+
+
+def log_translation(route, source_lang, target_lang, source_text, translation, engine, latency_ms, degraded_reason=None):
+    if not REQUEST_LOG_ENABLED:
+        return
+    TRANSLATION_LOG.append({
+        "CreatedAt": datetime.datetime.now(datetime.timezone.utc),
+        "Route": route,
+        "SourceLang": source_lang,
+        "TargetLang": target_lang,
+        "SourceText": _clip(source_text),
+        "Translation": _clip(translation),
+        "Engine": engine,
+        "DegradedReason": degraded_reason,
+        "LatencyMs": latency_ms,
+    })
+
+
+def log_transcription(route, source_language_hint, detected_language, transcription, latency_ms):
+    if not REQUEST_LOG_ENABLED:
+        return
+    TRANSCRIPTION_LOG.append({
+        "CreatedAt": datetime.datetime.now(datetime.timezone.utc),
+        "Route": route,
+        "SourceLanguageHint": source_language_hint,
+        "DetectedLanguage": detected_language,
+        "Transcription": _clip(transcription),
+        "LatencyMs": latency_ms,
+    })
+
+
+@atexit.register
+def _flush_on_exit():
+    # Best effort: a database that is down at shutdown loses what is still buffered
+    for log in (TRANSLATION_LOG, TRANSCRIPTION_LOG):
+        if log._buffer:
+            log.flush()
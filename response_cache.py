@@ -0,0 +1,284 @@
+# response_cache.py
+# HTTP caching for the reference-data listings (GET /phrases, /speakers and /audio).
+#
+# Every write to a versioned table bumps that table's row in 'table_versions' inside the same
+# transaction. ORM writes are covered by the Session after_flush hook below; bulk Core writes
+# must call bump_table_versions(). A listing's ETag is derived from its path, its query string
+# and the versions of the tables it reads, so:
+#   - If-None-Match revalidations are answered 304 after one primary-key lookup;
+#   - serialized bodies are kept in an in-memory LRU (per worker) under the same key, so a
+#     repeat load never scans the table. A write changes the key, which retires the old entries.
+# The versions live in the database, so each worker sees the other workers' writes.
+# Bodies of RESPONSE_COMPRESS_MIN_BYTES or more are gzip-compressed for clients that accept it;
+# a cached entry is compressed once and the result is kept with it.
+#
+# Environment (defaults in brackets):
+#   RESPONSE_CACHE_MAX_MB [128]  RESPONSE_CACHE_MAX_ENTRY_MB [32]  RESPONSE_COMPRESS_MIN_BYTES [1024]
+
+import collections
+import gzip
+import hashlib
+import os
+import threading
+import time
+import zlib
+
+from flask import Response, request, stream_with_context
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from config import db
+from metrics import counter, gauge
+from models import Phrase, Speaker, AudioFile, TableVersion
+
+VERSIONED_TABLES = (Phrase.__tablename__, Speaker.__tablename__, AudioFile.__tablename__)
+RESPONSE_CACHE_MAX_BYTES = int(float(os.environ.get("RESPONSE_CACHE_MAX_MB", "128")) * 1024 * 1024)
+RESPONSE_CACHE_MAX_ENTRY_BYTES = int(float(os.environ.get("RESPONSE_CACHE_MAX_ENTRY_MB", "32")) * 1024 * 1024)
+RESPONSE_COMPRESS_MIN_BYTES = int(os.environ.get("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+
+REQUESTS = counter("response_cache_requests_total", "Reference-data GETs by cache result (hit, miss, not_modified, bypass).", ["route", "result"])
+CACHE_BYTES = gauge("response_cache_bytes", "Bytes held by the response cache (plain and gzip bodies).")
+CACHE_ENTRIES = gauge("response_cache_entries", "Responses held by the response cache.")
+
+# What a listing produces on success: an iterable of str chunks and its extra headers
+ListingBody = collections.namedtuple("ListingBody", ["chunks", "headers"])
+
+# Engine URLs whose 'table_versions' table exists. Only a positive result is cached: a missing
+# table is looked for again (at most every VERSIONS_RECHECK_SECONDS), so caching starts once
+# init_db.py has created it, without a restart.
+_VERSIONS_READY = {}
+_VERSIONS_MISSING_CHECKED_AT = {}
+VERSIONS_RECHECK_SECONDS = 5.0
+
+
+# --- Versions ---
+def ensure_table_versions():
+    """Adds any missing 'table_versions' rows (run by init_db after create_all)."""
+    existing = set(db.session.execute(select(TableVersion.TableName)).scalars())
+    for name in VERSIONED_TABLES:
+        if name not in existing:
+            db.session.add(TableVersion(TableName=name, Version=1))
+    db.session.commit()
+    _VERSIONS_MISSING_CHECKED_AT.clear()
+    print(f"--- response_cache.py: table versions ready for {', '.join(VERSIONED_TABLES)} ---")
+
+
+def _versions_ready(connection):
+    key = str(connection.engine.url)
+    if key in _VERSIONS_READY:
+        return True
+    now = time.monotonic()
+    checked_at = _VERSIONS_MISSING_CHECKED_AT.get(key)
+    if checked_at is not None and now - checked_at < VERSIONS_RECHECK_SECONDS:
+        return False
+    if inspect(connection).has_table(TableVersion.__tablename__):
+        _VERSIONS_READY[key] = True
+        _VERSIONS_MISSING_CHECKED_AT.pop(key, None)
+        return True
+    if checked_at is None:
+        print(f"--- response_cache.py: WARNING: no '{TableVersion.__tablename__}' table (run init_db.py); "
+              f"reference-data responses are not cached ---")
+    _VERSIONS_MISSING_CHECKED_AT[key] = now
+    return False
+
+
+def bump_table_versions(connection, tables):
+    """
+    Bumps the versions of 'tables' within the connection's transaction. For bulk Core writes
+    that bypass the ORM hook below.
+    """
+    tables = sorted(set(tables).intersection(VERSIONED_TABLES))
+    if tables and _versions_ready(connection):
+        connection.execute(
+            update(TableVersion).where(TableVersion.TableName.in_(tables)).values(Version=TableVersion.Version + 1)
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_flush(session, flush_context):
+    changed = [*session.new, *session.deleted, *(obj for obj in session.dirty if session.is_modified(obj))]
+    touched = {obj.__table__.name for obj in changed if hasattr(obj, "__table__")}
+    bump_table_versions(session.connection(), touched)
+
+
+def current_versions(tables):
+    """The versions of 'tables' as a tuple, or None when they are unavailable (the response is not cached)."""
+    try:
+        if not _versions_ready(db.session.connection()):
+            return None
+        versions = dict(db.session.execute(
+            select(TableVersion.TableName, TableVersion.Version).where(TableVersion.TableName.in_(tables))
+        ).all())
+    except SQLAlchemyError as e:
+        print(f"--- response_cache.py: could not read table versions, serving uncached: {e} ---")
+        db.session.rollback()
+        return None
+    if len(versions) < len(tables):
+        return None
+    return tuple(versions[t] for t in tables)
+
+
+# --- Cache ---
+class _Entry:
+    __slots__ = ("body", "headers", "gzip_body")
+
+    def __init__(self, body, headers):
+        self.body = body
+        self.headers = headers
+        self.gzip_body = None
+
+    @property
+    def size(self):
+        return len(self.body) + len(self.gzip_body or b"")
+
+
+class ResponseCache:
+    """An LRU of serialized responses bounded by total bytes. Keys end with the table versions."""
+
+    def __init__(self, max_bytes=RESPONSE_CACHE_MAX_BYTES, max_entry_bytes=RESPONSE_CACHE_MAX_ENTRY_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self._entries = collections.OrderedDict()
+        self._latest_versions = {} # tables -> newest versions stored, to retire older entries early
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body, headers):
+        if len(body) > self.max_entry_bytes:
+            return
+        *_, tables, versions = key
+        with self._lock:
+            latest = self._latest_versions.get(tables)
+            if latest is not None and any(v < l for v, l in zip(versions, latest)):
+                return # Built from versions already superseded (a slow miss finishing after a write)
+            if latest != versions:
+                # The tables changed: entries built from older versions can never be hit again
+                for stale in [k for k in self._entries if k[-2] == tables and k[-1] != versions]:
+                    self._bytes -= self._entries.pop(stale).size
+                self._latest_versions[tables] = versions
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key).size
+            entry = _Entry(body, headers)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._latest_versions.clear()
+            self._bytes = 0
+            self._evict()
+
+    def gzip_body(self, key, entry):
+        """The entry's body gzip-compressed (compressed on first use and kept)."""
+        if entry.gzip_body is None:
+            compressed = gzip.compress(entry.body, GZIP_LEVEL)
+            with self._lock:
+                if entry.gzip_body is None and self._entries.get(key) is entry:
+                    entry.gzip_body = compressed
+                    self._bytes += len(compressed)
+                    self._evict()
+            return compressed
+        return entry.gzip_body
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+        CACHE_BYTES.set(self._bytes)
+        CACHE_ENTRIES.set(len(self._entries))
+
+
+CACHE = ResponseCache()
+
+
+# --- Serving ---
+def _accepts_gzip():
+    return request.accept_encodings["gzip"] > 0
+
+
+def _caching_headers(response, etag):
+    response.set_etag(etag, weak=True) # Weak: gzip and identity bodies share it
+    response.headers["Cache-Control"] = "no-cache" # Clients may store it, but must revalidate
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def _stream(chunks, key, headers, compress):
+    """Encodes (and optionally gzips) the chunks; stores the complete plain body in the cache if it fits."""
+    parts = []
+    size = 0
+    keep = key is not None
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None # wbits 31: gzip container
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        if keep:
+            parts.append(data)
+            size += len(data)
+            if size > CACHE.max_entry_bytes:
+                keep, parts = False, []
+        if compressor is not None:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if compressor is not None:
+        yield compressor.flush()
+    if keep:
+        CACHE.put(key, b"".join(parts), headers)
+
+
+def _streamed_response(result, key, mimetype):
+    compress = _accepts_gzip()
+    response = Response(stream_with_context(_stream(result.chunks, key, result.headers, compress)),
+                        mimetype=mimetype, headers=result.headers)
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
+def cached_listing(route, tables, produce, mimetype="application/json"):
+    """
+    Serves a reference-data GET through the cache. 'produce()' runs the query and returns a
+    ListingBody, or a finished (error) response, which is returned uncached.
+    """
+    tables = tuple(tables)
+    versions = current_versions(tables)
+    if versions is None:
+        REQUESTS.inc(route=route, result="bypass")
+        result = produce()
+        if not isinstance(result, ListingBody):
+            return result
+        return _streamed_response(result, None, mimetype)
+
+    key = (request.path, tuple(request.args.items(multi=True)), tables, versions)
+    etag = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:32]
+    if request.if_none_match.contains_weak(etag):
+        REQUESTS.inc(route=route, result="not_modified")
+        return _caching_headers(Response(status=304), etag)
+
+    entry = CACHE.get(key)
+    if entry is not None:
+        REQUESTS.inc(route=route, result="hit")
+        response = Response(mimetype=mimetype, headers=entry.headers)
+        if len(entry.body) >= RESPONSE_COMPRESS_MIN_BYTES and _accepts_gzip():
+            response.set_data(CACHE.gzip_body(key, entry))
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response.set_data(entry.body)
+        return _caching_headers(response, etag)
+
+    result = produce()
+    if not isinstance(result, ListingBody):
+        return result
+    REQUESTS.inc(route=route, result="miss")
+    return _caching_headers(_streamed_response(result, key, mimetype), etag)
@@ -1,18 +1,39 @@
 # sylheti_translator_backend/routes.py
 
-from flask import Blueprint, request, jsonify, render_template
-from config import db # Database interaction needed for other routes
+from flask import Blueprint, request, jsonify, render_template, Response, stream_with_context, send_from_directory
+from config import db, ADMIN_TOKEN # Database interaction needed for other routes
 from models import Phrase, Speaker, AudioFile # Models needed for other routes
+from search import search_phrases, index_phrases, SEARCH_COLUMNS # Importing also registers the index sync listeners
+from admission import admit, parse_deadline, AdmissionRejected, DEADLINE_EXCEEDED # Inference route backpressure
+from metrics import render_metrics
+from hot_reload import RELOAD_TARGETS, start_reload, last_reload, start_model_watcher
+import profiling # Admin-armed request profiling; a no-op unless armed
+from lexicon_fallback import fallback_translate, warm_up_lexicons, DEGRADED_HEADER, RESPONSES as TRANSLATION_RESPONSES
+from request_log import log_translation, log_transcription # Write-behind; never touches the DB on the request path
+from static_assets import asset_url, send_built_asset # Fingerprinted static files (scripts/build_assets.py)
+from response_cache import cached_listing, bump_table_versions, ListingBody # ETags and cached bodies for /phrases, /speakers, /audio
+import hmac # Constant-time admin token comparison
+from werkzeug.security import safe_join # Keeps admin downloads inside PROFILE_DIR
 import traceback # For logging detailed errors if needed
 import os # For file operations
 import uuid # For generating unique filenames
+import json # For serialising streamed (NDJSON) responses
+import time # For per-stage timings
+from urllib.parse import urlencode # For building pagination 'Link' headers
+from sqlalchemy import insert, literal, union_all # Set-based statements for the bulk routes
+from sqlalchemy.exc import IntegrityError # Duplicate natural keys (ux_phrases_natural_key)
+from sqlalchemy.orm import selectinload # Eager loading for /phrases includes
+from utils.listing import (
+    ListingArgsError, parse_listing_args, fetch_batch, fetch_page, iter_keyset_batches,
+    stream_json_array, STREAM_BATCH_SIZE,
+)
 
 # --- Import the unified translation function ---
 # Assumes your inference script is now named 'translator.py'
 # And it contains the function 'translate(text, source_lang, target_lang)'
 # And it loads all necessary models when imported.
 try:
-    from scripts.translator import translate
+    from scripts.translator import translate, translate_stream, lookup_precomputed
     print("Successfully imported 'translate' from scripts.translator")
 except ImportError:
     print("--------------------------------------------------------------------")
@@ -21,16 +42,24 @@ except ImportError:
     print("Translation API endpoint (/translate) will return an error.")
     print("--------------------------------------------------------------------")
     # Define a dummy function so the app doesn't crash on startup
-    def translate(text, source_lang, target_lang):
+    def translate(text, source_lang, target_lang, **kwargs):
         # In a real scenario, you might want the app to fail loudly here
         # depending on how critical translation is at startup.
         print(f"ERROR: Attempted to call dummy translate function for {source_lang}->{target_lang}")
         return "Error: Translation module failed to load on server startup."
+    def translate_stream(text, source_lang, target_lang, **kwargs):
+        yield {"event": "error", "error": "Error: Translation module failed to load on server startup."}
+    def lookup_precomputed(direction, text):
+        return None
 except Exception as e:
      print(f"An unexpected error occurred during import from scripts.translator: {e}")
      print(traceback.format_exc())
-     def translate(text, source_lang, target_lang):
+     def translate(text, source_lang, target_lang, **kwargs):
          return f"Error: Unexpected error loading translation module ({type(e).__name__})."
+     def translate_stream(text, source_lang, target_lang, _error_name=type(e).__name__, **kwargs):
+         yield {"event": "error", "error": f"Error: Unexpected error loading translation module ({_error_name})."}
+     def lookup_precomputed(direction, text):
+         return None
 
 # --- Import the speech recognition function ---
 try:
@@ -42,18 +71,25 @@ except ImportError:
     print("Ensure speech_recognizer.py exists and has the transcribe_audio function.")
     print("Speech-to-Text API endpoint (/stt) will return an error.")
     print("--------------------------------------------------------------------")
-    def transcribe_audio(audio_path):
+    def transcribe_audio(audio_path, source_language=None, **kwargs):
         print(f"ERROR: Attempted to call dummy transcribe_audio function for {audio_path}")
-        return "Error: Speech-to-Text module failed to load on server startup."
+        return {"text": "Error: Speech-to-Text module failed to load on server startup.", "detected_language": None}
 except Exception as e:
      print(f"An unexpected error occurred during import from scripts.speech_recognizer: {e}")
      print(traceback.format_exc())
-     def transcribe_audio(audio_path):
-         return f"Error: Unexpected error loading speech recognition module ({type(e).__name__})."
+     def transcribe_audio(audio_path, source_language=None, **kwargs):
+         return {"text": f"Error: Unexpected error loading speech recognition module ({type(e).__name__}).", "detected_language": None}
+
+
+# --- Checkpoint watcher for hot model reloads (only runs if MODEL_WATCH_INTERVAL_SECONDS > 0) ---
+start_model_watcher()
+# --- Corpus lexicons for degraded translations (built in the background) ---
+warm_up_lexicons()
 
 
 # --- Create the Blueprint (Define only ONCE) ---
 routes_bp = Blueprint("routes", __name__)
+routes_bp.add_app_template_global(asset_url) # {{ asset_url('script.js') }} in templates
 
 # --- Frontend Route ---
 @routes_bp.route("/")
@@ -62,21 +98,78 @@ def index():
     return render_template("index.html")
 
 
-# --- UPDATED Multi-Directional Translation API Endpoint ---
-@routes_bp.route("/translate", methods=["POST"])
-def translate_text_api():
+# Built assets: hashed names, so they can be cached forever (see static_assets.py)
+@routes_bp.route("/static/dist/<path:filename>")
+def built_asset(filename):
+    return send_built_asset(filename)
+
+
+# --- Admission control helpers (see admission.py) ---
+def _rejected_response(error):
+    """429/503 for a request shed by admission control, with a Retry-After hint."""
+    print(f"--- Route shedding request: {error} ---")
+    response = jsonify({"error": f"API Error: {error}"})
+    response.status_code = error.status_code
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+
+def _inference_error_status(message, route, stage):
+    """HTTP status for an 'Error: ...' string from the translator or recognizer."""
+    if "not supported" in message:
+        return 400
+    if "deadline exceeded" in message:
+        DEADLINE_EXCEEDED.inc(route=route, stage=stage)
+        return 504
+    return 500
+
+
+def _is_model_unavailable(message):
+    """True for translator errors meaning the direction has no usable model (not a bad request)."""
+    return "failed to load" in message
+
+
+def _record_translation(route, source_lang, target_lang, text, translation, engine, start, degraded_reason=None):
+    """Counts a served translation by engine and queues it for the translation log."""
+    TRANSLATION_RESPONSES.inc(route=route, engine=engine)
+    log_translation(route, source_lang, target_lang, text, translation, engine, _elapsed_ms(start), degraded_reason)
+
+
+def _precomputed_translation(text, source_lang, target_lang):
+    """The precomputed table's translation of 'text', or None. Checked before admission: a hit never needs a slot."""
+    cleaned_text = text.strip() if isinstance(text, str) else ""
+    if not cleaned_text:
+        return None
+    try:
+        return lookup_precomputed((source_lang, target_lang), cleaned_text)
+    except Exception as e:
+        print(f"--- WARNING: precomputed translation lookup failed, using the model: {e} ---")
+        return None
+
+
+def _degraded_response(fallback):
+    """200 with a lexicon translation, flagged as degraded in the body and a header."""
+    response = jsonify(fallback)
+    response.headers[DEGRADED_HEADER] = fallback["engine"]
+    return response
+
+
+def _request_deadline(body):
+    """Returns (deadline, None) or (None, error_response) for a malformed deadline."""
+    try:
+        return parse_deadline(request.headers, body), None
+    except ValueError as e:
+        return None, (jsonify({"error": f"API Error: {e}"}), 400)
+
+
+def _parse_translate_request(endpoint_error_prefix):
     """
-    Receives text, source language, and target language,
-    and returns translation using the appropriate fine-tuned model.
-    Expects JSON: {"text": "...", "source_lang": "...", "target_lang": "..."}
+    Validates a /translate or /translate_stream JSON body.
+    Returns (text, source_lang, target_lang, deadline, None), or (None, None, None, None, error_response).
     """
-    # Add print statements for debugging API calls
-    print(f"\n--- ENTERING /translate route ---")
-    endpoint_error_prefix = "API Error:" # Consistent prefix for user-facing errors from this endpoint
-
     if not request.is_json:
          print(f"--- Route Error: Request not JSON ---")
-         return jsonify({"error": f"{endpoint_error_prefix} Request must be JSON"}), 415
+         return None, None, None, None, (jsonify({"error": f"{endpoint_error_prefix} Request must be JSON"}), 415)
 
     data = request.get_json()
     text_to_translate = data.get("text")
@@ -88,45 +181,94 @@ def translate_text_api():
     # --- Input Validation ---
     if not text_to_translate: # Check if text exists and is not just whitespace
          print(f"--- Route Error: 'text' field missing or empty ---")
-         return jsonify({"error": f"{endpoint_error_prefix} Required field 'text' is missing or empty"}), 400
+         return None, None, None, None, (jsonify({"error": f"{endpoint_error_prefix} Required field 'text' is missing or empty"}), 400)
     if not source_language:
         print(f"--- Route Error: 'source_lang' field missing ---")
-        return jsonify({"error": f"{endpoint_error_prefix} Required field 'source_lang' is missing"}), 400
+        return None, None, None, None, (jsonify({"error": f"{endpoint_error_prefix} Required field 'source_lang' is missing"}), 400)
     if not target_language:
         print(f"--- Route Error: 'target_lang' field missing ---")
-        return jsonify({"error": f"{endpoint_error_prefix} Required field 'target_lang' is missing"}), 400
+        return None, None, None, None, (jsonify({"error": f"{endpoint_error_prefix} Required field 'target_lang' is missing"}), 400)
     # Optional: Validate language codes if needed
     # valid_langs = ['sylheti', 'bengali', 'english']
     # if source_language not in valid_langs or target_language not in valid_langs:
-    #     return jsonify({"error": f"{endpoint_error_prefix} Invalid source or target language specified"}), 400
+    #     return None, None, None, None, (jsonify({"error": f"{endpoint_error_prefix} Invalid source or target language specified"}), 400)
     if source_language == target_language:
-         return jsonify({"error": f"{endpoint_error_prefix} Source and target languages cannot be the same"}), 400
+         return None, None, None, None, (jsonify({"error": f"{endpoint_error_prefix} Source and target languages cannot be the same"}), 400)
+    deadline, error_response = _request_deadline(data)
+    if error_response:
+        return None, None, None, None, error_response
     # --- End Input Validation ---
+    return text_to_translate, source_language, target_language, deadline, None
+
+
+# --- UPDATED Multi-Directional Translation API Endpoint ---
+@routes_bp.route("/translate", methods=["POST"])
+def translate_text_api():
+    """
+    Receives text, source language, and target language,
+    and returns translation using the appropriate fine-tuned model.
+    Expects JSON: {"text": "...", "source_lang": "...", "target_lang": "..."}
+    """
+    # Add print statements for debugging API calls
+    print(f"\n--- ENTERING /translate route ---")
+    endpoint_error_prefix = "API Error:" # Consistent prefix for user-facing errors from this endpoint
+    request_start = time.perf_counter()
 
+    text_to_translate, source_language, target_language, deadline, error_response = _parse_translate_request(endpoint_error_prefix)
+    if error_response:
+        return error_response
+
+    precomputed = _precomputed_translation(text_to_translate, source_language, target_language)
+    if precomputed is not None:
+        print(f"--- Route returning precomputed translation ---")
+        _record_translation("translate", source_language, target_language, text_to_translate,
+                            precomputed, "table", request_start)
+        return jsonify({"translation": precomputed})
 
     # --- Call the unified translation function ---
     try:
-        print(f"--- Route calling translator.translate function... ---")
-        translation_result = translate(
-            text=text_to_translate,
-            source_lang=source_language,
-            target_lang=target_language
-        )
+        # Table hits were answered above; only requests that need the model take a translate slot
+        # (and one for the direction)
+        with admit("translate", (source_language, target_language), deadline), \
+                profiling.profile_request("translate", f"{source_language}->{target_language}"):
+            print(f"--- Route calling translator.translate function... ---")
+            translation_result = translate(
+                text=text_to_translate,
+                source_lang=source_language,
+                target_lang=target_language,
+                deadline=deadline,
+            )
         print(f"--- Route received result from translator: '{translation_result}' ---")
 
         # Check if the translator function itself returned an error string
         # (e.g., model not loaded, direction not supported, inference failed)
         if isinstance(translation_result, str) and translation_result.startswith("Error:"):
+             if _is_model_unavailable(translation_result):
+                 fallback = fallback_translate(text_to_translate, source_language, target_language, "model_unavailable")
+                 if fallback:
+                     _record_translation("translate", source_language, target_language, text_to_translate,
+                                         fallback["translation"], "lexicon", request_start, "model_unavailable")
+                     return _degraded_response(fallback)
              print(f"--- Route reporting error from translator module ---")
              # Pass the specific error from the translator module back to the client
              # Decide on appropriate status code based on error type
-             status_code = 400 if "not supported" in translation_result else 500
+             status_code = _inference_error_status(translation_result, "translate", "translation")
              return jsonify({"error": translation_result}), status_code
 
         # --- Success Case ---
         print(f"--- Route returning successful translation ---")
+        _record_translation("translate", source_language, target_language, text_to_translate,
+                            translation_result, "model", request_start)
         return jsonify({"translation": translation_result})
 
+    except AdmissionRejected as e:
+        # Overloaded: answer from the corpus lexicon rather than turning the request away
+        fallback = fallback_translate(text_to_translate, source_language, target_language, "overloaded")
+        if fallback:
+            _record_translation("translate", source_language, target_language, text_to_translate,
+                                fallback["translation"], "lexicon", request_start, "overloaded")
+            return _degraded_response(fallback)
+        return _rejected_response(e)
     except Exception as e:
         # Catch any unexpected errors during the call to translate()
         print(f"--- UNEXPECTED ERROR in /translate route while calling translator: {e} ---")
@@ -135,6 +277,102 @@ def translate_text_api():
     # --- End Call to translation function ---
 
 
+# --- Streaming Translation (Server-Sent Events) ---
+def _sse(event, payload):
+    """Formats one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+@routes_bp.route("/translate_stream", methods=["POST"])
+def translate_stream_api():
+    """
+    Same request body as /translate, but streams the translation as Server-Sent Events
+    while it is generated (greedy decoding):
+      event: delta  data: {"text": "<new text>"}            (repeated)
+      event: done   data: {"translation": "<full text>", "timings": {...}}
+      event: error  data: {"error": "..."}
+    When overloaded or the model is unavailable, a lexicon translation is sent as one delta
+    and a done event carrying "degraded": true (see lexicon_fallback.py).
+    Validation errors and shed requests without a fallback (429/503) are plain JSON errors, like /translate.
+    """
+    print(f"\n--- ENTERING /translate_stream route ---")
+    endpoint_error_prefix = "API Error:"
+    request_start = time.perf_counter()
+
+    text_to_translate, source_language, target_language, deadline, error_response = _parse_translate_request(endpoint_error_prefix)
+    if error_response:
+        return error_response
+    sse_headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    def degraded_events(fallback):
+        yield _sse("delta", {"text": fallback["translation"]})
+        yield _sse("done", fallback)
+
+    precomputed = _precomputed_translation(text_to_translate, source_language, target_language)
+    if precomputed is not None:
+        # A table hit is sent as one delta, without taking a translate slot
+        _record_translation("translate_stream", source_language, target_language, text_to_translate,
+                            precomputed, "table", request_start)
+        total_ms = _elapsed_ms(request_start)
+        events = [_sse("delta", {"text": precomputed}),
+                  _sse("done", {"translation": precomputed, "timings": {"first_token_ms": total_ms, "total_ms": total_ms}})]
+        return Response(events, mimetype="text/event-stream", headers=sse_headers)
+
+    try:
+        ticket = admit("translate", (source_language, target_language), deadline)
+    except AdmissionRejected as e:
+        fallback = fallback_translate(text_to_translate, source_language, target_language, "overloaded")
+        if not fallback:
+            return _rejected_response(e)
+        _record_translation("translate_stream", source_language, target_language, text_to_translate,
+                            fallback["translation"], "lexicon", request_start, "overloaded")
+        return Response(degraded_events(fallback), mimetype="text/event-stream",
+                        headers=dict(sse_headers, **{DEGRADED_HEADER: fallback["engine"]}))
+
+    def generate_events():
+        start = time.perf_counter()
+        first_token_ms = None
+        try:
+            for event in translate_stream(text_to_translate, source_language, target_language, deadline=deadline):
+                if event["event"] == "delta":
+                    if first_token_ms is None:
+                        first_token_ms = _elapsed_ms(start)
+                    yield _sse("delta", {"text": event["text"]})
+                elif event["event"] == "done":
+                    _record_translation("translate_stream", source_language, target_language, text_to_translate,
+                                        event["translation"], "model", request_start)
+                    yield _sse("done", {
+                        "translation": event["translation"],
+                        "timings": {"first_token_ms": first_token_ms, "total_ms": _elapsed_ms(start)},
+                    })
+                else:
+                    fallback = None
+                    if _is_model_unavailable(event["error"]) and first_token_ms is None:
+                        fallback = fallback_translate(text_to_translate, source_language, target_language, "model_unavailable")
+                    if fallback:
+                        _record_translation("translate_stream", source_language, target_language, text_to_translate,
+                                            fallback["translation"], "lexicon", request_start, "model_unavailable")
+                        yield from degraded_events(fallback)
+                    else:
+                        _inference_error_status(event["error"], "translate_stream", "translation")
+                        yield _sse("error", {"error": event["error"]})
+        except Exception as e:
+            print(f"--- UNEXPECTED ERROR in /translate_stream route: {e} ---")
+            print(traceback.format_exc())
+            yield _sse("error", {"error": f"{endpoint_error_prefix} An internal server error occurred during translation."})
+        finally:
+            ticket.release()
+
+    response = Response(
+        stream_with_context(generate_events()),
+        mimetype="text/event-stream",
+        headers=sse_headers,
+    )
+    # Also frees the slot if the client goes away before the stream is started
+    response.call_on_close(ticket.release)
+    return response
+
+
 # --- NEW Speech-to-Text (STT) API Endpoint ---
 @routes_bp.route("/stt", methods=["POST"])
 def speech_to_text_api():
@@ -144,6 +382,7 @@ def speech_to_text_api():
     """
     print(f"\n--- ENTERING /stt route ---")
     endpoint_error_prefix = "API Error:" # Consistent prefix for user-facing errors from this endpoint
+    request_start = time.perf_counter()
 
     # 1. Check for audio file in request
     if 'audio_file' not in request.files:
@@ -159,6 +398,9 @@ def speech_to_text_api():
 
     # Get requested source language hint (if any)
     source_language = request.form.get("source_language", None)
+    deadline, error_response = _request_deadline(request.form)
+    if error_response:
+        return error_response
 
     if audio_file:
         # Ensure a temporary directory exists
@@ -178,12 +420,13 @@ def speech_to_text_api():
             print(f"--- Route calling speech_recognizer.transcribe_audio function... ---")
             
             # Get transcription result (now a dictionary with text and detected language)
-            result = transcribe_audio(temp_filepath, source_language=source_language)
+            with admit("stt", deadline=deadline), profiling.profile_request("stt", source_language or "auto"):
+                result = transcribe_audio(temp_filepath, source_language=source_language, deadline=deadline)
             
             # Check for error
             if isinstance(result, dict) and result.get("text", "").startswith("Error:"):
                 print(f"--- Route reporting error from speech_recognizer module ---")
-                return jsonify({"error": result["text"]}), 500
+                return jsonify({"error": result["text"]}), _inference_error_status(result["text"], "stt", "transcription")
                 
             # Extract text and detected language
             transcription_text = result.get("text", "")
@@ -193,11 +436,14 @@ def speech_to_text_api():
 
             # Success Case
             print(f"--- Route returning successful transcription ---")
+            log_transcription("stt", source_language, detected_language, transcription_text, _elapsed_ms(request_start))
             return jsonify({
                 "transcription": transcription_text,
                 "detected_language": detected_language
             })
 
+        except AdmissionRejected as e:
+            return _rejected_response(e)
         except Exception as e:
             print(f"--- UNEXPECTED ERROR in /stt route during audio processing: {e} ---")
             print(traceback.format_exc())
@@ -212,22 +458,586 @@ def speech_to_text_api():
     return jsonify({"error": f"{endpoint_error_prefix} Unexpected error processing audio file."}), 500
 
 
+# --- One-shot Speech-to-Translation API Endpoint ---
+def _elapsed_ms(start):
+    """Milliseconds elapsed since a time.perf_counter() start value."""
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def _run_speech_translation(temp_filepath, source_language, target_language, deadline=None, stt_ticket=None):
+    """
+    Generator that runs transcription -> script detection -> translation in-process
+    and yields one event dict per stage. Both stages reuse the models that
+    scripts.speech_recognizer and scripts.translator loaded at import time, and
+    share the request's deadline. 'stt_ticket' (the caller's 'stt' slot) is released once
+    transcription is done; translation takes its own 'translate' slot for the detected direction.
+    """
+    timings = {}
+    request_start = time.perf_counter()
+
+    stage_start = time.perf_counter()
+    result = transcribe_audio(temp_filepath, source_language=source_language, deadline=deadline)
+    timings["transcription_ms"] = _elapsed_ms(stage_start)
+    if stt_ticket is not None:
+        stt_ticket.release()
+
+    if not isinstance(result, dict) or result.get("text", "").startswith("Error:"):
+        error_text = result.get("text") if isinstance(result, dict) else str(result)
+        yield {"event": "error", "stage": "transcription", "error": error_text, "timings": timings}
+        return
+
+    transcription_text = result.get("text", "")
+    # transcribe_audio() already ran detect_script() on the cleaned transcript
+    detected_language = result.get("detected_language") or "sylheti"
+    log_transcription("speech_translate", source_language, detected_language, transcription_text, timings["transcription_ms"])
+    yield {
+        "event": "transcript",
+        "transcription": transcription_text,
+        "detected_language": detected_language,
+        "timings": dict(timings),
+    }
+
+    translation_result = None
+    degraded = {}
+    if detected_language == target_language:
+        # Nothing to translate; the client decides which other language to use.
+        print(f"--- Detected language equals target ({target_language}); skipping translation ---")
+        timings["translation_ms"] = 0.0
+    elif transcription_text:
+        stage_start = time.perf_counter()
+        engine = "table"
+        translation_result = _precomputed_translation(transcription_text, detected_language, target_language)
+        if translation_result is None:
+            engine = "model"
+            try:
+                with admit("translate", (detected_language, target_language), deadline):
+                    translation_result = translate(
+                        text=transcription_text,
+                        source_lang=detected_language,
+                        target_lang=target_language,
+                        deadline=deadline,
+                    )
+            except AdmissionRejected as e:
+                # Overloaded: answer from the corpus lexicon, as /translate does
+                fallback = fallback_translate(transcription_text, detected_language, target_language, "overloaded")
+                if not fallback:
+                    timings["translation_ms"] = _elapsed_ms(stage_start)
+                    timings["total_ms"] = _elapsed_ms(request_start)
+                    yield {"event": "error", "stage": "translation", "error": f"API Error: {e}", "timings": timings,
+                           "status_code": e.status_code, "retry_after": e.retry_after}
+                    return
+                engine, translation_result = "lexicon", fallback["translation"]
+                degraded = {"degraded": True, "degraded_reason": "overloaded"}
+        timings["translation_ms"] = _elapsed_ms(stage_start)
+
+        if isinstance(translation_result, str) and translation_result.startswith("Error:"):
+            timings["total_ms"] = _elapsed_ms(request_start)
+            yield {"event": "error", "stage": "translation", "error": translation_result, "timings": timings}
+            return
+        TRANSLATION_RESPONSES.inc(route="speech_translate", engine=engine)
+        log_translation("speech_translate", detected_language, target_language, transcription_text,
+                        translation_result, engine, timings["translation_ms"], degraded.get("degraded_reason"))
+    else:
+        translation_result = ""
+        timings["translation_ms"] = 0.0
+
+    timings["total_ms"] = _elapsed_ms(request_start)
+    yield {
+        "event": "result",
+        "transcription": transcription_text,
+        "detected_language": detected_language,
+        "target_language": target_language,
+        "translation": translation_result,
+        "timings": timings,
+        **degraded,
+    }
+
+
+@routes_bp.route("/speech_translate", methods=["POST"])
+def speech_translate_api():
+    """
+    Receives an audio file and a target language, and returns the transcript,
+    detected language, translation and per-stage timings in a single round trip.
+    Expects form-data: 'audio_file', 'target_language', optional 'source_language'
+    hint and optional 'stream' ("1"/"true") for an NDJSON response that emits the
+    transcript before the translation is ready.
+    """
+    print(f"\n--- ENTERING /speech_translate route ---")
+    endpoint_error_prefix = "API Error:"
+
+    if 'audio_file' not in request.files:
+        return jsonify({"error": f"{endpoint_error_prefix} No audio file provided"}), 400
+
+    audio_file = request.files['audio_file']
+    if audio_file.filename == '':
+        return jsonify({"error": f"{endpoint_error_prefix} No selected audio file"}), 400
+
+    target_language = request.form.get("target_language")
+    if not target_language:
+        return jsonify({"error": f"{endpoint_error_prefix} Required field 'target_language' is missing"}), 400
+    source_language = request.form.get("source_language", None)
+    stream_response = request.form.get("stream", "").lower() in ("1", "true", "yes")
+    deadline, error_response = _request_deadline(request.form)
+    if error_response:
+        return error_response
+    # Transcription runs under an 'stt' slot (released when it finishes); translation then
+    # takes a 'translate' slot for the detected direction
+    try:
+        ticket = admit("stt", deadline=deadline)
+    except AdmissionRejected as e:
+        return _rejected_response(e)
+
+    temp_dir = "temp_audio_uploads"
+    os.makedirs(temp_dir, exist_ok=True)
+    temp_filepath = os.path.join(temp_dir, f"{uuid.uuid4()}_{audio_file.filename}")
+    try:
+        audio_file.save(temp_filepath)
+    except Exception:
+        ticket.release()
+        raise
+    print(f"--- Saved uploaded audio to: {temp_filepath} ---")
+
+    def cleanup():
+        ticket.release()
+        if os.path.exists(temp_filepath):
+            os.remove(temp_filepath)
+            print(f"--- Cleaned up temporary file: {temp_filepath} ---")
+
+    if stream_response:
+        def generate():
+            try:
+                for event in _run_speech_translation(temp_filepath, source_language, target_language, deadline, ticket):
+                    if event["event"] == "error" and "status_code" not in event:
+                        _inference_error_status(event["error"], "speech_translate", event["stage"])
+                    yield json.dumps(event, ensure_ascii=False) + "\n"
+            except Exception as e:
+                print(f"--- UNEXPECTED ERROR in /speech_translate stream: {e} ---")
+                print(traceback.format_exc())
+                yield json.dumps({"event": "error", "error": f"{endpoint_error_prefix} An internal server error occurred."}) + "\n"
+            finally:
+                cleanup()
+        response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+        response.call_on_close(cleanup)
+        return response
+
+    try:
+        final_event = None
+        for event in _run_speech_translation(temp_filepath, source_language, target_language, deadline, ticket):
+            final_event = event
+        if final_event["event"] == "error":
+            body = {"error": final_event["error"], "stage": final_event["stage"], "timings": final_event["timings"]}
+            if "status_code" in final_event:
+                # Shed by admission control at the translation stage
+                return jsonify(body), final_event["status_code"], {"Retry-After": str(final_event["retry_after"])}
+            status_code = _inference_error_status(final_event["error"], "speech_translate", final_event["stage"])
+            return jsonify(body), status_code
+        final_event.pop("event")
+        print(f"--- Route returning speech translation (timings: {final_event['timings']}) ---")
+        return jsonify(final_event)
+    except Exception as e:
+        print(f"--- UNEXPECTED ERROR in /speech_translate route: {e} ---")
+        print(traceback.format_exc())
+        return jsonify({"error": f"{endpoint_error_prefix} An internal server error occurred during speech translation."}), 500
+    finally:
+        cleanup()
+
+
+# --- Metrics (Prometheus text format) ---
+@routes_bp.route("/metrics", methods=["GET"])
+def metrics_api():
+    """Admission queue depths, shed requests and other in-process metrics (see metrics.py)."""
+    return Response(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# --- Admin Routes ---
+def _require_admin():
+    """Returns an error response unless the request carries 'Authorization: Bearer <ADMIN_TOKEN>'."""
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "API Error: Admin endpoints are disabled (ADMIN_TOKEN is not set)"}), 403
+    supplied = request.headers.get("Authorization", "")
+    if supplied.startswith("Bearer "):
+        supplied = supplied[len("Bearer "):]
+    if not hmac.compare_digest(supplied.encode(), ADMIN_TOKEN.encode()):
+        return jsonify({"error": "API Error: Invalid or missing admin token"}), 401
+    return None
+
+
+@routes_bp.route("/admin/reload", methods=["POST"])
+def admin_reload_api():
+    """
+    Reloads models in the background without downtime (see hot_reload.py).
+    Optional JSON: {"target": "all" | "translator" | "whisper",
+                    "directions": [["sylheti", "bengali"], ...]}  (translator only; default all)
+    Returns 202 when started, 409 if a reload is already running. Poll GET /admin/reload for the result.
+    """
+    error_response = _require_admin()
+    if error_response:
+        return error_response
+    data = request.get_json(silent=True) or {}
+    target = data.get("target", "all")
+    if target not in RELOAD_TARGETS:
+        return jsonify({"error": f"API Error: 'target' must be one of {', '.join(RELOAD_TARGETS)}"}), 400
+    directions = data.get("directions")
+    if directions is not None:
+        if not isinstance(directions, list) or not all(isinstance(d, list) and len(d) == 2 for d in directions):
+            return jsonify({"error": "API Error: 'directions' must be a list of [source_lang, target_lang] pairs"}), 400
+        directions = [tuple(d) for d in directions]
+
+    if not start_reload(target, directions):
+        return jsonify({"error": "API Error: A reload is already running", "reload": last_reload()}), 409
+    print(f"--- Admin started a {target} model reload ---")
+    return jsonify({"status": "started", "target": target}), 202
+
+
+@routes_bp.route("/admin/reload", methods=["GET"])
+def admin_reload_status_api():
+    """The last (or running) reload with per-model load/warm-up timings."""
+    error_response = _require_admin()
+    if error_response:
+        return error_response
+    return jsonify(last_reload())
+
+
+@routes_bp.route("/admin/profile", methods=["POST"])
+def admin_profile_api():
+    """
+    Arms profiling of the next N requests of a route.
+    JSON: {"route": "translate" | "stt", "samples": N}  (samples 0 disarms)
+    Captures are listed at GET /admin/profiles (see profiling.py for the files written).
+    """
+    error_response = _require_admin()
+    if error_response:
+        return error_response
+    data = request.get_json(silent=True) or {}
+    route = data.get("route")
+    samples = data.get("samples", 1)
+    if route not in profiling.PROFILE_ROUTES:
+        return jsonify({"error": f"API Error: 'route' must be one of {', '.join(profiling.PROFILE_ROUTES)}"}), 400
+    if not isinstance(samples, int) or isinstance(samples, bool) or samples < 0:
+        return jsonify({"error": "API Error: 'samples' must be a non-negative integer"}), 400
+    armed = profiling.arm(route, samples)
+    print(f"--- Admin armed profiling: {armed} ---")
+    return jsonify({"armed": armed, "max_samples": profiling.MAX_SAMPLES})
+
+
+@routes_bp.route("/admin/profiles", methods=["GET"])
+def admin_profiles_api():
+    """Captured profiles (newest first) and what is still armed."""
+    error_response = _require_admin()
+    if error_response:
+        return error_response
+    return jsonify({"armed": profiling.armed(), "captures": profiling.list_captures()})
+
+
+@routes_bp.route("/admin/profiles/<capture>/<filename>", methods=["GET"])
+def admin_profile_download_api(capture, filename):
+    """Downloads one file of a capture. Both segments must stay inside PROFILE_DIR (404 otherwise)."""
+    error_response = _require_admin()
+    if error_response:
+        return error_response
+    capture_dir = safe_join(profiling.PROFILE_DIR, capture)
+    if capture_dir is None or capture in (".", "") or not os.path.isfile(os.path.join(capture_dir, "meta.json")):
+        return jsonify({"error": "API Error: No such capture"}), 404
+    return send_from_directory(capture_dir, filename, as_attachment=True)
+
+
 # === Database Management Routes (Keep these as they are) ===
 
-# Get all Phrases
+# --- Shared listing helper for the reference-data GET routes ---
+PHRASE_FIELDS = ["PhraseID", "SylhetiText", "BengaliText", "EnglishText"]
+SPEAKER_FIELDS = ["SpeakerID", "Name", "Gender", "Region"]
+AUDIO_FIELDS = ["AudioFileID", "PhraseID", "SpeakerID", "FilePath", "DurationSeconds", "SampleRate"]
+AUDIO_DEFAULT_FIELDS = ["AudioFileID", "PhraseID", "SpeakerID", "FilePath"]
+
+# Maps the 'lang' query argument to the Phrase column it filters on
+PHRASE_LANG_COLUMNS = {
+    "sylheti": Phrase.SylhetiText,
+    "bengali": Phrase.BengaliText,
+    "english": Phrase.EnglishText,
+}
+
+
+def _listing_response(model, id_column_name, allowed_fields, filters, label, default_fields=None):
+    """
+    Builds a streamed JSON array response for a keyset-paginated listing.
+    With ?limit= a single page is returned and the cursor for the next page is sent
+    in the 'X-Next-Cursor' header (absent on the last page). Without ?limit= every
+    matching row is streamed in primary-key order, one batch at a time.
+    Responses carry an ETag and are served from the response cache until the table changes
+    (see response_cache.py).
+    """
+    return cached_listing(request.path, [model.__tablename__],
+                          lambda: _listing_body(model, id_column_name, allowed_fields, filters, label, default_fields))
+
+
+def _listing_body(model, id_column_name, allowed_fields, filters, label, default_fields):
+    args = request.args
+    if default_fields and not args.get("fields"):
+        args = args.copy()
+        args["fields"] = ",".join(default_fields)
+    try:
+        listing = parse_listing_args(args, model, id_column_name, allowed_fields)
+    except ListingArgsError as e:
+        return jsonify({"error": str(e)}), 400
+
+    id_column = getattr(model, id_column_name)
+    headers = {}
+    try:
+        if listing["limit"] is not None:
+            rows, next_cursor = fetch_page(listing["columns"], id_column, filters, listing["after_id"], listing["limit"])
+            batches = [rows]
+            if next_cursor is not None:
+                headers["X-Next-Cursor"] = str(next_cursor)
+                next_args = request.args.copy()
+                next_args["after_id"] = str(next_cursor)
+                headers["Link"] = f'<{request.path}?{urlencode(list(next_args.items(multi=True)))}>; rel="next"'
+        else:
+            # Fetch the first batch eagerly so database errors still produce a 500
+            first_batch = fetch_batch(listing["columns"], id_column, filters, listing["after_id"], STREAM_BATCH_SIZE)
+            batches = iter_keyset_batches(listing["columns"], id_column, filters, listing["after_id"], first_batch=first_batch)
+    except Exception as e:
+        print(f"Error fetching {label}: {e}")
+        return jsonify({"error": f"Could not retrieve {label} from database"}), 500
+
+    return ListingBody(stream_json_array(batches), headers)
+
+
+# Get Phrases (keyset-paginated, filterable)
 @routes_bp.route("/phrases", methods=["GET"])
 def get_phrases():
-    """Returns all phrases currently in the database."""
+    """
+    Returns phrases as a JSON array, optionally paginated, projected and filtered.
+    Query args: limit, after_id, fields (see utils.listing), plus
+        q       - text to search for
+        lang    - 'sylheti', 'bengali' or 'english' (default: match any of the three)
+        match   - 'prefix' (default, index-backed) or 'contains'
+        include - 'audio' or 'audio,speaker': attach each phrase's recordings (and their
+                  speakers). Always paginated; ?limit= defaults to INCLUDE_DEFAULT_PAGE_SIZE (max 400).
+    """
+    filters = []
+    query_text = request.args.get("q", "").strip()
+    if query_text:
+        lang = request.args.get("lang")
+        match = request.args.get("match", "prefix")
+        if lang and lang not in PHRASE_LANG_COLUMNS:
+            return jsonify({"error": f"Invalid 'lang'. Must be one of: {list(PHRASE_LANG_COLUMNS)}"}), 400
+        if match not in ("prefix", "contains"):
+            return jsonify({"error": "Invalid 'match'. Must be 'prefix' or 'contains'"}), 400
+
+        columns = [PHRASE_LANG_COLUMNS[lang]] if lang else list(PHRASE_LANG_COLUMNS.values())
+        if match == "prefix":
+            conditions = [col.startswith(query_text, autoescape=True) for col in columns]
+        else:
+            conditions = [col.icontains(query_text, autoescape=True) for col in columns]
+        filters.append(db.or_(*conditions))
+
+    if request.args.get("include"):
+        include, error = _parse_phrase_include(request.args["include"])
+        if error:
+            return jsonify({"error": error}), 400
+        return cached_listing(request.path, _include_tables(include), lambda: _phrase_page_with_includes(filters, include))
+    return _listing_response(Phrase, "PhraseID", PHRASE_FIELDS, filters, "phrases")
+
+
+# --- Phrases with their recordings and speakers (eager-loaded; no per-row queries) ---
+PHRASE_INCLUDES = ("audio", "speaker")
+INCLUDE_DEFAULT_PAGE_SIZE = 100
+INCLUDE_MAX_PAGE_SIZE = 400 # With the +1 probe row, stays within one selectinload IN query (500 parents)
+
+
+def _parse_phrase_include(value):
+    """Returns (set of includes, error message)."""
+    include = {part.strip() for part in value.split(",") if part.strip()}
+    unknown = include.difference(PHRASE_INCLUDES)
+    if unknown:
+        return None, f"Unknown include(s): {', '.join(sorted(unknown))}. Allowed: {', '.join(PHRASE_INCLUDES)}"
+    if "speaker" in include and "audio" not in include:
+        return None, "include=speaker requires audio (speakers are attached to each recording)"
+    return include, None
+
+
+def _include_tables(include):
+    tables = [Phrase.__tablename__]
+    if "audio" in include:
+        tables.append(AudioFile.__tablename__)
+    if "speaker" in include:
+        tables.append(Speaker.__tablename__)
+    return tables
+
+
+def _phrase_loader_options(include):
+    """One extra SELECT ... WHERE PhraseID IN (...) for the page's recordings, with their speakers joined in."""
+    if "audio" not in include:
+        return []
+    loader = selectinload(Phrase.audio_files)
+    if "speaker" in include:
+        loader = loader.joinedload(AudioFile.speaker)
+    return [loader]
+
+
+def _phrase_dict(phrase, fields, include):
+    data = {name: getattr(phrase, name) for name in fields}
+    if "audio" in include:
+        data["audio"] = []
+        for audio in sorted(phrase.audio_files, key=lambda a: a.AudioFileID):
+            audio_data = {name: getattr(audio, name) for name in AUDIO_FIELDS if name != "PhraseID"}
+            if "speaker" in include:
+                audio_data["speaker"] = {name: getattr(audio.speaker, name) for name in SPEAKER_FIELDS}
+            data["audio"].append(audio_data)
+    return data
+
+
+def _phrase_page_with_includes(filters, include):
+    """
+    One keyset page of phrases with their includes, in a constant number of queries (the
+    phrases, plus one for recordings and speakers) whatever the page size.
+    ?limit= defaults to INCLUDE_DEFAULT_PAGE_SIZE and is capped at INCLUDE_MAX_PAGE_SIZE.
+    """
+    args = request.args
+    if args.get("limit") is None:
+        args = args.copy()
+        args["limit"] = str(INCLUDE_DEFAULT_PAGE_SIZE)
+    try:
+        listing = parse_listing_args(args, Phrase, "PhraseID", PHRASE_FIELDS)
+    except ListingArgsError as e:
+        return jsonify({"error": str(e)}), 400
+    listing["limit"] = min(listing["limit"], INCLUDE_MAX_PAGE_SIZE)
+
+    stmt = db.select(Phrase).options(*_phrase_loader_options(include)).where(*filters)
+    if listing["after_id"] is not None:
+        stmt = stmt.where(Phrase.PhraseID > listing["after_id"])
     try:
-        phrases = Phrase.query.all()
-        return jsonify([
-            {"PhraseID": p.PhraseID, "SylhetiText": p.SylhetiText, "BengaliText": p.BengaliText, "EnglishText": p.EnglishText}
-            for p in phrases
-        ])
+        phrases = db.session.execute(stmt.order_by(Phrase.PhraseID).limit(listing["limit"] + 1)).unique().scalars().all()
+        fields = [column.key for column in listing["columns"]]
+        rows = [_phrase_dict(phrase, fields, include) for phrase in phrases[:listing["limit"]]]
     except Exception as e:
-        print(f"Error fetching phrases: {e}")
+        print(f"Error fetching phrases with {sorted(include)}: {e}")
         return jsonify({"error": "Could not retrieve phrases from database"}), 500
 
+    headers = {}
+    if len(phrases) > listing["limit"]:
+        next_cursor = rows[-1]["PhraseID"]
+        headers["X-Next-Cursor"] = str(next_cursor)
+        next_args = request.args.copy()
+        next_args["after_id"] = str(next_cursor)
+        headers["Link"] = f'<{request.path}?{urlencode(list(next_args.items(multi=True)))}>; rel="next"'
+    return ListingBody([json.dumps(rows, ensure_ascii=False)], headers)
+
+
+# Get one Phrase with its recordings and speakers
+@routes_bp.route("/phrases/<int:id>", methods=["GET"])
+def get_phrase(id):
+    """
+    Returns a phrase with its audio entries, each with its speaker, in two queries.
+    ?include= narrows what is attached (default 'audio,speaker'; pass 'include=' for the phrase alone).
+    """
+    include, error = _parse_phrase_include(request.args.get("include", ",".join(PHRASE_INCLUDES)))
+    if error:
+        return jsonify({"error": error}), 400
+
+    def produce():
+        try:
+            phrase = db.session.execute(
+                db.select(Phrase).options(*_phrase_loader_options(include)).where(Phrase.PhraseID == id)
+            ).unique().scalar_one_or_none()
+        except Exception as e:
+            print(f"Error fetching phrase {id}: {e}")
+            return jsonify({"error": f"Could not retrieve phrase {id} from database"}), 500
+        if phrase is None:
+            return jsonify({"error": f"Phrase {id} not found"}), 404
+        return ListingBody([json.dumps(_phrase_dict(phrase, PHRASE_FIELDS, include), ensure_ascii=False)], {})
+
+    return cached_listing(request.path, _include_tables(include), produce)
+
+
+# Ranked full-text search over Phrases
+@routes_bp.route("/phrases/search", methods=["GET"])
+def search_phrases_api():
+    """
+    Ranked search over the phrase book (see search.py).
+    Query args: q (required), lang ('sylheti', 'bengali' or 'english'; default all three),
+    limit (default 20, max 100). Text is normalised (zero-width joiners, nukta forms,
+    punctuation, case) on both the query and the index side.
+    """
+    query_text = request.args.get("q", "").strip()
+    if not query_text:
+        return jsonify({"error": "Required query argument 'q' is missing or empty"}), 400
+    lang = request.args.get("lang")
+    if lang and lang not in SEARCH_COLUMNS:
+        return jsonify({"error": f"Invalid 'lang'. Must be one of: {list(SEARCH_COLUMNS)}"}), 400
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), 100)
+    except ValueError:
+        return jsonify({"error": "'limit' must be an integer"}), 400
+
+    try:
+        ranked = search_phrases(query_text, lang=lang, limit=limit)
+        phrases_by_id = {}
+        if ranked:
+            rows = db.session.execute(
+                db.select(Phrase.PhraseID, Phrase.SylhetiText, Phrase.BengaliText, Phrase.EnglishText)
+                .where(Phrase.PhraseID.in_([phrase_id for phrase_id, _ in ranked]))
+            ).all()
+            phrases_by_id = {row.PhraseID: dict(row._mapping) for row in rows}
+        results = []
+        for phrase_id, score in ranked:
+            if phrase_id in phrases_by_id:
+                results.append({**phrases_by_id[phrase_id], "score": round(score, 4)})
+        return jsonify(results)
+    except Exception as e:
+        print(f"Error searching phrases for '{query_text}': {e}")
+        print(traceback.format_exc())
+        return jsonify({"error": "Could not search phrases"}), 500
+
+
+# --- Shared helpers for the bulk write routes (POST /phrases/bulk, /speakers/bulk, /audio/bulk) ---
+# Every item is validated before anything is written; valid batches are inserted with one
+# statement in one transaction. Results are reported per item, by position in the request.
+BULK_MAX_ITEMS = 1000
+SPEAKER_GENDERS = ['Male', 'Female', 'Other']
+
+
+def _bulk_items():
+    """Returns (items, error_response) for a body that is a JSON array of objects (or {"items": [...]})."""
+    items = request.get_json(silent=True)
+    if isinstance(items, dict):
+        items = items.get("items")
+    if not isinstance(items, list) or not items:
+        return None, (jsonify({"error": "Request body must be a non-empty JSON array of objects (or {\"items\": [...]})"}), 400)
+    if len(items) > BULK_MAX_ITEMS:
+        return None, (jsonify({"error": f"Too many items ({len(items)}); at most {BULK_MAX_ITEMS} per request"}), 413)
+    return items, None
+
+
+def _text_field_errors(item, required, optional=()):
+    """The first problem with an item's text fields, or None."""
+    if not isinstance(item, dict):
+        return "Item must be a JSON object"
+    missing = [field for field in required if not isinstance(item.get(field), str) or not item[field].strip()]
+    if missing:
+        return f"Missing or empty field(s): {', '.join(missing)}"
+    for field in optional:
+        if item.get(field) is not None and not isinstance(item[field], str):
+            return f"'{field}' must be a string or null"
+    return None
+
+
+def _bulk_validation_response(errors, count):
+    """400 with every item's validation result; nothing was written."""
+    results = [{"index": i, "status": "invalid", "error": errors[i]} if i in errors else {"index": i, "status": "valid"}
+               for i in range(count)]
+    return jsonify({"error": f"{len(errors)} of {count} items are invalid; nothing was written", "results": results}), 400
+
+
+def _bulk_insert(model, id_column, rows):
+    """Inserts 'rows' in one statement (batched by SQLAlchemy); returns the new IDs in input order."""
+    return db.session.execute(insert(model).returning(id_column, sort_by_parameter_order=True), rows).scalars().all()
+
+
+def _bulk_created_response(label, id_name, new_ids):
+    results = [{"index": i, "status": "created", id_name: new_id} for i, new_id in enumerate(new_ids)]
+    return jsonify({"message": f"{len(new_ids)} {label} added Successfully", "results": results}), 201
+
 
 # Add a new Phrase
 @routes_bp.route("/phrases", methods=["POST"])
@@ -244,12 +1054,74 @@ def add_phrase():
         db.session.add(new_phrase)
         db.session.commit()
         return jsonify({"message": "Phrase added Successfully", "PhraseID": new_phrase.PhraseID}), 201
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "A phrase with this SylhetiText and BengaliText already exists"}), 409
     except Exception as e:
          print(f"Error adding phrase: {e}")
          db.session.rollback() # Rollback in case of error
          return jsonify({"error": "Could not add phrase to database"}), 500
 
 
+# Add many Phrases in one transaction
+@routes_bp.route("/phrases/bulk", methods=["POST"])
+def add_phrases_bulk():
+    """
+    Adds a JSON array of phrase triplets (the objects POST /phrases takes) in one transaction.
+    If any item is invalid nothing is written and each item's result is returned with a 400.
+    """
+    items, error_response = _bulk_items()
+    if error_response:
+        return error_response
+    errors = {}
+    for i, item in enumerate(items):
+        error = _text_field_errors(item, ("SylhetiText", "BengaliText"), optional=("EnglishText",))
+        if error is None and "EnglishText" not in item:
+            error = "Missing field: EnglishText (may be null)"
+        if error:
+            errors[i] = error
+
+    # The natural key (SylhetiText, BengaliText) is unique: check the batch and the table up front
+    valid = [(i, (item["SylhetiText"], item["BengaliText"])) for i, item in enumerate(items) if i not in errors]
+    try:
+        sylheti_values = list({key[0] for _, key in valid})
+        existing_keys = set(db.session.execute(
+            db.select(Phrase.SylhetiText, Phrase.BengaliText).where(Phrase.SylhetiText.in_(sylheti_values))
+        ).tuples()) if valid else set()
+    except Exception as e:
+        print(f"Error checking phrases for duplicates: {e}")
+        db.session.rollback()
+        return jsonify({"error": "Could not validate phrases against the database"}), 500
+    seen_keys = set()
+    for i, key in valid:
+        if key in existing_keys:
+            errors[i] = "A phrase with this SylhetiText and BengaliText already exists"
+        elif key in seen_keys:
+            errors[i] = "SylhetiText and BengaliText appear more than once in this request"
+        seen_keys.add(key)
+    if errors:
+        return _bulk_validation_response(errors, len(items))
+
+    rows = [{"SylhetiText": item["SylhetiText"], "BengaliText": item["BengaliText"], "EnglishText": item["EnglishText"]}
+            for item in items]
+    try:
+        phrase_ids = _bulk_insert(Phrase, Phrase.PhraseID, rows)
+        # Core inserts bypass the ORM events, so the search index and table version are updated here
+        connection = db.session.connection()
+        index_phrases(connection, [(phrase_id, row["SylhetiText"], row["BengaliText"], row["EnglishText"])
+                                   for phrase_id, row in zip(phrase_ids, rows)], replace=False)
+        bump_table_versions(connection, [Phrase.__tablename__])
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback() # A concurrent writer added one of the keys after the check above
+        return jsonify({"error": "Some phrases already exist; nothing was written"}), 409
+    except Exception as e:
+        print(f"Error adding {len(rows)} phrases: {e}")
+        db.session.rollback()
+        return jsonify({"error": "Could not add phrases to database; nothing was written"}), 500
+    return _bulk_created_response("phrases", "PhraseID", phrase_ids)
+
+
 # Delete a Phrase
 @routes_bp.route("/phrases/<int:id>", methods=["DELETE"])
 def delete_phrases(id):
@@ -274,9 +1146,8 @@ def add_speaker():
     if not data or 'Name' not in data or 'Gender' not in data:
          return jsonify({"error": "Missing required fields for Speaker (Name, Gender)"}), 400
     # Add validation for Gender enum if needed from your model definition
-    allowed_genders = ['Male', 'Female', 'Other'] # Or get from model config
-    if data['Gender'] not in allowed_genders:
-         return jsonify({"error": f"Invalid Gender specified. Must be one of: {allowed_genders}"}), 400
+    if data['Gender'] not in SPEAKER_GENDERS:
+         return jsonify({"error": f"Invalid Gender specified. Must be one of: {SPEAKER_GENDERS}"}), 400
 
     try:
         new_speaker = Speaker(Name=data["Name"], Gender=data["Gender"], Region=data.get("Region")) # Allow null Region
@@ -289,19 +1160,55 @@ def add_speaker():
         return jsonify({"error": "Could not add speaker to database"}), 500
 
 
-# Get all Speakers
-@routes_bp.route("/speakers", methods=["GET"])
-def get_speakers():
-    """Returns all speakers currently in the database."""
+# Add many Speakers in one transaction
+@routes_bp.route("/speakers/bulk", methods=["POST"])
+def add_speakers_bulk():
+    """
+    Adds a JSON array of speakers (the objects POST /speakers takes) in one transaction.
+    If any item is invalid nothing is written and each item's result is returned with a 400.
+    """
+    items, error_response = _bulk_items()
+    if error_response:
+        return error_response
+    errors = {}
+    for i, item in enumerate(items):
+        error = _text_field_errors(item, ("Name",), optional=("Region",))
+        if error is None and item.get("Gender") not in SPEAKER_GENDERS:
+            error = f"Invalid Gender. Must be one of: {SPEAKER_GENDERS}"
+        if error:
+            errors[i] = error
+    if errors:
+        return _bulk_validation_response(errors, len(items))
+
+    rows = [{"Name": item["Name"], "Gender": item["Gender"], "Region": item.get("Region")} for item in items]
     try:
-        speakers = Speaker.query.all()
-        return jsonify([
-            {"SpeakerID": s.SpeakerID, "Name": s.Name, "Gender": s.Gender, "Region": s.Region}
-            for s in speakers
-        ])
+        speaker_ids = _bulk_insert(Speaker, Speaker.SpeakerID, rows)
+        bump_table_versions(db.session.connection(), [Speaker.__tablename__]) # Core insert: no ORM hook
+        db.session.commit()
     except Exception as e:
-        print(f"Error fetching speakers: {e}")
-        return jsonify({"error": "Could not retrieve speakers from database"}), 500
+        print(f"Error adding {len(rows)} speakers: {e}")
+        db.session.rollback()
+        return jsonify({"error": "Could not add speakers to database; nothing was written"}), 500
+    return _bulk_created_response("speakers", "SpeakerID", speaker_ids)
+
+
+# Get Speakers (keyset-paginated, filterable)
+@routes_bp.route("/speakers", methods=["GET"])
+def get_speakers():
+    """
+    Returns speakers as a JSON array, optionally paginated, projected and filtered.
+    Query args: limit, after_id, fields, plus q (name prefix), gender and region.
+    """
+    filters = []
+    name_prefix = request.args.get("q", "").strip()
+    if name_prefix:
+        filters.append(Speaker.Name.startswith(name_prefix, autoescape=True))
+    if request.args.get("gender"):
+        filters.append(Speaker.Gender == request.args["gender"])
+    if request.args.get("region"):
+        filters.append(Speaker.Region == request.args["region"])
+
+    return _listing_response(Speaker, "SpeakerID", SPEAKER_FIELDS, filters, "speakers")
 
 
 # Add an Audio File Entry
@@ -330,16 +1237,92 @@ def add_audio():
          return jsonify({"error": "Could not add audio entry to database (check PhraseID/SpeakerID validity)"}), 500
 
 
-# Get all Audio Files
-@routes_bp.route("/audio", methods=["GET"])
-def get_audio():
-    """Returns all audio file references currently in the database."""
+# Add many Audio File Entries in one transaction
+@routes_bp.route("/audio/bulk", methods=["POST"])
+def add_audio_bulk():
+    """
+    Adds a JSON array of audio entries (the objects POST /audio takes) in one transaction.
+    PhraseID/SpeakerID existence and FilePath uniqueness are checked for the whole batch up
+    front; if any item is invalid nothing is written and each item's result is returned with a 400.
+    """
+    items, error_response = _bulk_items()
+    if error_response:
+        return error_response
+    errors = {}
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[i] = "Item must be a JSON object"
+            continue
+        for field in ("PhraseID", "SpeakerID"):
+            if type(item.get(field)) is not int: # bool is an int subclass; reject it too
+                errors[i] = f"'{field}' is required and must be an integer"
+                break
+        else:
+            if item.get("FilePath") is not None and not isinstance(item["FilePath"], str):
+                errors[i] = "'FilePath' must be a string or null"
+    valid = [(i, item) for i, item in enumerate(items) if i not in errors]
+
     try:
-        audio_files = AudioFile.query.all()
-        return jsonify([
-            {"AudioFileID": a.AudioFileID, "PhraseID": a.PhraseID, "SpeakerID": a.SpeakerID, "FilePath": a.FilePath}
-            for a in audio_files
-        ])
+        # One set-based query for every referenced PhraseID and SpeakerID
+        phrase_ids = {item["PhraseID"] for _, item in valid}
+        speaker_ids = {item["SpeakerID"] for _, item in valid}
+        existing = set()
+        if valid:
+            existing = set(db.session.execute(union_all(
+                db.select(literal("phrase"), Phrase.PhraseID).where(Phrase.PhraseID.in_(phrase_ids)),
+                db.select(literal("speaker"), Speaker.SpeakerID).where(Speaker.SpeakerID.in_(speaker_ids)),
+            )).tuples())
+        file_paths = [item["FilePath"] for _, item in valid if item.get("FilePath")]
+        taken_paths = set(db.session.execute(
+            db.select(AudioFile.FilePath).where(AudioFile.FilePath.in_(file_paths))
+        ).scalars()) if file_paths else set()
     except Exception as e:
-        print(f"Error fetching audio entries: {e}")
-        return jsonify({"error": "Could not retrieve audio entries from database"}), 500
\ No newline at end of file
+        print(f"Error checking audio entry references: {e}")
+        db.session.rollback()
+        return jsonify({"error": "Could not validate audio entries against the database"}), 500
+
+    seen_paths = set()
+    for i, item in valid:
+        path = item.get("FilePath")
+        if ("phrase", item["PhraseID"]) not in existing:
+            errors[i] = f"PhraseID {item['PhraseID']} does not exist"
+        elif ("speaker", item["SpeakerID"]) not in existing:
+            errors[i] = f"SpeakerID {item['SpeakerID']} does not exist"
+        elif path and path in taken_paths:
+            errors[i] = f"FilePath '{path}' is already registered"
+        elif path and path in seen_paths:
+            errors[i] = f"FilePath '{path}' appears more than once in this request"
+        seen_paths.add(path)
+    if errors:
+        return _bulk_validation_response(errors, len(items))
+
+    rows = [{"PhraseID": item["PhraseID"], "SpeakerID": item["SpeakerID"], "FilePath": item.get("FilePath")} for item in items]
+    try:
+        audio_ids = _bulk_insert(AudioFile, AudioFile.AudioFileID, rows)
+        bump_table_versions(db.session.connection(), [AudioFile.__tablename__]) # Core insert: no ORM hook
+        db.session.commit()
+    except Exception as e:
+        print(f"Error adding {len(rows)} audio entries: {e}")
+        db.session.rollback()
+        return jsonify({"error": "Could not add audio entries to database; nothing was written"}), 500
+    return _bulk_created_response("audio entries", "AudioFileID", audio_ids)
+
+
+# Get Audio Files (keyset-paginated, filterable)
+@routes_bp.route("/audio", methods=["GET"])
+def get_audio():
+    """
+    Returns audio file references as a JSON array, optionally paginated, projected and filtered.
+    Query args: limit, after_id, fields, plus phrase_id and speaker_id.
+    """
+    filters = []
+    for arg_name, column in (("phrase_id", AudioFile.PhraseID), ("speaker_id", AudioFile.SpeakerID)):
+        value = request.args.get(arg_name)
+        if value is not None:
+            try:
+                filters.append(column == int(value))
+            except ValueError:
+                return jsonify({"error": f"'{arg_name}' must be an integer"}), 400
+
+    return _listing_response(AudioFile, "AudioFileID", AUDIO_FIELDS, filters, "audio entries",
+                             default_fields=AUDIO_DEFAULT_FIELDS)
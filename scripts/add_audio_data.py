@@ -1,105 +1,256 @@
 # scripts/add_audio_data.py
+# Audio catalogue scanner: populates the AudioFiles table from data/audio/speaker_*/.
+#
+# Layout convention (same as the recordings already in the repo):
+#   data/audio/speaker_<name>/<PhraseID>.<ext>
+# The speaker is resolved by Name (case-insensitive, or via --speaker_map) and the
+# phrase by the numeric file stem. Files that do not follow the convention are reported
+# and skipped.
+#
+# Duration and sample rate are probed in a thread pool; phrases and speakers are
+# resolved with one bulk query each, and all new/changed AudioFile rows are written in
+# a single transaction. A file is catalogued when it has no AudioFile row yet (checked in
+# bulk against the database, so a fresh or different database gets every file) or when it
+# changed since the last scan. The state file remembers each file's mtime per database URL.
+#
+# Usage:
+#   python scripts/add_audio_data.py
+#   python scripts/add_audio_data.py --workers 8 --speaker_map muniat=1 tuhin=2
+#   python scripts/add_audio_data.py --full --dry_run
 
+import argparse
+import json
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import soundfile
 
 # Add the parent directory to the sys.path to allow imports from config and models
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from sqlalchemy import func, insert, update
 from config import db, app
 from models import Phrase, Speaker, AudioFile
+from response_cache import bump_table_versions
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_AUDIO_ROOT = os.path.join(PROJECT_ROOT, "data", "audio")
+STATE_FILE_NAME = ".catalogue_state.json"
+SPEAKER_DIR_PREFIX = "speaker_"
+AUDIO_EXTENSIONS = {".mp3", ".wav", ".flac", ".ogg", ".webm", ".m4a"}
+
 
-def add_audio_entry(phrase_id: int, speaker_id: int, file_path: str):
+# --- Discovery ---
+def scan_audio_root(audio_root):
     """
-    Adds an audio file reference to the database.
+    Walks <audio_root>/speaker_*/ and returns a list of dicts with the project-relative
+    path (as stored in AudioFile.FilePath), absolute path, speaker name, file stem and mtime.
     """
-    # Basic validation (can be expanded)
-    if not os.path.exists(file_path):
-        print(f"Error: Audio file does not exist at '{file_path}'. Skipping.")
-        return
+    entries = []
+    for dir_name in sorted(os.listdir(audio_root)):
+        speaker_dir = os.path.join(audio_root, dir_name)
+        if not dir_name.startswith(SPEAKER_DIR_PREFIX) or not os.path.isdir(speaker_dir):
+            continue
+        speaker_name = dir_name[len(SPEAKER_DIR_PREFIX):]
+        with os.scandir(speaker_dir) as it:
+            for dir_entry in it:
+                stem, extension = os.path.splitext(dir_entry.name)
+                if not dir_entry.is_file() or extension.lower() not in AUDIO_EXTENSIONS:
+                    continue
+                entries.append({
+                    "path": os.path.relpath(dir_entry.path, PROJECT_ROOT).replace(os.sep, "/"),
+                    "abs_path": dir_entry.path,
+                    "speaker_name": speaker_name,
+                    "stem": stem,
+                    "mtime": dir_entry.stat().st_mtime_ns,
+                })
+    return entries
+
+
+def load_state(state_path):
+    """{database URL: {path: mtime}} from the state file ({} when missing or unreadable)."""
+    if not os.path.exists(state_path):
+        return {}
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"WARNING: Could not read scan state '{state_path}' ({e}); doing a full scan.")
+        return {}
+    if not all(isinstance(files, dict) for files in state.values()):
+        print(f"Scan state '{state_path}' predates per-database state; re-probing catalogued files once.")
+        return {}
+    return state
+
+
+def save_state(state_path, state):
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=0, sort_keys=True)
+    os.replace(tmp_path, state_path)
+
+
+# --- Probing ---
+def probe_audio(abs_path):
+    """
+    Returns (duration_seconds, sample_rate) for an audio file, or (None, None) if it
+    cannot be read. libsndfile handles wav/flac/ogg/mp3 headers without decoding; other
+    containers (e.g. webm/m4a) fall back to librosa/audioread.
+    """
+    try:
+        info = soundfile.info(abs_path)
+        return float(info.duration), int(info.samplerate)
+    except Exception:
+        pass
+    try:
+        import librosa # Heavy import; only needed for formats libsndfile cannot open
+        sample_rate = librosa.get_samplerate(abs_path)
+        return float(librosa.get_duration(path=abs_path)), int(sample_rate)
+    except Exception as e:
+        print(f"WARNING: Could not probe '{abs_path}': {e}")
+        return None, None
+
 
-    # Check if Phrase and Speaker exist (optional but recommended)
-    phrase = Phrase.query.get(phrase_id)
-    if not phrase:
-        print(f"Error: Phrase with ID {phrase_id} not found. Skipping audio entry for '{file_path}'.")
+# --- Resolution (bulk lookups) ---
+def resolve_speakers(speaker_names, speaker_map):
+    """Maps directory speaker names to SpeakerIDs with one query (explicit --speaker_map entries win)."""
+    resolved = {name: speaker_map[name] for name in speaker_names if name in speaker_map}
+    to_lookup = [name for name in speaker_names if name not in resolved]
+    if to_lookup:
+        rows = db.session.execute(
+            db.select(Speaker.SpeakerID, Speaker.Name)
+            .where(func.lower(Speaker.Name).in_([name.lower() for name in to_lookup]))
+        ).all()
+        by_lower_name = {row.Name.lower(): row.SpeakerID for row in rows}
+        for name in to_lookup:
+            if name.lower() in by_lower_name:
+                resolved[name] = by_lower_name[name.lower()]
+    return resolved
+
+
+def catalogued_paths(paths):
+    """{FilePath: AudioFileID} for the given paths that already have an AudioFile row (bulk, chunked)."""
+    catalogued = {}
+    for i in range(0, len(paths), 500):
+        for row in db.session.execute(
+            db.select(AudioFile.AudioFileID, AudioFile.FilePath).where(AudioFile.FilePath.in_(paths[i:i + 500]))
+        ).all():
+            catalogued[row.FilePath] = row.AudioFileID
+    return catalogued
+
+
+def resolve_phrase_ids(candidate_ids):
+    """Returns the subset of candidate PhraseIDs that exist, with one query."""
+    if not candidate_ids:
+        return set()
+    rows = db.session.execute(db.select(Phrase.PhraseID).where(Phrase.PhraseID.in_(candidate_ids))).all()
+    return {row.PhraseID for row in rows}
+
+
+# --- Main scan ---
+def run_scan(audio_root, workers, speaker_map, full_scan, dry_run):
+    start = time.perf_counter()
+    state_path = os.path.join(audio_root, STATE_FILE_NAME)
+    database_key = db.engine.url.render_as_string(hide_password=True)
+    all_state = load_state(state_path)
+    state = {} if full_scan else all_state.get(database_key, {})
+
+    entries = scan_audio_root(audio_root)
+    existing_rows = catalogued_paths([e["path"] for e in entries])
+    pending = [e for e in entries if e["path"] not in existing_rows or state.get(e["path"]) != e["mtime"]]
+    print(f"Found {len(entries)} audio files ({len(existing_rows)} catalogued); "
+          f"{len(pending)} not catalogued or changed since the last scan.")
+    if not pending:
         return
 
-    speaker = Speaker.query.get(speaker_id)
-    if not speaker:
-        print(f"Error: Speaker with ID {speaker_id} not found. Skipping audio entry for '{file_path}'.")
+    speaker_ids = resolve_speakers(sorted({e["speaker_name"] for e in pending}), speaker_map)
+    for name in sorted({e["speaker_name"] for e in pending} - set(speaker_ids)):
+        print(f"Error: No speaker named '{name}' (use --speaker_map {name}=<SpeakerID>). Skipping its files.")
+    existing_phrase_ids = resolve_phrase_ids({int(e["stem"]) for e in pending if e["stem"].isdigit()})
+
+    catalogue = []
+    for entry in pending:
+        if entry["speaker_name"] not in speaker_ids:
+            continue
+        if not entry["stem"].isdigit():
+            print(f"Skipping '{entry['path']}': file name is not a PhraseID.")
+            continue
+        if int(entry["stem"]) not in existing_phrase_ids:
+            print(f"Error: Phrase with ID {entry['stem']} not found. Skipping audio entry for '{entry['path']}'.")
+            continue
+        catalogue.append(entry)
+    if not catalogue:
+        print("Nothing to catalogue.")
         return
 
-    # Check if this specific audio entry already exists to prevent duplicates
-    existing_entry = AudioFile.query.filter_by(PhraseID=phrase_id, SpeakerID=speaker_id, FilePath=file_path).first()
-    if existing_entry:
-        print(f"Info: Audio entry for PhraseID {phrase_id}, SpeakerID {speaker_id}, FilePath '{file_path}' already exists. Skipping.")
+    print(f"Probing {len(catalogue)} files with {workers} worker threads...")
+    probe_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        probes = list(pool.map(probe_audio, [e["abs_path"] for e in catalogue]))
+    print(f"Probed in {time.perf_counter() - probe_start:.2f}s")
+
+    new_rows = []
+    updated_rows = []
+    for entry, (duration, sample_rate) in zip(catalogue, probes):
+        values = {
+            "PhraseID": int(entry["stem"]),
+            "SpeakerID": speaker_ids[entry["speaker_name"]],
+            "DurationSeconds": duration,
+            "SampleRate": sample_rate,
+        }
+        if entry["path"] in existing_rows:
+            updated_rows.append({"AudioFileID": existing_rows[entry["path"]], **values})
+        else:
+            new_rows.append({"FilePath": entry["path"], **values})
+
+    if dry_run:
+        print(f"Dry run: would add {len(new_rows)} and update {len(updated_rows)} audio entries.")
         return
 
     try:
-        new_audio = AudioFile(PhraseID=phrase_id, SpeakerID=speaker_id, FilePath=file_path)
-        db.session.add(new_audio)
+        if new_rows:
+            db.session.execute(insert(AudioFile), new_rows)
+        if updated_rows:
+            db.session.execute(update(AudioFile), updated_rows)
+        if new_rows or updated_rows:
+            bump_table_versions(db.session.connection(), [AudioFile.__tablename__]) # Core writes bypass the ORM hook
         db.session.commit()
-        print(f"Successfully added audio entry: PhraseID={phrase_id}, SpeakerID={speaker_id}, FilePath='{file_path}'")
     except Exception as e:
         db.session.rollback()
-        print(f"Failed to add audio entry for {file_path}: {e}")
+        print(f"Failed to write audio entries: {e}")
+        return
+
+    # Only remember files that were written (or deliberately skipped because they were unreadable)
+    for entry in catalogue:
+        state[entry["path"]] = entry["mtime"]
+    all_state[database_key] = state
+    save_state(state_path, all_state)
+    print(f"Added {len(new_rows)} and updated {len(updated_rows)} audio entries "
+          f"in {time.perf_counter() - start:.2f}s.")
+
+
+def parse_speaker_map(pairs):
+    speaker_map = {}
+    for pair in pairs or []:
+        name, _, speaker_id = pair.partition("=")
+        if not name or not speaker_id.isdigit():
+            raise argparse.ArgumentTypeError(f"Invalid --speaker_map entry '{pair}' (expected name=SpeakerID)")
+        speaker_map[name] = int(speaker_id)
+    return speaker_map
 
 
 if __name__ == "__main__":
-    with app.app_context():
+    parser = argparse.ArgumentParser(description="Scan data/audio/speaker_* and catalogue recordings in the AudioFiles table.")
+    parser.add_argument("--audio_root", type=str, default=DEFAULT_AUDIO_ROOT, help="Directory containing speaker_* folders.")
+    parser.add_argument("--workers", type=int, default=min(32, (os.cpu_count() or 1) * 2), help="Probe thread pool size.")
+    parser.add_argument("--speaker_map", nargs="*", help="Explicit speaker folder to SpeakerID mappings, e.g. muniat=1 tuhin=2.")
+    parser.add_argument("--full", action="store_true", help="Ignore the scan state and re-probe every file.")
+    parser.add_argument("--dry_run", action="store_true", help="Report what would change without writing.")
+    args = parser.parse_args()
+
     print("--- Running add_audio_data.py ---")
-    print("This script helps populate the AudioFiles table.")
-    print("Ensure your audio files are in a structured directory (e.g., data/audio/sylheti/).")
-    print("Ensure Phrases and Speakers are already in your database.")
-
-    # --- IMPORTANT: Configure your audio data here ---
-    # This is a list of tuples: (phrase_id, speaker_id, relative_path_to_audio_file)
-    # Replace these with your actual data!
-
-    # Example: First, add some dummy phrases and speakers if you haven't already done it via API/init_db.py
-    # This part is just for demonstration if your DB is empty. Remove in production use.
-        try:
-            # Add dummy phrase
-            if not Phrase.query.filter_by(SylhetiText="মুই ভাত খাই").first():
-                db.session.add(Phrase(SylhetiText="মুই ভাত খাই", BengaliText="আমি ভাত খাই", EnglishText="I eat rice"))
-                db.session.commit()
-                print("Added dummy phrase.")
-            dummy_phrase_id = Phrase.query.filter_by(SylhetiText="মুই ভাত খাই").first().PhraseID
-
-            # Add dummy speaker
-            if not Speaker.query.filter_by(Name="Test Speaker A").first():
-                db.session.add(Speaker(Name="Test Speaker A", Gender="Male"))
-                db.session.commit()
-                print("Added dummy speaker.")
-            dummy_speaker_id_a = Speaker.query.filter_by(Name="Test Speaker A").first().SpeakerID
-
-            if not Speaker.query.filter_by(Name="Test Speaker B").first():
-                db.session.add(Speaker(Name="Test Speaker B", Gender="Female"))
-                db.session.commit()
-                print("Added dummy speaker B.")
-            dummy_speaker_id_b = Speaker.query.filter_by(Name="Test Speaker B").first().SpeakerID
-
-        except Exception as e:
-            db.session.rollback()
-            print(f"Error setting up dummy data: {e}")
-            #sys.exit(1) # Exit if essential dummy data setup fails
-    # --------------------------------------------------------------------------
-
-    # Define your actual audio data entries here
-    # Make sure the `file_path` is relative to your project root or an absolute path.
-    # Example: If your audio is in sylheti_translator_backend/data/audio/sylheti/
-    # and the file is phrase1_speaker1.wav, the path would be "data/audio/sylheti/phrase1_speaker1.wav"
-    audio_entries_to_add = [
-            (i, 1, f"data/audio/speaker_muniat/{i}.mp3") for i in range(1, 32)
-        ] + [
-            (i, 2, f"data/audio/speaker_tuhin/{i}.mp3") for i in range(1, 40)
-    ]
-
-    # --- Run the additions ---
-    if not audio_entries_to_add:
-        print("No audio entries defined in the script. Please update 'audio_entries_to_add'.")
-    else:
-        for phrase_id, speaker_id, file_path in audio_entries_to_add:
-            add_audio_entry(phrase_id, speaker_id, file_path)
-
-    print("--- Finished add_audio_data.py ---") 
\ No newline at end of file
+    with app.app_context():
+        run_scan(args.audio_root, args.workers, parse_speaker_map(args.speaker_map), args.full, args.dry_run)
+    print("--- Finished add_audio_data.py ---")
@@ -0,0 +1,205 @@
+# scripts/bench_reference_routes.py
+"""
+Micro-benchmark for the reference-data GET routes (/phrases, /speakers, /audio).
+
+Seeds a throwaway database with synthetic rows (100k phrases by default) and times
+full streamed dumps, keyset pages at the start and deep into the table, and the
+server-side filters, through Flask's test client. Each scenario is timed with the response
+cache cleared (cold), served from the cache, and revalidated with If-None-Match (304).
+Before timing, the SQL statements issued by the eager-loaded phrase routes
+(/phrases/<id>, /phrases?include=audio,speaker) are counted at different page sizes; the
+run fails if the count grows with the page (an N+1 regression).
+
+Usage:
+    python scripts/bench_reference_routes.py --phrases 100000 --repeat 5
+    DATABASE_URL=postgresql://... python scripts/bench_reference_routes.py --backend all
+--backend sqlite uses a temporary SQLite file (with the same pragmas as DB_BACKEND=sqlite);
+--backend postgres uses DATABASE_URL and the pooled engine from config.py; --backend all runs
+both, one process each. The tables in the database are dropped and recreated, so never point
+DATABASE_URL at real data.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+parser = argparse.ArgumentParser(description="Benchmark the /phrases, /speakers and /audio GET routes.")
+parser.add_argument("--phrases", type=int, default=100000, help="Number of synthetic phrases to seed.")
+parser.add_argument("--speakers", type=int, default=200, help="Number of synthetic speakers to seed.")
+parser.add_argument("--audio_per_phrase", type=float, default=0.5, help="Average audio entries per phrase.")
+parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per scenario.")
+parser.add_argument("--backend", choices=["sqlite", "postgres", "all"], default=None,
+                    help="Database backend (default: postgres if DATABASE_URL is a Postgres URL, else sqlite).")
+args = parser.parse_args()
+
+if args.backend is None:
+    args.backend = "postgres" if os.environ.get("DATABASE_URL", "").startswith("postgres") else "sqlite"
+
+if args.backend == "all":
+    # config.py builds its engine at import time, so each backend runs in its own process
+    for backend in ("sqlite", "postgres"):
+        if backend == "postgres" and not os.environ.get("DATABASE_URL", "").startswith("postgres"):
+            print("\n=== postgres: skipped (set DATABASE_URL to a scratch Postgres database) ===")
+            continue
+        print(f"\n=== {backend} ===", flush=True)
+        forwarded = ["--phrases", str(args.phrases), "--speakers", str(args.speakers),
+                     "--audio_per_phrase", str(args.audio_per_phrase), "--repeat", str(args.repeat)]
+        subprocess.run([sys.executable, os.path.abspath(__file__), *forwarded, "--backend", backend], check=True)
+    sys.exit(0)
+
+os.environ["DB_BACKEND"] = args.backend
+if args.backend == "sqlite":
+    bench_db_path = os.path.join(tempfile.gettempdir(), "sylheti_bench_reference_routes.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(bench_db_path + suffix):
+            os.remove(bench_db_path + suffix)
+    os.environ["DATABASE_URL"] = f"sqlite:///{bench_db_path}"
+elif not os.environ.get("DATABASE_URL", "").startswith("postgres"):
+    sys.exit("--backend postgres needs DATABASE_URL set to a scratch Postgres database.")
+
+# The benchmark never translates, so don't load the translation models when importing app
+os.environ.setdefault("TRANSLATOR_AUTOLOAD", "0")
+
+# --- Add project root to sys.path ---
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event, insert
+from app import app
+from config import db, DB_BACKEND
+from models import Phrase, Speaker, AudioFile
+from response_cache import CACHE, ensure_table_versions
+
+
+def seed_database():
+    """Drops and recreates the tables, then bulk-inserts synthetic rows."""
+    db.drop_all()
+    db.create_all()
+    ensure_table_versions()
+    print(f"Seeding {args.phrases} phrases, {args.speakers} speakers...")
+    start = time.perf_counter()
+    batch = []
+    for i in range(1, args.phrases + 1):
+        batch.append({
+            "SylhetiText": f"সিলেটি বাক্য {i}",
+            "BengaliText": f"বাংলা বাক্য {i}",
+            "EnglishText": f"english sentence {i}",
+        })
+        if len(batch) == 10000:
+            db.session.execute(insert(Phrase), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(Phrase), batch)
+
+    db.session.execute(insert(Speaker), [
+        {"Name": f"speaker {i}", "Gender": ("Male", "Female", "Other")[i % 3], "Region": f"region {i % 10}"}
+        for i in range(1, args.speakers + 1)
+    ])
+
+    audio_count = int(args.phrases * args.audio_per_phrase)
+    step = max(1, int(1 / args.audio_per_phrase)) if args.audio_per_phrase else 1
+    db.session.execute(insert(AudioFile), [
+        {"PhraseID": 1 + (i * step) % args.phrases, "SpeakerID": 1 + i % args.speakers,
+         "FilePath": f"data/audio/bench/{i}.mp3"}
+        for i in range(audio_count)
+    ])
+    db.session.commit()
+    print(f"Seeded in {time.perf_counter() - start:.1f}s\n")
+
+
+def time_request(client, url, headers=None, expected_status=200):
+    """Returns (milliseconds, response) for one GET, consuming the full streamed body."""
+    start = time.perf_counter()
+    response = client.get(url, headers=headers)
+    body = response.get_data()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if response.status_code != expected_status:
+        raise RuntimeError(f"GET {url} returned {response.status_code}: {body[:200]!r}")
+    return elapsed_ms, response
+
+
+def median_ms(client, url, headers=None, expected_status=200, cold=False):
+    timings = []
+    for _ in range(args.repeat):
+        if cold:
+            CACHE.clear()
+        elapsed_ms, _ = time_request(client, url, headers, expected_status)
+        timings.append(elapsed_ms)
+    return statistics.median(timings)
+
+
+def count_queries(client, url):
+    """The number of SQL statements one uncached GET issues."""
+    statements = []
+    def record(conn, cursor, statement, *rest):
+        statements.append(statement)
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        CACHE.clear()
+        time_request(client, url)
+    finally:
+        with app.app_context():
+            event.remove(db.engine, "before_cursor_execute", record)
+    return len(statements)
+
+
+def check_query_counts(client):
+    """Fails if the eager-loaded phrase routes issue more queries for bigger pages."""
+    print(f"{'Query count check':<60} {'queries':>8}")
+    print("-" * 70)
+    count_queries(client, "/phrases?include=audio,speaker&limit=1")  # Warm-up (one-off schema checks)
+    counts = {}
+    for limit in (1, 50, 400):
+        url = f"/phrases?include=audio,speaker&limit={limit}"
+        counts[url] = count_queries(client, url)
+    counts["/phrases/1"] = count_queries(client, "/phrases/1")
+    for url, count in counts.items():
+        print(f"{url:<60} {count:>8}")
+    page_counts = {count for url, count in counts.items() if "limit=" in url}
+    if len(page_counts) != 1:
+        raise RuntimeError(f"Query count depends on page size (N+1 loading?): {counts}")
+    print()
+
+
+def main():
+    with app.app_context():
+        print(f"Backend: {DB_BACKEND} ({db.engine.dialect.name}, {db.engine.pool.__class__.__name__})")
+        seed_database()
+
+    deep_cursor = max(0, args.phrases - 1000)
+    scenarios = [
+        ("phrases: full stream", "/phrases"),
+        ("phrases: full stream, 2 fields", "/phrases?fields=PhraseID,SylhetiText"),
+        ("phrases: first page (200)", "/phrases?limit=200"),
+        ("phrases: deep page (200)", f"/phrases?limit=200&after_id={deep_cursor}"),
+        ("phrases: prefix filter", "/phrases?q=english%20sentence%2099&lang=english&limit=200"),
+        ("phrases: contains filter", "/phrases?q=বাক্য%20777&match=contains&limit=200"),
+        ("phrases: with audio+speaker (200)", "/phrases?include=audio,speaker&limit=200"),
+        ("phrases: detail", "/phrases/1"),
+        ("speakers: full stream", "/speakers"),
+        ("speakers: gender filter", "/speakers?gender=Female&limit=100"),
+        ("audio: full stream", "/audio"),
+        ("audio: first page (200)", "/audio?limit=200"),
+        ("audio: by speaker", "/audio?speaker_id=7&limit=200"),
+    ]
+
+    client = app.test_client()
+    check_query_counts(client)
+    print(f"{'Scenario':<36} {'cold ms':>9} {'cached ms':>10} {'304 ms':>8} {'bytes':>10} {'gzip bytes':>11}")
+    print("-" * 90)
+    for label, url in scenarios:
+        _, response = time_request(client, url)  # Warm-up; leaves the response cached
+        size = len(response.get_data())
+        etag = response.headers["ETag"]
+        _, gzipped = time_request(client, url, {"Accept-Encoding": "gzip"})
+        cold = median_ms(client, url, cold=True)
+        cached = median_ms(client, url)
+        revalidated = median_ms(client, url, {"If-None-Match": etag}, expected_status=304)
+        print(f"{label:<36} {cold:>9.1f} {cached:>10.1f} {revalidated:>8.1f} {size:>10} {len(gzipped.get_data()):>11}")
+
+
+if __name__ == "__main__":
+    main()
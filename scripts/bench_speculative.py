@@ -0,0 +1,151 @@
+# scripts/bench_speculative.py
+# Benchmarks assisted (speculative) generation against plain greedy decoding, per direction.
+#
+# For each held-out sentence (the split evaluate_models.py uses) this:
+#   1. decodes greedily with the main model alone (the reference output and time),
+#   2. decodes with assistant_model=<draft> (num_assistant_tokens proposals per step) and checks
+#      the output token ids are identical to step 1,
+#   3. replays speculative decoding against the reference: from each verified prefix the draft
+#      proposes up to K tokens greedily, the longest prefix matching the main model's output is
+#      accepted and the main model contributes one token. This gives the acceptance rate
+#      (accepted / proposed draft tokens) and tokens per main-model forward pass.
+#
+# Usage:
+#   python scripts/bench_speculative.py --directions sylheti:bengali --max_samples 100
+#   python scripts/bench_speculative.py --num_assistant_tokens 3 5 8
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import torch
+from datasets import load_dataset
+
+# Add the parent directory to the sys.path to allow imports from scripts and utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("TRANSLATOR_AUTOLOAD", "0") # Models are loaded one direction at a time below
+
+from scripts.model_registry import MODEL_PATHS, DRAFT_MODEL_PATHS, PROJECT_ROOT, SCRIPTS_DIR
+from scripts.translator import _load_model_and_tokenizer
+from scripts.evaluate_models import add_common_arguments, load_eval_set, percentile
+
+
+def replay_speculation(draft, input_ids, attention_mask, reference_ids, num_tokens):
+    """
+    Returns (accepted, proposed, main_steps) for speculative decoding of 'reference_ids'
+    (the main model's greedy output, starting with the decoder start token).
+    """
+    accepted = proposed = main_steps = 0
+    target = reference_ids[0].tolist()
+    position = 1 # Tokens of 'target' already verified (the decoder start token is given)
+    while position < len(target):
+        prefix = torch.tensor([target[:position]], device=draft.device)
+        draft_ids = draft.generate(input_ids, attention_mask=attention_mask, decoder_input_ids=prefix,
+                                   max_new_tokens=min(num_tokens, len(target) - position),
+                                   do_sample=False, num_beams=1)[0, position:].tolist()
+        matched = 0
+        while matched < len(draft_ids) and draft_ids[matched] == target[position + matched]:
+            matched += 1
+        proposed += len(draft_ids)
+        accepted += matched
+        main_steps += 1
+        # The main model's verification pass also yields the next token after the accepted run
+        position += matched + 1
+    return accepted, proposed, main_steps
+
+
+def bench_direction(direction, main_path, draft_path, sources, args):
+    direction_str = f"{direction[0]} -> {direction[1]}"
+    model, tokenizer = _load_model_and_tokenizer(main_path, direction_key_for_logging=direction_str)
+    draft, _ = _load_model_and_tokenizer(draft_path, direction_key_for_logging=f"{direction_str} draft")
+    if model is None or draft is None:
+        print(f"({direction_str}) Main or draft model failed to load, skipping.")
+        return []
+    if draft.config.vocab_size != model.config.vocab_size:
+        print(f"({direction_str}) Draft vocabulary differs from the main model's, skipping.")
+        return []
+    draft.to(model.device)
+
+    encoded = [tokenizer(text, return_tensors="pt", truncation=True, max_length=args.max_length).to(model.device)
+               for text in sources]
+    common = {"max_length": args.max_length, "do_sample": False, "num_beams": 1}
+
+    with torch.no_grad():
+        # Warm-up so one-off start-up cost isn't counted
+        model.generate(**encoded[0], **common)
+        model.generate(**encoded[0], assistant_model=draft, **common)
+
+        greedy_ms = []
+        references = []
+        for inputs in encoded:
+            start = time.perf_counter()
+            references.append(model.generate(**inputs, **common))
+            greedy_ms.append((time.perf_counter() - start) * 1000)
+
+        rows = []
+        for num_tokens in args.num_assistant_tokens:
+            draft.generation_config.num_assistant_tokens = num_tokens
+            draft.generation_config.num_assistant_tokens_schedule = "constant"
+            assisted_ms = []
+            identical = 0
+            accepted = proposed = main_steps = generated = 0
+            for inputs, reference in zip(encoded, references):
+                start = time.perf_counter()
+                output = model.generate(**inputs, assistant_model=draft, **common)
+                assisted_ms.append((time.perf_counter() - start) * 1000)
+                identical += int(output.shape == reference.shape and torch.equal(output, reference))
+
+                a, p, steps = replay_speculation(draft, inputs["input_ids"], inputs["attention_mask"], reference, num_tokens)
+                accepted, proposed, main_steps = accepted + a, proposed + p, main_steps + steps
+                generated += reference.shape[1] - 1
+
+            row = {
+                "direction": direction_str,
+                "num_assistant_tokens": num_tokens,
+                "sentences": len(encoded),
+                "identical_outputs": identical,
+                "greedy_p50_ms": round(percentile(sorted(greedy_ms), 0.5), 1),
+                "assisted_p50_ms": round(percentile(sorted(assisted_ms), 0.5), 1),
+                "speedup": round(sum(greedy_ms) / max(sum(assisted_ms), 1e-9), 2),
+                "acceptance_rate": round(accepted / max(proposed, 1), 3),
+                "tokens_per_main_step": round(generated / max(main_steps, 1), 2),
+            }
+            rows.append(row)
+            print(f"({direction_str}) K={num_tokens}: {identical}/{len(encoded)} identical, speedup {row['speedup']}x "
+                  f"(p50 {row['greedy_p50_ms']} -> {row['assisted_p50_ms']} ms), acceptance {row['acceptance_rate']:.1%}, "
+                  f"{row['tokens_per_main_step']} tokens per main-model step")
+            if identical != len(encoded):
+                print(f"({direction_str}) WARNING: {len(encoded) - identical} outputs differ from greedy decoding "
+                      "(usually floating point ties between batched and incremental forward passes).")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark assisted generation with draft models against greedy decoding.")
+    add_common_arguments(parser)
+    parser.add_argument("--num_assistant_tokens", nargs="+", type=int, default=[5], help="Draft tokens proposed per step (K).")
+    parser.add_argument("--output", type=str, default=os.path.join(PROJECT_ROOT, "models", "speculative_report.json"))
+    args = parser.parse_args()
+
+    print("--- Running bench_speculative.py ---")
+    raw_dataset = load_dataset("json", data_files=args.data_file, split="train")
+    rows = []
+    for direction in args.directions or list(MODEL_PATHS):
+        draft_path = DRAFT_MODEL_PATHS.get(direction)
+        if not draft_path or not os.path.isdir(os.path.join(SCRIPTS_DIR, draft_path)):
+            print(f"({direction[0]} -> {direction[1]}) No draft model at '{draft_path}' (train one with distill.py), skipping.")
+            continue
+        sources, _ = load_eval_set(raw_dataset, direction[0], direction[1], args.seed, args.test_split_size, args.max_samples)
+        rows.extend(bench_direction(direction, MODEL_PATHS[direction], draft_path, sources, args))
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=2, ensure_ascii=False)
+    print(f"Report written to {args.output}")
+    print("--- Finished bench_speculative.py ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# scripts/build_assets.py
+# Builds the fingerprinted static assets served by static_assets.py.
+#
+# Every file in static/ (outside static/dist/) is copied to static/dist/<name>.<hash>.<ext>,
+# where <hash> is the first 10 hex digits of the SHA-256 of the built content. JavaScript and
+# CSS are minified first (rjsmin / rcssmin if installed, else utils/minify.py). Text assets are
+# also written pre-compressed next to the original (.gz, and .br when the 'brotli' package is
+# installed). static/dist/manifest.json maps each source name to its built file; templates get
+# the URL from asset_url('script.js').
+#
+# Because a changed file gets a new name, the built files are served with
+# 'Cache-Control: immutable'. The previous build's files are kept so pages rendered before a
+# deploy can still load them; older ones are removed.
+#
+# Usage:
+#   python scripts/build_assets.py
+#   python scripts/build_assets.py --no-minify   # fingerprint and compress only
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+
+# Add the parent directory to the sys.path to allow imports from utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.minify import minify_css, minify_js
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+STATIC_DIR = os.path.join(PROJECT_ROOT, "static")
+DIST_DIRNAME = "dist"
+MANIFEST_NAME = "manifest.json"
+COMPRESSIBLE_EXTENSIONS = {".js", ".css", ".svg", ".json", ".html", ".txt", ".map"}
+MIN_COMPRESS_BYTES = 256 # Smaller files aren't worth a compressed copy
+
+
+def minify(name, content):
+    """Minified bytes for .js and .css files; other files unchanged."""
+    extension = os.path.splitext(name)[1]
+    if extension == ".js":
+        text = content.decode("utf-8")
+        return (rjsmin.jsmin(text) if rjsmin else minify_js(text)).encode("utf-8")
+    if extension == ".css":
+        text = content.decode("utf-8")
+        return (rcssmin.cssmin(text) if rcssmin else minify_css(text)).encode("utf-8")
+    return content
+
+
+def hashed_name(name, content):
+    stem, extension = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:10]}{extension}"
+
+
+def write_if_changed(path, content):
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if f.read() == content:
+                return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def source_files(static_dir):
+    """Relative paths of every file under static/ except the build output."""
+    for root, dirs, files in os.walk(static_dir):
+        if os.path.abspath(root) == os.path.abspath(static_dir):
+            dirs[:] = [d for d in dirs if d != DIST_DIRNAME]
+        for filename in sorted(files):
+            if not filename.startswith("."):
+                yield os.path.relpath(os.path.join(root, filename), static_dir).replace(os.sep, "/")
+
+
+def build(static_dir, do_minify=True):
+    dist_dir = os.path.join(static_dir, DIST_DIRNAME)
+    manifest_path = os.path.join(dist_dir, MANIFEST_NAME)
+    previous = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            previous = json.load(f).get("assets", {})
+
+    assets = {}
+    for name in source_files(static_dir):
+        with open(os.path.join(static_dir, name), "rb") as f:
+            original = f.read()
+        content = minify(name, original) if do_minify else original
+        built = hashed_name(name, content)
+        built_path = os.path.join(dist_dir, built)
+        write_if_changed(built_path, content)
+        sizes = [f"{len(original)} -> {len(content)} B"]
+        if os.path.splitext(name)[1] in COMPRESSIBLE_EXTENSIONS and len(content) >= MIN_COMPRESS_BYTES:
+            compressed = gzip.compress(content, 9, mtime=0) # mtime=0: identical input, identical bytes
+            write_if_changed(built_path + ".gz", compressed)
+            sizes.append(f"gzip {len(compressed)} B")
+            if brotli is not None:
+                compressed = brotli.compress(content, quality=11)
+                write_if_changed(built_path + ".br", compressed)
+                sizes.append(f"br {len(compressed)} B")
+        assets[name] = f"{DIST_DIRNAME}/{built}"
+        print(f"{name} -> {assets[name]} ({', '.join(sizes)})")
+
+    write_if_changed(manifest_path, json.dumps({"built_at": time.time(), "assets": assets}, indent=2).encode("utf-8"))
+
+    # Keep this build's and the previous build's files; remove anything older
+    keep = {os.path.basename(path) for path in list(assets.values()) + list(previous.values())}
+    keep |= {name + suffix for name in keep for suffix in (".gz", ".br")}
+    keep.add(MANIFEST_NAME)
+    removed = 0
+    for root, _, files in os.walk(dist_dir):
+        for filename in files:
+            if filename not in keep:
+                os.remove(os.path.join(root, filename))
+                removed += 1
+    print(f"Wrote {len(assets)} assets and {manifest_path}; removed {removed} stale files.")
+    return assets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build fingerprinted, minified and pre-compressed static assets.")
+    parser.add_argument("--static_dir", type=str, default=STATIC_DIR)
+    parser.add_argument("--no-minify", dest="minify", action="store_false", help="Copy files unminified.")
+    args = parser.parse_args()
+
+    print("--- Running build_assets.py ---")
+    if brotli is None:
+        print("WARNING: 'brotli' is not installed; only .gz copies are written (pip install brotli).")
+    build(args.static_dir, args.minify)
+    print("--- Finished build_assets.py ---")
+
+
+if __name__ == "__main__":
+    main()
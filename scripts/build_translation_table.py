@@ -0,0 +1,157 @@
+# scripts/build_translation_table.py
+# Precomputes translations of the corpus (and any phrase lists) for every direction into the
+# memory-mapped table translator.py answers from before running a model
+# (format in utils/translation_table.py).
+#
+# Translations use the same decoding as translate() (4 beams, max_length 128) and the model
+# each direction is served with (TRANSLATOR_BACKEND / --backend). Rebuilds are incremental:
+# entries in the existing table are kept when their direction's model checkpoint is unchanged
+# and the phrase is still in the sources, so only new phrases are translated. Running workers
+# pick up the rebuilt file within TABLE_CHECK_INTERVAL_SECONDS.
+#
+# Phrase lists are .json (a list of objects) or .jsonl files keyed by language, like
+# data/sylheti_translation.json; every file in data/phrase_lists/ is included by default.
+#
+# Usage:
+#   python scripts/build_translation_table.py
+#   python scripts/build_translation_table.py --phrase_lists uploads/clinic_phrases.jsonl --directions sylheti:english
+#   python scripts/build_translation_table.py --full   # retranslate everything
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+# Add the parent directory to the sys.path to allow imports from scripts and utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("TRANSLATOR_AUTOLOAD", "0") # Models are loaded one direction at a time below
+
+from scripts.model_registry import MODEL_PATHS, PROJECT_ROOT, BACKENDS, resolve_model_paths
+from scripts.translator import TRANSLATION_TABLE_PATH, TRANSLATOR_BACKEND, _load_model_and_tokenizer, model_fingerprint
+from scripts.evaluate_models import parse_direction, generate_batched
+from utils.text_normalize import normalize_text
+from utils.translation_table import TranslationTable, write_table
+
+PHRASE_LIST_DIR = os.path.join(PROJECT_ROOT, "data", "phrase_lists")
+
+
+def read_rows(path):
+    """Rows (dicts keyed by language) from a .json list or a .jsonl file."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def source_phrases(rows, source_lang):
+    """{normalized text: first original spelling} for the non-empty 'source_lang' values."""
+    phrases = {}
+    for row in rows:
+        text = (row.get(source_lang) or "").strip()
+        key = normalize_text(text)
+        if key and key not in phrases:
+            phrases[key] = text
+    return phrases
+
+
+def translate_phrases(model, tokenizer, texts, batch_size, max_length):
+    """translate()'s decoding, batched; sorted by length so batches pad little. Returns outputs in input order."""
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    predictions, _ = generate_batched(model, tokenizer, [texts[i] for i in order], batch_size, max_length,
+                                      num_beams=4, early_stopping=True)
+    translations = [None] * len(texts)
+    for i, prediction in zip(order, predictions):
+        translations[i] = prediction
+    return translations
+
+
+def build_table(rows, directions, model_paths, output, batch_size, max_length, full=False):
+    existing = None if full else TranslationTable.open(output)
+    previous = {}
+    previous_meta = {}
+    if existing is not None:
+        previous_meta = existing.meta.get("directions", {})
+        previous = dict(existing.entries())
+        existing.close()
+
+    entries = {}
+    meta = {"directions": {}, "built_at": time.time()}
+    for direction in directions:
+        source_lang, target_lang = direction
+        direction_str = f"{source_lang} -> {target_lang}"
+        direction_key = f"{source_lang}:{target_lang}"
+        path = model_paths[direction]
+        fingerprint = model_fingerprint(path)
+        phrases = source_phrases(rows, source_lang)
+
+        reusable = json.dumps(previous_meta.get(direction_key)) == json.dumps(fingerprint)
+        missing = []
+        for key, text in phrases.items():
+            stored = previous.get((source_lang, target_lang, key)) if reusable else None
+            if stored is not None:
+                entries[(source_lang, target_lang, key)] = stored
+            else:
+                missing.append((key, text))
+        print(f"({direction_str}) {len(phrases)} phrases: {len(phrases) - len(missing)} reused, {len(missing)} to translate"
+              + ("" if reusable or not previous_meta.get(direction_key) else " (model changed since the last build)"))
+
+        if missing:
+            model, tokenizer = _load_model_and_tokenizer(path, direction_key_for_logging=direction_str)
+            if model is None:
+                print(f"({direction_str}) Model failed to load; only its reused entries are kept.")
+                if reusable and len(missing) < len(phrases):
+                    meta["directions"][direction_key] = fingerprint
+                continue
+            start = time.perf_counter()
+            translations = translate_phrases(model, tokenizer, [text for _, text in missing], batch_size, max_length)
+            elapsed = time.perf_counter() - start
+            for (key, _), translation in zip(missing, translations):
+                entries[(source_lang, target_lang, key)] = translation
+            print(f"({direction_str}) Translated {len(missing)} phrases in {elapsed:.1f}s ({len(missing) / max(elapsed, 1e-9):.1f}/s)")
+            del model, tokenizer
+        meta["directions"][direction_key] = fingerprint
+
+    # Directions not rebuilt this run keep their entries
+    for direction_key, fingerprint in previous_meta.items():
+        if direction_key not in meta["directions"]:
+            source_lang, target_lang = direction_key.split(":")
+            if (source_lang, target_lang) not in directions:
+                meta["directions"][direction_key] = fingerprint
+                entries.update({k: v for k, v in previous.items() if k[:2] == (source_lang, target_lang)})
+
+    count = write_table(output, entries, meta)
+    print(f"Wrote {count} translations to {output} ({os.path.getsize(output) / 1024:.1f} KiB).")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute corpus translations into a memory-mapped lookup table.")
+    parser.add_argument("--data_file", type=str, default=os.path.join(PROJECT_ROOT, "data", "sylheti_translation.json"))
+    parser.add_argument("--phrase_lists", nargs="*", default=None, help=f"Extra .json/.jsonl phrase files (default: everything in {PHRASE_LIST_DIR}).")
+    parser.add_argument("--directions", nargs="*", type=parse_direction, help="Directions to (re)build, e.g. sylheti:bengali (default: all).")
+    parser.add_argument("--backend", type=str, choices=BACKENDS, default=TRANSLATOR_BACKEND, help="Must match the server's TRANSLATOR_BACKEND.")
+    parser.add_argument("--output", type=str, default=TRANSLATION_TABLE_PATH)
+    parser.add_argument("--batch_size", type=int, default=32)
+    parser.add_argument("--max_length", type=int, default=128)
+    parser.add_argument("--full", action="store_true", help="Ignore the existing table and retranslate everything.")
+    args = parser.parse_args()
+
+    print("--- Running build_translation_table.py ---")
+    phrase_lists = args.phrase_lists
+    if phrase_lists is None:
+        phrase_lists = sorted(glob.glob(os.path.join(PHRASE_LIST_DIR, "*.json")) + glob.glob(os.path.join(PHRASE_LIST_DIR, "*.jsonl")))
+    rows = read_rows(args.data_file)
+    for path in phrase_lists:
+        extra = read_rows(path)
+        print(f"Including {len(extra)} rows from {path}")
+        rows.extend(extra)
+
+    build_table(rows, args.directions or list(MODEL_PATHS), resolve_model_paths(args.backend),
+                args.output, args.batch_size, args.max_length, args.full)
+    print("--- Finished build_translation_table.py ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# scripts/distill.py
+# Sequence-level knowledge distillation of the MODEL_PATHS translators into compact students
+# for CPU serving. Per direction:
+#
+#   generate  The teacher (MODEL_PATHS) translates every source sentence in the corpus plus any
+#             --augment_file text, with the same beam search translate() uses. Sentences in the
+#             held-out split are left out so the report below stays a fair comparison.
+#   init      A student is derived from the teacher's config with fewer encoder/decoder layers
+#             (and optionally a narrower d_model). At the teacher's width, the student starts
+#             from evenly spaced teacher layers plus the teacher's embeddings; a narrower
+#             student starts from random weights and needs more epochs.
+#   train     scripts/train.py fine-tunes the student on the teacher's translations and saves
+#             it to STUDENT_MODEL_PATHS, where TRANSLATOR_BACKEND=student picks it up.
+#   report    evaluate_models.py scores teacher and student on the held-out split
+#             (BLEU/chrF, sentences/sec, latency percentiles) into one table.
+#
+# Arguments not listed below are passed through to train.py (e.g. --num_train_epochs 10).
+#
+# Usage:
+#   python scripts/distill.py --directions sylheti:bengali
+#   python scripts/distill.py --student_encoder_layers 3 --student_decoder_layers 1 --num_train_epochs 10
+#   python scripts/distill.py --stages report
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from datasets import load_dataset
+from transformers import AutoModelForSeq2SeqLM
+
+# Add the parent directory to the sys.path to allow imports from scripts and utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("TRANSLATOR_AUTOLOAD", "0") # Teachers are loaded one direction at a time below
+
+from scripts.model_registry import MODEL_PATHS, STUDENT_MODEL_PATHS, PROJECT_ROOT, LANGUAGE_CODES, serving_model_dir
+from scripts.translator import _load_model_and_tokenizer
+from scripts.evaluate_models import add_common_arguments, generate_batched, evaluate_models, format_table
+from utils.dataset_cache import filter_and_split
+
+TRAIN_SCRIPT = os.path.join(PROJECT_ROOT, "scripts", "train.py")
+STAGES = ("generate", "init", "train", "report")
+LAYER_KEY_PATTERN = re.compile(r"\b(encoder|decoder)\.layers\.(\d+)\.")
+
+
+# --- generate ---
+def read_augmentation(path, source_lang):
+    """Extra source sentences: one per line (.txt), or objects with a '<source_lang>' key (.json/.jsonl)."""
+    if path.endswith(".txt"):
+        with open(path, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    dataset = load_dataset("json", data_files=path, split="train")
+    return [text for text in dataset[source_lang] if text]
+
+
+def collect_source_texts(raw_dataset, source_lang, target_lang, seed, test_split_size, augment_texts):
+    """Unique source sentences to distill on: the corpus (even rows without a target) plus augmentation, minus held-out rows."""
+    _, eval_dataset = filter_and_split(raw_dataset, source_lang, target_lang, seed, test_split_size)
+    held_out = set(eval_dataset[source_lang])
+    sources = []
+    seen = set()
+    for text in list(raw_dataset[source_lang]) + list(augment_texts):
+        text = (text or "").strip()
+        if text and text not in seen and text not in held_out:
+            seen.add(text)
+            sources.append(text)
+    return sources
+
+
+def teacher_translate(model, tokenizer, sources, batch_size, num_beams, max_length):
+    """Batched teacher translations, batched by length to limit padding, returned in input order."""
+    order = sorted(range(len(sources)), key=lambda i: len(sources[i]))
+    predictions, _ = generate_batched(model, tokenizer, [sources[i] for i in order], batch_size, max_length, num_beams=num_beams)
+    translations = [None] * len(sources)
+    for i, prediction in zip(order, predictions):
+        translations[i] = prediction.strip()
+    return translations
+
+
+# --- init ---
+def select_layers(teacher_count, student_count):
+    """Evenly spaced teacher layer indices (always keeping the first and last)."""
+    if student_count >= teacher_count:
+        return list(range(teacher_count))
+    if student_count == 1:
+        return [teacher_count - 1]
+    return [round(i * (teacher_count - 1) / (student_count - 1)) for i in range(student_count)]
+
+
+def build_student(teacher, encoder_layers, decoder_layers, d_model=None):
+    """Returns (student_model, initialised_from_teacher)."""
+    config = teacher.config.__class__.from_dict(teacher.config.to_dict())
+    config.encoder_layers = encoder_layers
+    config.decoder_layers = decoder_layers
+    narrower = bool(d_model) and d_model != config.d_model
+    if narrower:
+        ffn_ratio = config.encoder_ffn_dim // config.d_model
+        config.d_model = d_model
+        config.encoder_ffn_dim = config.decoder_ffn_dim = d_model * ffn_ratio
+        for heads_attribute in ("encoder_attention_heads", "decoder_attention_heads"):
+            if d_model % getattr(config, heads_attribute):
+                setattr(config, heads_attribute, max(1, d_model // 64))
+    student = AutoModelForSeq2SeqLM.from_config(config)
+    if narrower:
+        return student, False
+
+    layer_maps = {
+        "encoder": select_layers(teacher.config.encoder_layers, encoder_layers),
+        "decoder": select_layers(teacher.config.decoder_layers, decoder_layers),
+    }
+    teacher_state = teacher.state_dict()
+    student_state = {}
+    for key in student.state_dict():
+        teacher_key = LAYER_KEY_PATTERN.sub(
+            lambda m: f"{m.group(1)}.layers.{layer_maps[m.group(1)][int(m.group(2))]}.", key)
+        student_state[key] = teacher_state[teacher_key]
+    student.load_state_dict(student_state)
+    print(f"Student layers copied from teacher: encoder {layer_maps['encoder']}, decoder {layer_maps['decoder']}")
+    return student, True
+
+
+def count_parameters(model):
+    return sum(p.numel() for p in model.parameters())
+
+
+# --- pipeline ---
+def distill_direction(direction, args, passthrough, raw_dataset, augment_path):
+    source_lang, target_lang = direction
+    direction_str = f"{source_lang} -> {target_lang}"
+    work_dir = os.path.join(args.work_dir, f"{LANGUAGE_CODES[source_lang]}_{LANGUAGE_CODES[target_lang]}")
+    os.makedirs(work_dir, exist_ok=True)
+    distilled_path = os.path.join(work_dir, "distilled.json")
+    student_init_dir = os.path.join(work_dir, "student_init")
+    student_dir = serving_model_dir(direction, STUDENT_MODEL_PATHS)
+
+    teacher = tokenizer = None
+    if "generate" in args.stages or "init" in args.stages:
+        teacher, tokenizer = _load_model_and_tokenizer(MODEL_PATHS[direction], direction_key_for_logging=direction_str)
+        if teacher is None:
+            print(f"({direction_str}) Teacher failed to load, skipping.")
+            return False
+
+    if "generate" in args.stages:
+        augment_texts = read_augmentation(augment_path, source_lang) if augment_path else []
+        sources = collect_source_texts(raw_dataset, source_lang, target_lang, args.seed, args.test_split_size, augment_texts)
+        print(f"({direction_str}) Generating teacher translations for {len(sources)} sentences "
+              f"({len(augment_texts)} from augmentation)...")
+        start = time.perf_counter()
+        translations = teacher_translate(teacher, tokenizer, sources, args.teacher_batch_size, args.teacher_num_beams, args.max_length)
+        elapsed = time.perf_counter() - start
+        records = [{source_lang: s, target_lang: t} for s, t in zip(sources, translations) if t]
+        with open(distilled_path, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=0)
+        print(f"({direction_str}) Wrote {len(records)} distilled pairs to {distilled_path} "
+              f"in {elapsed:.1f}s ({len(sources) / max(elapsed, 1e-9):.1f} sent/s)")
+
+    if "init" in args.stages:
+        student, from_teacher = build_student(teacher, args.student_encoder_layers, args.student_decoder_layers, args.student_d_model)
+        student.save_pretrained(student_init_dir)
+        tokenizer.save_pretrained(student_init_dir)
+        print(f"({direction_str}) Student: {count_parameters(student) / 1e6:.1f}M parameters vs teacher "
+              f"{count_parameters(teacher) / 1e6:.1f}M ({'teacher-initialised' if from_teacher else 'random init'}), "
+              f"saved to {student_init_dir}")
+        del student
+    del teacher
+
+    if "train" in args.stages:
+        if not os.path.exists(distilled_path) or not os.path.isdir(student_init_dir):
+            print(f"({direction_str}) Run the generate and init stages first.")
+            return False
+        command = [
+            sys.executable, TRAIN_SCRIPT,
+            "--source_lang", source_lang, "--target_lang", target_lang,
+            "--data_file", distilled_path, "--base_model", student_init_dir,
+            "--output_dir", student_dir, "--seed", str(args.seed),
+        ] + passthrough
+        env = dict(os.environ)
+        env["PYTHONPATH"] = PROJECT_ROOT + (os.pathsep + env["PYTHONPATH"] if env.get("PYTHONPATH") else "")
+        print(f"({direction_str}) Training student into {student_dir}...")
+        if subprocess.run(command, cwd=PROJECT_ROOT, env=env).returncode != 0 or \
+                not os.path.exists(os.path.join(student_dir, "final_eval_results.json")):
+            print(f"({direction_str}) Student training did not complete.")
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the MODEL_PATHS translators into compact student models.")
+    add_common_arguments(parser)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES), help="Pipeline stages to run.")
+    parser.add_argument("--augment_file", type=str, default=None, help="Extra monolingual source text (.txt lines, or .json/.jsonl with language keys).")
+    parser.add_argument("--work_dir", type=str, default=os.path.join(PROJECT_ROOT, "cache", "distill"))
+    parser.add_argument("--teacher_num_beams", type=int, default=4, help="Beam size for teacher translations (translate() uses 4).")
+    parser.add_argument("--teacher_batch_size", type=int, default=32)
+    parser.add_argument("--student_encoder_layers", type=int, default=6)
+    parser.add_argument("--student_decoder_layers", type=int, default=2, help="Decoder depth dominates generation latency.")
+    parser.add_argument("--student_d_model", type=int, default=None, help="Narrower hidden size (random init); default keeps the teacher's.")
+    parser.add_argument("--num_beams", nargs="+", type=int, default=[1, 4], help="Beam sizes for the report.")
+    parser.add_argument("--batch_sizes", nargs="+", type=int, default=[1], help="Batch sizes for the report.")
+    parser.add_argument("--report", type=str, default=os.path.join(PROJECT_ROOT, "models", "distillation_report.json"))
+    args, passthrough = parser.parse_known_args()
+
+    directions = args.directions or list(MODEL_PATHS)
+    print("--- Running distill.py ---")
+    raw_dataset = load_dataset("json", data_files=args.data_file, split="train")
+    if any(stage in args.stages for stage in ("generate", "init", "train")):
+        for direction in directions:
+            distill_direction(direction, args, passthrough, raw_dataset, args.augment_file)
+
+    if "report" in args.stages:
+        student_paths = {d: STUDENT_MODEL_PATHS[d] for d in directions
+                         if os.path.isdir(serving_model_dir(d, STUDENT_MODEL_PATHS))}
+        rows = evaluate_models(directions, MODEL_PATHS, args) + evaluate_models(list(student_paths), student_paths, args)
+        rows.sort(key=lambda row: (row["direction"], row["num_beams"], row["batch_size"]))
+        print(format_table(rows))
+        os.makedirs(os.path.dirname(args.report), exist_ok=True)
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2, ensure_ascii=False)
+        print(f"Report written to {args.report}")
+    print("--- Finished distill.py ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# scripts/evaluate_models.py
+# Scores the configured translation models (model_registry.MODEL_PATHS) on a held-out set,
+# for quality and speed together, so speed changes can be checked for quality regressions.
+#
+# For each direction the held-out set is the same split train.py evaluates on (rows with both
+# languages present, split with --seed/--test_split_size). Each decoding setting
+# (--num_beams x --batch_sizes) is run over it with batched generation and reports:
+#   BLEU and chrF (sacrebleu), sentences/sec, and p50/p90/p99 latency per batch.
+#
+# Usage:
+#   python scripts/evaluate_models.py
+#   python scripts/evaluate_models.py --directions sylheti:bengali --num_beams 1 4 --batch_sizes 1 16 --max_samples 200
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import torch
+import evaluate
+from datasets import load_dataset
+
+# Add the parent directory to the sys.path to allow imports from scripts and utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("TRANSLATOR_AUTOLOAD", "0") # Models are loaded one direction at a time below
+
+from scripts.model_registry import MODEL_PATHS, PROJECT_ROOT, BACKENDS, resolve_model_paths
+from scripts.translator import _load_model_and_tokenizer
+from utils.dataset_cache import filter_and_split
+
+
+def parse_direction(value):
+    source_lang, _, target_lang = value.partition(":")
+    if (source_lang, target_lang) not in MODEL_PATHS:
+        available = ", ".join(f"{s}:{t}" for s, t in MODEL_PATHS)
+        raise argparse.ArgumentTypeError(f"Unknown direction '{value}'. Available: {available}")
+    return source_lang, target_lang
+
+
+def load_eval_set(raw_dataset, source_lang, target_lang, seed, test_split_size, max_samples=None):
+    """Returns (sources, references) for the held-out split train.py uses for this pair."""
+    _, eval_dataset = filter_and_split(raw_dataset, source_lang, target_lang, seed, test_split_size)
+    if max_samples:
+        eval_dataset = eval_dataset.select(range(min(max_samples, len(eval_dataset))))
+    return list(eval_dataset[source_lang]), list(eval_dataset[target_lang])
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+def generate_batched(model, tokenizer, sources, batch_size, max_length=128, **generate_kwargs):
+    """
+    Translates 'sources' in batches of 'batch_size'. Returns (predictions, batch_latencies)
+    where each latency is the wall time of one batch (tokenize + generate + decode).
+    """
+    predictions = []
+    latencies = []
+    for start in range(0, len(sources), batch_size):
+        batch = sources[start:start + batch_size]
+        batch_start = time.perf_counter()
+        inputs = tokenizer(batch, return_tensors="pt", padding=True, truncation=True, max_length=max_length)
+        inputs = {k: v.to(model.device) for k, v in inputs.items()}
+        with torch.no_grad():
+            output_ids = model.generate(**inputs, max_length=max_length, **generate_kwargs)
+        predictions.extend(tokenizer.batch_decode(output_ids, skip_special_tokens=True))
+        latencies.append(time.perf_counter() - batch_start)
+    return predictions, latencies
+
+
+class Scorer:
+    """BLEU and chrF through 'evaluate' (same sacrebleu implementation train.py reports)."""
+
+    def __init__(self):
+        self.bleu = evaluate.load("sacrebleu")
+        self.chrf = evaluate.load("chrf")
+
+    def score(self, predictions, references):
+        predictions = [p.strip() for p in predictions]
+        references = [[r.strip()] for r in references]
+        return {
+            "bleu": round(self.bleu.compute(predictions=predictions, references=references)["score"], 2),
+            "chrf": round(self.chrf.compute(predictions=predictions, references=references)["score"], 2),
+        }
+
+
+def evaluate_setting(model, tokenizer, scorer, sources, references, num_beams, batch_size, max_length=128, **generate_kwargs):
+    """Runs one decoding setting over the eval set and returns its quality and speed metrics."""
+    # Warm-up batch so one-off allocation/thread start-up isn't counted
+    generate_batched(model, tokenizer, sources[:batch_size], batch_size, max_length, num_beams=num_beams, **generate_kwargs)
+
+    start = time.perf_counter()
+    predictions, latencies = generate_batched(model, tokenizer, sources, batch_size, max_length,
+                                              num_beams=num_beams, **generate_kwargs)
+    elapsed = time.perf_counter() - start
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    return {
+        "num_beams": num_beams,
+        "batch_size": batch_size,
+        "sentences": len(sources),
+        **scorer.score(predictions, references),
+        "sentences_per_sec": round(len(sources) / elapsed, 2),
+        "p50_ms": round(percentile(latencies_ms, 0.50), 1),
+        "p90_ms": round(percentile(latencies_ms, 0.90), 1),
+        "p99_ms": round(percentile(latencies_ms, 0.99), 1),
+        "predictions": predictions,
+    }
+
+
+def format_table(rows):
+    columns = ["direction", "model", "num_beams", "batch_size", "bleu", "chrf", "sentences_per_sec", "p50_ms", "p90_ms", "p99_ms"]
+    lines = ["| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+    for row in rows:
+        lines.append("| " + " | ".join(str(row.get(column, "")) for column in columns) + " |")
+    return "\n".join(lines)
+
+
+def evaluate_models(directions, model_paths, args):
+    """Evaluates model_paths[direction] for each direction. Returns a list of result rows."""
+    raw_dataset = load_dataset("json", data_files=args.data_file, split="train")
+    scorer = Scorer()
+    rows = []
+    for direction in directions:
+        source_lang, target_lang = direction
+        direction_str = f"{source_lang} -> {target_lang}"
+        model_path = model_paths.get(direction)
+        if model_path is None:
+            print(f"({direction_str}) No model configured, skipping.")
+            continue
+        model, tokenizer = _load_model_and_tokenizer(model_path, direction_key_for_logging=direction_str)
+        if model is None:
+            print(f"({direction_str}) Model failed to load, skipping.")
+            continue
+        sources, references = load_eval_set(raw_dataset, source_lang, target_lang, args.seed, args.test_split_size, args.max_samples)
+        print(f"({direction_str}) Evaluating on {len(sources)} held-out sentences...")
+
+        for num_beams in args.num_beams:
+            for batch_size in args.batch_sizes:
+                result = evaluate_setting(model, tokenizer, scorer, sources, references, num_beams, batch_size, args.max_length)
+                result.pop("predictions")
+                rows.append({"direction": direction_str, "model": model_path, **result})
+                print(f"({direction_str}) beams={num_beams} batch={batch_size}: BLEU {result['bleu']}, chrF {result['chrf']}, "
+                      f"{result['sentences_per_sec']} sent/s, p50/p90/p99 {result['p50_ms']}/{result['p90_ms']}/{result['p99_ms']} ms")
+        del model, tokenizer
+    return rows
+
+
+def add_common_arguments(parser):
+    parser.add_argument("--directions", nargs="*", type=parse_direction, help="Directions to evaluate, e.g. sylheti:bengali (default: all in MODEL_PATHS).")
+    parser.add_argument("--data_file", type=str, default=os.path.join(PROJECT_ROOT, "data", "sylheti_translation.json"))
+    parser.add_argument("--seed", type=int, default=42, help="Split seed (match train.py's --seed to score on its held-out rows).")
+    parser.add_argument("--test_split_size", type=float, default=0.1)
+    parser.add_argument("--max_samples", type=int, default=None, help="Cap on held-out sentences per direction.")
+    parser.add_argument("--max_length", type=int, default=128)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate translation models for quality (BLEU/chrF) and speed.")
+    add_common_arguments(parser)
+    parser.add_argument("--num_beams", nargs="+", type=int, default=[1, 4], help="Beam sizes to compare (translate() uses 4).")
+    parser.add_argument("--batch_sizes", nargs="+", type=int, default=[1, 16], help="Batch sizes to compare (1 = single-request latency).")
+    parser.add_argument("--backend", type=str, choices=BACKENDS, default="teacher", help="Which registered models to evaluate.")
+    parser.add_argument("--output", type=str, default=os.path.join(PROJECT_ROOT, "models", "evaluation_report.json"))
+    args = parser.parse_args()
+
+    print("--- Running evaluate_models.py ---")
+    rows = evaluate_models(args.directions or list(MODEL_PATHS), resolve_model_paths(args.backend), args)
+    print(format_table(rows))
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=2, ensure_ascii=False)
+    print(f"Report written to {args.output}")
+    print("--- Finished evaluate_models.py ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# scripts/export_audio_manifest.py
+# Exports the AudioFile/Phrase/Speaker join as a JSONL manifest, one recording per line:
+#   {"audio": "data/audio/speaker_tuhin/12.mp3", "text": "<Sylheti>", "speaker": "tuhin",
+#    "speaker_id": 2, "phrase_id": 12, "duration": 1.8}
+# 'audio' is relative to the project root, exactly as stored in AudioFile.FilePath.
+#
+# fine_tune_whisper.py --manifest <file> trains from this without a database connection.
+#
+# Usage:
+#   python scripts/export_audio_manifest.py
+#   python scripts/export_audio_manifest.py --output /tmp/manifest.jsonl
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add the parent directory to the sys.path to allow imports from config and models
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import db, app
+from models import AudioFile, Phrase, Speaker
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_MANIFEST = os.path.join(PROJECT_ROOT, "data", "audio_manifest.jsonl")
+
+
+def export_manifest(output_path):
+    """Streams the join to 'output_path' (written via a temporary file). Returns the row count."""
+    start = time.perf_counter()
+    query = (
+        db.select(AudioFile.FilePath, Phrase.SylhetiText, Speaker.Name, AudioFile.SpeakerID,
+                  AudioFile.PhraseID, AudioFile.DurationSeconds)
+        .join(Phrase, AudioFile.PhraseID == Phrase.PhraseID)
+        .join(Speaker, AudioFile.SpeakerID == Speaker.SpeakerID)
+        .order_by(AudioFile.AudioFileID)
+        .execution_options(yield_per=1000)
+    )
+    count = 0
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for row in db.session.execute(query):
+            f.write(json.dumps({
+                "audio": row.FilePath,
+                "text": row.SylhetiText,
+                "speaker": row.Name,
+                "speaker_id": row.SpeakerID,
+                "phrase_id": row.PhraseID,
+                "duration": row.DurationSeconds,
+            }, ensure_ascii=False) + "\n")
+            count += 1
+    os.replace(tmp_path, output_path)
+    print(f"Wrote {count} recordings to {output_path} in {time.perf_counter() - start:.2f}s.")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the audio catalogue as a JSONL manifest for offline Whisper fine-tuning.")
+    parser.add_argument("--output", type=str, default=DEFAULT_MANIFEST, help="Manifest path to write.")
+    args = parser.parse_args()
+
+    print("--- Running export_audio_manifest.py ---")
+    with app.app_context():
+        export_manifest(args.output)
+    print("--- Finished export_audio_manifest.py ---")
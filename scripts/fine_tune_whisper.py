@@ -1,8 +1,19 @@
 # scripts/fine_tune_whisper.py
+#
+# Usage:
+#   python scripts/fine_tune_whisper.py
+#   python scripts/fine_tune_whisper.py --feature_store cache/whisper_features          (precomputed log-mel features)
+#   python scripts/fine_tune_whisper.py --feature_store cache/whisper_features --features_only
+#   python scripts/fine_tune_whisper.py --manifest data/audio_manifest.jsonl   (no database needed; see export_audio_manifest.py)
+#   python scripts/fine_tune_whisper.py --manifest data/audio_manifest.jsonl --benchmark_data 200
+import argparse
+import json
 import os
 import sys
+import time
+import zlib
 import torch
-from datasets import Dataset, DatasetDict, Audio
+from datasets import Dataset, DatasetDict, IterableDataset, Audio
 from transformers import (
     WhisperProcessor,
     WhisperForConditionalGeneration,
@@ -16,15 +27,23 @@ from transformers.models.whisper.english_normalizer import BasicTextNormalizer
 from dataclasses import dataclass
 from typing import List, Dict, Union, Any
 
-# Add the parent directory to the sys.path to allow imports from config and models
+# Add the parent directory to the sys.path to allow imports from config, models and utils
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from config import app, db
-from models import AudioFile, Phrase
+from utils.feature_store import update_feature_store, split_store_paths, FeatureStoreDataset
+
+# Use a smaller model to fit into 4GB VRAM
+MODEL_NAME = "openai/whisper-small"
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+TEST_FRACTION = 0.1
 
 def fetch_data_from_db():
     """
     Fetches audio file paths and their corresponding transcriptions from the database.
     """
+    # Imported here so the --manifest path runs without a database (or its driver)
+    from config import app, db
+    from models import AudioFile, Phrase
+
     with app.app_context():
         # Join AudioFile and Phrase tables to get the file path and the Sylheti text
         query = db.session.query(AudioFile.FilePath, Phrase.SylhetiText).join(
@@ -36,8 +55,7 @@ def fetch_data_from_db():
         df = pd.DataFrame(data, columns=['audio', 'transcription'])
         
         # Ensure the audio paths are absolute
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        df['audio'] = df['audio'].apply(lambda x: os.path.join(project_root, x))
+        df['audio'] = df['audio'].apply(lambda x: os.path.join(PROJECT_ROOT, x))
         
         print(f"Fetched {len(df)} records from the database.")
         print(df.head())
@@ -70,6 +88,65 @@ def prepare_dataset(df):
     # inside the Trainer using a data collator.
     return datasets
 
+def iter_manifest(manifest_path, split=None):
+    """
+    Lazily yields {"audio": absolute_path, "transcription": text} from a JSONL manifest
+    (see export_audio_manifest.py). With split="train"/"test", yields only that split; the
+    split is a stable hash of the path, so it doesn't change as recordings are added.
+    """
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if split is not None and is_test_path(record["audio"]) != (split == "test"):
+                continue
+            yield {"audio": os.path.join(PROJECT_ROOT, record["audio"]), "transcription": record["text"]}
+
+
+def is_test_path(audio_path):
+    return zlib.crc32(audio_path.encode("utf-8")) % 1000 < TEST_FRACTION * 1000
+
+
+def load_manifest_streaming(manifest_path, processor):
+    """
+    Streaming train/test datasets over a manifest: each example is decoded and turned into
+    log-mel features only when the Trainer asks for it, so nothing is materialised up front.
+    """
+    print(f"\n--- Streaming dataset from manifest: {manifest_path} ---")
+
+    def prepare_example(example):
+        array, _ = librosa.load(example["audio"], sr=16000) # Resample to 16kHz, which is what Whisper expects
+        return {
+            "input_features": processor(array, sampling_rate=16000).input_features[0],
+            "labels": processor.tokenizer(example["transcription"]).input_ids,
+        }
+
+    return {
+        split: IterableDataset.from_generator(iter_manifest, gen_kwargs={"manifest_path": manifest_path, "split": split})
+        .map(prepare_example, remove_columns=["audio", "transcription"])
+        for split in ("train", "test")
+    }
+
+
+def benchmark_data_loading(dataset, num_examples):
+    """Pulls up to 'num_examples' prepared training examples and reports throughput."""
+    print(f"\n--- Benchmarking data loading ({num_examples} examples) ---")
+    start = time.perf_counter()
+    count = 0
+    if isinstance(dataset, IterableDataset):
+        for _ in dataset:
+            count += 1
+            if count >= num_examples:
+                break
+    else:
+        for i in range(min(num_examples, len(dataset))):
+            dataset[i]
+            count += 1
+    elapsed = time.perf_counter() - start
+    print(f"Loaded {count} examples in {elapsed:.2f}s ({count / max(elapsed, 1e-9):.1f} examples/sec)")
+
 # We need a Data Collator to perform the feature extraction and tokenization
 @dataclass
 class DataCollatorSpeechSeq2SeqWithPadding:
@@ -98,38 +175,76 @@ class DataCollatorSpeechSeq2SeqWithPadding:
 
         return batch
 
-def main():
+def load_from_feature_store(records, processor, args):
+    """
+    Updates the precomputed feature store (only new/changed audio is decoded) and returns
+    memory-mapped train/test datasets from it. 'records' is a list of (audio_path, transcription).
+    """
+    print(f"\n--- Updating feature store: {args.feature_store} ---")
+    index = update_feature_store(args.feature_store, records, processor,
+                                 workers=args.feature_workers, rebuild=args.rebuild_features)
+    # Same split as the streaming manifest path: a hash of the path relative to the project root
+    train_paths, test_paths = split_store_paths(
+        index, lambda path: is_test_path(os.path.relpath(path, PROJECT_ROOT).replace(os.sep, "/")))
+    print(f"Train samples: {len(train_paths)}, Test samples: {len(test_paths)}")
+    if not test_paths:
+        print("WARNING: No recordings fell into the test split; add recordings or evaluation will fail.")
+    return {
+        "train": FeatureStoreDataset(args.feature_store, train_paths, index=index),
+        "test": FeatureStoreDataset(args.feature_store, test_paths, index=index),
+    }
+
+
+def main(args):
     """
     Main function to run the fine-tuning process.
     """
     print("--- Starting Whisper Fine-Tuning Script ---")
     
     # --- Model and Processor Setup ---
-    # Use a smaller model to fit into 4GB VRAM
-    MODEL_NAME = "openai/whisper-small"
     processor = WhisperProcessor.from_pretrained(MODEL_NAME, language="Bengali", task="transcribe")
-    model = WhisperForConditionalGeneration.from_pretrained(MODEL_NAME)
-    
-    model.config.forced_decoder_ids = None
-    model.config.suppress_tokens = []
 
-    # 1. Fetch data from the database
-    data_df = fetch_data_from_db()
-    if data_df.empty:
-        print("No data fetched from database. Exiting.")
-        return
+    # 1 & 2. Fetch the (audio, transcription) pairs and prepare the dataset
+    data_start = time.perf_counter()
+    if args.feature_store:
+        if args.manifest:
+            records = [(r["audio"], r["transcription"]) for r in iter_manifest(args.manifest)]
+        else:
+            data_df = fetch_data_from_db()
+            records = list(zip(data_df["audio"], data_df["transcription"]))
+        if not records:
+            print("No data found. Exiting.")
+            return
+        sylheti_dataset = load_from_feature_store(records, processor, args)
+        if args.features_only:
+            print("--- Feature store updated (--features_only); skipping training ---")
+            return
+    elif args.manifest:
+        sylheti_dataset = load_manifest_streaming(args.manifest, processor)
+    else:
+        data_df = fetch_data_from_db()
+        if data_df.empty:
+            print("No data fetched from database. Exiting.")
+            return
+        sylheti_dataset = prepare_dataset(data_df)
 
-    # 2. Prepare the dataset
-    sylheti_dataset = prepare_dataset(data_df)
-    
-    # Pre-process the dataset to prepare it for the model
-    def prepare_dataset_for_training(batch):
-        audio = batch["audio"]
-        batch["input_features"] = processor(audio["array"], sampling_rate=audio["sampling_rate"]).input_features[0]
-        batch["labels"] = processor.tokenizer(batch["transcription"]).input_ids
-        return batch
+        # Pre-process the dataset to prepare it for the model
+        def prepare_dataset_for_training(batch):
+            audio = batch["audio"]
+            batch["input_features"] = processor(audio["array"], sampling_rate=audio["sampling_rate"]).input_features[0]
+            batch["labels"] = processor.tokenizer(batch["transcription"]).input_ids
+            return batch
+
+        sylheti_dataset = sylheti_dataset.map(prepare_dataset_for_training, remove_columns=sylheti_dataset.column_names["train"], num_proc=1)
+    print(f"Training data ready in {time.perf_counter() - data_start:.2f}s")
+
+    if args.benchmark_data:
+        benchmark_data_loading(sylheti_dataset["train"], args.benchmark_data)
+        return
 
-    sylheti_dataset = sylheti_dataset.map(prepare_dataset_for_training, remove_columns=sylheti_dataset.column_names["train"], num_proc=1)
+    model = WhisperForConditionalGeneration.from_pretrained(MODEL_NAME)
+    model.config.forced_decoder_ids = None
+    model.config.suppress_tokens = []
 
     # 3. Define the Data Collator and Trainer
     data_collator = DataCollatorSpeechSeq2SeqWithPadding(processor=processor)
@@ -198,4 +313,11 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Fine-tune Whisper on the catalogued Sylheti recordings.")
+    parser.add_argument("--manifest", type=str, default=None, help="JSONL manifest from export_audio_manifest.py; used instead of the database.")
+    parser.add_argument("--benchmark_data", type=int, default=0, help="Only time loading this many prepared training examples, then exit.")
+    parser.add_argument("--feature_store", type=str, default=None, help="Directory of the precomputed log-mel feature store (created/updated as needed).")
+    parser.add_argument("--feature_workers", type=int, default=os.cpu_count(), help="Worker processes for feature extraction.")
+    parser.add_argument("--rebuild_features", action="store_true", help="Re-extract every file instead of only new/changed ones.")
+    parser.add_argument("--features_only", action="store_true", help="Update the feature store and exit without training.")
+    main(parser.parse_args())
\ No newline at end of file
@@ -1,7 +1,25 @@
 # scripts/import_data.py
+# Streaming, idempotent phrase importer.
+#
+# Parses JSON (a top-level array), JSONL or TSV incrementally, so memory use does not
+# grow with the file size, and writes in batches. Each batch is one transaction:
+#   1. drop records whose natural key (SylhetiText, BengaliText) already appeared earlier in
+#      the run - the first occurrence in the file wins, whichever batch it is in
+#   2. INSERT ... ON CONFLICT (SylhetiText, BengaliText) DO UPDATE SET EnglishText, only where
+#      EnglishText actually differs (backed by the unique index ux_phrases_natural_key)
+# Re-running the importer on the same file therefore writes nothing, and concurrent importers
+# cannot create duplicate phrases.
+#
+# Usage:
+#   python scripts/import_data.py                              (imports data/sylheti_translation.json)
+#   python scripts/import_data.py --file corpus.jsonl --batch_size 5000
+#   python scripts/import_data.py --file corpus.tsv --format tsv
+import argparse
+import csv
 import json
 import os
 import sys
+import time
 
 # --- Add project root to sys.path ---
 current_script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -10,69 +28,245 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 # ------------------------------------
 
+import hashlib
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError, OperationalError
 from models import Phrase
 from config import db, app as flask_app # <-- Use 'app' from config.py, aliased to flask_app
+from search import index_phrases
+from response_cache import bump_table_versions
 
 # Adjust JSON file path to be relative to project_root
 JSON_DATA_FILE = os.path.join(project_root, 'data', 'sylheti_translation.json')
 
-print(f"Attempting to populate database from: {JSON_DATA_FILE}")
-try:
+READ_CHUNK_SIZE = 1 << 16  # Characters read per chunk by the incremental JSON parser
+
+
+# --- Incremental parsers (each yields one dict per record) ---
+def iter_json_array(f):
+    """Yields the objects of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    started = False
+    eof = False
+
+    while True:
+        # Skip whitespace and separators between elements
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(buffer) - 1 and not eof:
+            chunk = f.read(READ_CHUNK_SIZE)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        if pos >= len(buffer):
+            if started:
+                raise json.JSONDecodeError("Unexpected end of file inside JSON array", buffer, pos)
+            return
+
+        if not started:
+            if buffer[pos] != "[":
+                raise json.JSONDecodeError("JSON data is not a list of objects as expected", buffer, pos)
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == "]":
+            return
+
+        try:
+            obj, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # The element is cut off at the end of the buffer; read more and retry
+            chunk = f.read(READ_CHUNK_SIZE)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        pos = end
+        yield obj
+
+
+def iter_jsonl(f):
+    """Yields one object per non-empty line."""
+    for line_number, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            print(f"Skipping line {line_number}: invalid JSON ({e})")
+
+
+def iter_tsv(f):
+    """Yields one dict per row; the header row must name the 'sylheti', 'bengali' and 'english' columns."""
+    yield from csv.DictReader(f, delimiter="\t")
+
+
+PARSERS = {"json": iter_json_array, "jsonl": iter_jsonl, "tsv": iter_tsv}
+
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension in (".tsv", ".tab"):
+        return "tsv"
+    return "json"
+
+
+# --- Batch upsert ---
+NATURAL_KEY_INDEX = "ux_phrases_natural_key"
+UPSERT_DIALECTS = {"sqlite": sqlite, "postgresql": postgresql}
+
+
+def ensure_natural_key_index():
+    """
+    Creates the unique (SylhetiText, BengaliText) index on databases created before it existed
+    (db.create_all() only adds missing tables). Fails if the table already holds duplicates.
+    """
+    indexes = {index["name"] for index in inspect(db.engine).get_indexes(Phrase.__tablename__)}
+    if NATURAL_KEY_INDEX in indexes:
+        return
+    index = next(index for index in Phrase.__table__.indexes if index.name == NATURAL_KEY_INDEX)
+    try:
+        index.create(db.engine)
+    except (IntegrityError, OperationalError) as e:
+        raise RuntimeError(f"Could not create unique index {NATURAL_KEY_INDEX}: 'phrases' has duplicate "
+                           f"(SylhetiText, BengaliText) rows; remove them and re-run. ({e.orig})") from e
+    print(f"Created unique index {NATURAL_KEY_INDEX} on phrases (SylhetiText, BengaliText).")
+
+
+def _key_digest(sylheti_text, bengali_text):
+    # Keys seen so far are remembered as 16-byte digests, not the texts themselves
+    return hashlib.blake2b(f"{sylheti_text}\t{bengali_text}".encode("utf-8"), digest_size=16).digest()
+
+
+def upsert_batch(records, seen_keys):
+    """
+    Writes one batch of (sylheti, bengali, english) records in a single transaction.
+    Records whose key is in 'seen_keys' (earlier in this run) are skipped; the batch's keys
+    are added to it. Returns (inserted, updated, unchanged) counts.
+    """
+    rows = []
+    for sylheti_text, bengali_text, english_text in records:
+        digest = _key_digest(sylheti_text, bengali_text)
+        if digest not in seen_keys:
+            seen_keys.add(digest)
+            rows.append({"SylhetiText": sylheti_text, "BengaliText": bengali_text, "EnglishText": english_text})
+    if not rows:
+        return 0, 0, len(records)
+
+    # Which keys exist already; only used to split the written rows into inserted/updated
+    existing = set()
+    sylheti_values = list({row["SylhetiText"] for row in rows})
+    # Chunk the IN list so very large batches stay under bind-parameter limits
+    for i in range(0, len(sylheti_values), 500):
+        existing.update(db.session.execute(
+            db.select(Phrase.SylhetiText, Phrase.BengaliText).where(Phrase.SylhetiText.in_(sylheti_values[i:i + 500]))
+        ).tuples())
+
+    # A missing EnglishText in the file never clears the stored one; the WHERE clause makes
+    # unchanged rows no-ops, so they are neither written nor returned
+    stmt = UPSERT_DIALECTS[db.engine.dialect.name].insert(Phrase)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Phrase.SylhetiText, Phrase.BengaliText],
+        set_={"EnglishText": stmt.excluded.EnglishText},
+        where=stmt.excluded.EnglishText.is_not(None) & Phrase.EnglishText.is_distinct_from(stmt.excluded.EnglishText),
+    ).returning(Phrase.PhraseID, Phrase.SylhetiText, Phrase.BengaliText, Phrase.EnglishText)
+    written = db.session.execute(stmt, rows).all()
+
+    # Core bulk statements bypass the ORM events, so the search index (and table version) is updated here
+    connection = db.session.connection()
+    inserted = [tuple(row) for row in written if (row.SylhetiText, row.BengaliText) not in existing]
+    updated = [tuple(row) for row in written if (row.SylhetiText, row.BengaliText) in existing]
+    index_phrases(connection, inserted, replace=False)
+    index_phrases(connection, updated)
+    if written:
+        bump_table_versions(connection, [Phrase.__tablename__]) # Invalidates cached GET /phrases responses
+
+    db.session.commit()
+    return len(inserted), len(updated), len(records) - len(written)
+
+
+def import_file(path, file_format, batch_size):
+    parser = PARSERS[file_format]
+    totals = {"read": 0, "inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+    start = time.perf_counter()
+    seen_keys = set()
+
+    def flush(batch):
+        inserted, updated, unchanged = upsert_batch(batch, seen_keys)
+        totals["inserted"] += inserted
+        totals["updated"] += updated
+        totals["unchanged"] += unchanged
+        elapsed = time.perf_counter() - start
+        print(f"  {totals['read']} rows read, {totals['inserted']} inserted, {totals['updated']} updated "
+              f"({totals['read'] / elapsed:,.0f} rows/sec)")
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        batch = []
+        for entry in parser(f):
+            totals["read"] += 1
+            if not isinstance(entry, dict):
+                totals["skipped"] += 1
+                continue
+            sylheti_text = (entry.get('sylheti') or "").strip()
+            bengali_text = (entry.get('bengali') or "").strip()
+            english_text = (entry.get('english') or "").strip() or None
+
+            if not sylheti_text or not bengali_text:
+                print(f"Skipping entry due to missing Sylheti or Bengali: {entry}")
+                totals["skipped"] += 1
+                continue
+
+            batch.append((sylheti_text, bengali_text, english_text))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+
+    elapsed = time.perf_counter() - start
+    print(f"Data import: {totals['inserted']} phrases added, {totals['updated']} updated, "
+          f"{totals['unchanged']} already present (incl. duplicates), {totals['skipped']} skipped.")
+    print(f"Processed {totals['read']} rows in {elapsed:.1f}s ({totals['read'] / max(elapsed, 1e-9):,.0f} rows/sec).")
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream phrases from JSON/JSONL/TSV into the database (idempotent upsert).")
+    parser.add_argument("--file", type=str, default=JSON_DATA_FILE, help="Path to the data file.")
+    parser.add_argument("--format", type=str, choices=["auto"] + list(PARSERS), default="auto",
+                        help="Input format (default: from the file extension).")
+    parser.add_argument("--batch_size", type=int, default=2000, help="Rows per transaction.")
+    args = parser.parse_args()
+
+    file_format = detect_format(args.file) if args.format == "auto" else args.format
+    print(f"Attempting to populate database from: {args.file} (format: {file_format}, batch size: {args.batch_size})")
     # Use flask_app (which is the 'app' instance from config.py) for the context
     with flask_app.app_context():
-        with open(JSON_DATA_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        if not isinstance(data, list):
-            print("ERROR: JSON data is not a list of objects as expected.")
-        else:
-            phrases_added = 0
-            phrases_skipped = 0
-            for entry in data:
-                sylheti_text = entry.get('sylheti')
-                bengali_text = entry.get('bengali')
-                english_text = entry.get('english')
-
-                if not sylheti_text or not bengali_text:
-                    print(f"Skipping entry due to missing Sylheti or Bengali: {entry}")
-                    phrases_skipped += 1
-                    continue
-
-                # Optional: Check if the phrase already exists to avoid duplicates
-                # existing_phrase = Phrase.query.filter_by(SylhetiText=sylheti_text, BengaliText=bengali_text).first()
-                # if existing_phrase:
-                #     print(f"Skipping duplicate: {sylheti_text[:20]}...")
-                #     phrases_skipped +=1
-                #     continue
-
-                try:
-                    phrase = Phrase(
-                        SylhetiText=sylheti_text,
-                        BengaliText=bengali_text,
-                        EnglishText=english_text
-                    )
-                    db.session.add(phrase)
-                    phrases_added += 1
-                except Exception as e_phrase:
-                    print(f"Error creating Phrase object for {entry}: {e_phrase}")
-                    phrases_skipped += 1
-                    db.session.rollback()  # Rollback for this specific item
-
-            db.session.commit()
-            print(f"Data import: {phrases_added} phrases added, {phrases_skipped} phrases skipped.")
+        try:
+            ensure_natural_key_index()
+            import_file(args.file, file_format, args.batch_size)
             print("Data import completed successfully.")
+        except FileNotFoundError:
+            print(f"ERROR: Data file not found at {args.file}")
+        except json.JSONDecodeError as e:
+            print(f"ERROR: Could not decode JSON from {args.file}. Check its format. ({e})")
+        except Exception as e:
+            print(f"An unexpected error occurred during database population: {e}")
+            # Batches committed before the error are kept; only the current batch is rolled back.
+            try:
+                db.session.rollback()
+                print("Rolled back the current batch due to error.")
+            except Exception as rb_error:
+                print(f"Error during rollback: {rb_error}")
 
-except FileNotFoundError:
-    print(f"ERROR: Data file not found at {JSON_DATA_FILE}")
-except json.JSONDecodeError:
-    print(f"ERROR: Could not decode JSON from {JSON_DATA_FILE}. Check its format.")
-except Exception as e:
-    print(f"An unexpected error occurred during database population: {e}")
-    # It's good practice to rollback if the commit fails or any other major error happens
-    # However, db might not be in a state to rollback if connection failed earlier.
-    # A more robust setup might initialize db connection within the try block.
-    try:
-        db.session.rollback()
-        print("Rolled back database session due to error.")
-    except Exception as rb_error:
-        print(f"Error during rollback: {rb_error}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# scripts/model_registry.py
+# Which model serves each translation direction. Shared by scripts/translator.py (loading)
+# and scripts/train_all.py (training), so the two can't drift apart.
+
+import os
+
+HF_USERNAME = "ShakhawatTuhin" # Your HF username
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPTS_DIR)
+
+# Define MODEL_PATHS. For each entry, the value is the model identifier.
+# If it's a Hugging Face Hub ID, use "username/repo_name".
+# If it's a local path, use a relative path like "../models/your_model_dir" (relative to scripts/).
+MODEL_PATHS = {
+    # --- SYLHETI AS SOURCE ---
+    ("sylheti", "bengali"): "../models/sy_bn_1396",  # Using local path that matches directory structure
+
+    ("sylheti", "english"): "../models/sy_en_1396",  # Using local path that matches directory structure
+
+    # --- SYLHETI AS TARGET ---
+    ("bengali", "sylheti"): "../models/bn_sy_1396",  # Using local path that matches directory structure
+
+    # Use local path for English to Sylheti
+    ("english", "sylheti"): "../models/en_sy_1396",  # Using local path that matches directory structure
+
+    # English to Bengali and Bengali to English will fall back to Hugging Face if we can't find them locally
+    ("english", "bengali"): f"{HF_USERNAME}/sylheti_translator_en_bn_1396",
+    ("bengali", "english"): f"{HF_USERNAME}/sylheti_translator_bn_en_1396",
+}
+
+LANGUAGE_CODES = {"sylheti": "sy", "bengali": "bn", "english": "en"}
+
+# Compact distilled students (scripts/distill.py), an alternate CPU-serving backend.
+# Directions whose student hasn't been trained yet fall back to MODEL_PATHS.
+STUDENT_MODEL_PATHS = {
+    (source_lang, target_lang): f"../models/student_{LANGUAGE_CODES[source_lang]}_{LANGUAGE_CODES[target_lang]}"
+    for source_lang, target_lang in MODEL_PATHS
+}
+
+BACKENDS = ("teacher", "student")
+
+# Draft models for assisted (speculative) generation in translate(). A draft must share the
+# main model's tokenizer/vocabulary, which the distilled students do by construction.
+DRAFT_MODEL_PATHS = dict(STUDENT_MODEL_PATHS)
+
+
+def is_local_path(model_path_or_hub_id):
+    """Same heuristic translator.py uses: './', '../' or a path separator means a local directory."""
+    return model_path_or_hub_id.startswith(("../", "./")) or \
+        os.path.sep in model_path_or_hub_id or \
+        bool(os.altsep and os.altsep in model_path_or_hub_id)
+
+
+def resolve_model_paths(backend="teacher"):
+    """
+    The model path per direction for a backend. For "student", directions without a
+    trained student (no local directory yet) keep their MODEL_PATHS entry.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown translator backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+    if backend == "teacher":
+        return dict(MODEL_PATHS)
+    return {
+        direction: STUDENT_MODEL_PATHS[direction]
+        if os.path.isdir(os.path.join(SCRIPTS_DIR, STUDENT_MODEL_PATHS[direction])) else path
+        for direction, path in MODEL_PATHS.items()
+    }
+
+
+def serving_model_dir(direction, model_paths=MODEL_PATHS):
+    """
+    Local directory the model for 'direction' is served from: the configured local path, or
+    models/<src>_<tgt>_1396 for directions served from the Hub (upload it from there).
+    Training runs never write here; train_all.py --promote copies a finished run in.
+    """
+    configured = model_paths[direction]
+    # Explicitly relative paths only: "username/repo" Hub IDs also contain a separator
+    if configured.startswith(("../", "./")):
+        return os.path.abspath(os.path.join(SCRIPTS_DIR, configured))
+    source_lang, target_lang = direction
+    return os.path.join(PROJECT_ROOT, "models", f"{LANGUAGE_CODES[source_lang]}_{LANGUAGE_CODES[target_lang]}_1396")
+
+
+def training_output_dir(direction, output_root):
+    """Directory a training run for 'direction' writes to: <output_root>/<src>_<tgt>."""
+    source_lang, target_lang = direction
+    return os.path.join(output_root, f"{LANGUAGE_CODES[source_lang]}_{LANGUAGE_CODES[target_lang]}")
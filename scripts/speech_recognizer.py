@@ -1,12 +1,18 @@
 import torch
 import os
+import threading
+import time
 import traceback
+import numpy as np
 from transformers import WhisperForConditionalGeneration, WhisperProcessor
 import librosa
 import re
 
 # This dictionary will hold the loaded model and processor
 LOADED_WHISPER_ASSETS = {}
+# Guards reading/replacing the model+processor pair so a hot reload swaps both at once
+_WHISPER_ASSETS_LOCK = threading.Lock()
+_WHISPER_RELOAD_LOCK = threading.Lock()
 
 # The path to the directory containing your fine-tuned model checkpoint
 WHISPER_MODEL_PATH = "./models/checkpoint-100"
@@ -17,10 +23,23 @@ def _load_whisper_model_and_processor(model_path: str):
     using the Hugging Face transformers library.
     Handles GPU placement if available.
     """
-    if "model" in LOADED_WHISPER_ASSETS and "processor" in LOADED_WHISPER_ASSETS:
-        print(f"Whisper model and processor from '{model_path}' already loaded.")
-        return LOADED_WHISPER_ASSETS["model"], LOADED_WHISPER_ASSETS["processor"]
+    with _WHISPER_ASSETS_LOCK:
+        if "model" in LOADED_WHISPER_ASSETS and "processor" in LOADED_WHISPER_ASSETS:
+            print(f"Whisper model and processor from '{model_path}' already loaded.")
+            return LOADED_WHISPER_ASSETS["model"], LOADED_WHISPER_ASSETS["processor"]
 
+    model, processor = _read_whisper_model_and_processor(model_path)
+    if model is not None:
+        with _WHISPER_ASSETS_LOCK:
+            LOADED_WHISPER_ASSETS["model"] = model
+            LOADED_WHISPER_ASSETS["processor"] = processor
+            LOADED_WHISPER_ASSETS["fingerprint"] = whisper_fingerprint(model_path)
+        print(f"Successfully loaded Whisper model and processor from: {model_path}")
+    return model, processor
+
+
+def _read_whisper_model_and_processor(model_path: str):
+    """Loads the model and processor from 'model_path' without installing them. Returns (None, None) on failure."""
     try:
         print(f"Attempting to load Whisper model and processor from: {model_path}")
 
@@ -49,16 +68,66 @@ def _load_whisper_model_and_processor(model_path: str):
         device = 'cuda' if torch.cuda.is_available() else 'cpu'
         model.to(device)
         print(f"Whisper model from '{model_path}' moved to {device}.")
-
-        LOADED_WHISPER_ASSETS["model"] = model
-        LOADED_WHISPER_ASSETS["processor"] = processor
-        print(f"Successfully loaded Whisper model and processor from: {model_path}")
         return model, processor
     except Exception as e:
         print(f"ERROR: Failed to load Whisper model/processor from '{model_path}': {e}")
         print(traceback.format_exc())
         return None, None
 
+def whisper_fingerprint(model_path: str = WHISPER_MODEL_PATH):
+    """(file, size, mtime) of the checkpoint files; changes when a new checkpoint is written."""
+    fingerprint = []
+    for name in ("config.json", "model.safetensors"):
+        path = os.path.join(model_path, name)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            fingerprint.append((name, stat.st_size, stat.st_mtime_ns))
+    return tuple(fingerprint) or None
+
+
+def reload_whisper_model(model_path: str = WHISPER_MODEL_PATH, only_changed: bool = False) -> dict:
+    """
+    Loads the checkpoint at 'model_path' next to the serving one, warms it up on a second of
+    silence and swaps it in. transcribe_audio() calls already running finish on the old model.
+    With only_changed=True nothing is done if the checkpoint files are unchanged.
+    Returns {"status", "load_ms", "warmup_ms", "total_ms"}.
+    """
+    start = time.perf_counter()
+    with _WHISPER_RELOAD_LOCK:
+        fingerprint = whisper_fingerprint(model_path)
+        if only_changed and "model" in LOADED_WHISPER_ASSETS and fingerprint == LOADED_WHISPER_ASSETS.get("fingerprint"):
+            return {"status": "unchanged"}
+
+        print(f"--- Reloading Whisper model from '{model_path}' ---")
+        model, processor = _read_whisper_model_and_processor(model_path)
+        report = {"load_ms": round((time.perf_counter() - start) * 1000, 1)}
+        if model is None:
+            report["status"] = "failed (kept the current model)"
+            return report
+
+        stage_start = time.perf_counter()
+        try:
+            silence = np.zeros(16000, dtype=np.float32)
+            input_features = processor(silence, sampling_rate=16000, return_tensors="pt").input_features.to(model.device)
+            with torch.no_grad():
+                model.generate(input_features, max_new_tokens=4)
+        except Exception as e:
+            print(f"--- ERROR warming up the new Whisper model: {e} ---")
+            print(traceback.format_exc())
+            report["status"] = "failed warm-up (kept the current model)"
+            return report
+        report["warmup_ms"] = round((time.perf_counter() - stage_start) * 1000, 1)
+
+        with _WHISPER_ASSETS_LOCK:
+            LOADED_WHISPER_ASSETS["model"] = model
+            LOADED_WHISPER_ASSETS["processor"] = processor
+            LOADED_WHISPER_ASSETS["fingerprint"] = fingerprint
+    report["status"] = "swapped"
+    report["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    print(f"--- Swapped in new Whisper model (load {report['load_ms']} ms, warm-up {report['warmup_ms']} ms) ---")
+    return report
+
+
 def detect_script(text):
     """
     Detects whether the given text is primarily in Bengali or Latin script.
@@ -101,13 +170,15 @@ def clean_transcript(text):
     text = text.strip()
     return text
 
-def transcribe_audio(audio_path: str, source_language: str = None) -> dict:
+def transcribe_audio(audio_path: str, source_language: str = None, deadline: float = None) -> dict:
     """
     Transcribes an audio file using the fine-tuned Whisper model.
 
     Args:
         audio_path (str): The path to the audio file to transcribe.
         source_language (str, optional): The source language hint.
+        deadline (float, optional): time.monotonic() value after which the request is
+            abandoned (checked before decoding and enforced during generation).
 
     Returns:
         dict: A dictionary with 'text' (transcribed text) and 'detected_language'
@@ -126,6 +197,9 @@ def transcribe_audio(audio_path: str, source_language: str = None) -> dict:
     if model is None or processor is None:
         return {"text": f"Error: Whisper model from '{WHISPER_MODEL_PATH}' could not be loaded for transcription.", "detected_language": None}
 
+    if deadline is not None and deadline <= time.monotonic():
+        return {"text": "Error: Request deadline exceeded before transcription started.", "detected_language": None}
+
     try:
         # Load and process the audio file
         audio_input, sampling_rate = librosa.load(audio_path, sr=16000)
@@ -143,7 +217,10 @@ def transcribe_audio(audio_path: str, source_language: str = None) -> dict:
             
         # Generate token IDs
         forced_decoder_ids = processor.get_decoder_prompt_ids(language=lang_code, task="transcribe")
-        predicted_ids = model.generate(input_features, forced_decoder_ids=forced_decoder_ids)
+        deadline_kwargs = {} if deadline is None else {"max_time": max(deadline - time.monotonic(), 0.001)}
+        predicted_ids = model.generate(input_features, forced_decoder_ids=forced_decoder_ids, **deadline_kwargs)
+        if deadline is not None and deadline <= time.monotonic():
+            return {"text": "Error: Request deadline exceeded during transcription.", "detected_language": None}
 
         # Decode the token IDs to text
         transcription = processor.batch_decode(predicted_ids, skip_special_tokens=True)[0]
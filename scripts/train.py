@@ -1,7 +1,6 @@
 import os
 import numpy as np
 import torch
-from datasets import load_dataset # Only load_dataset needed from here directly
 from transformers import (
     AutoModelForSeq2SeqLM,
     Seq2SeqTrainingArguments,
@@ -9,6 +8,7 @@ from transformers import (
     DataCollatorForSeq2Seq,
     AutoTokenizer # Use AutoTokenizer here now
 )
+from transformers.trainer_utils import get_last_checkpoint
 import argparse # Import argparse for command-line arguments
 import evaluate # Use evaluate for metrics
 import traceback # For detailed error logging
@@ -29,6 +29,13 @@ parser.add_argument("--seed", type=int, default=42, help="Random seed for reprod
 parser.add_argument("--max_input_length", type=int, default=128, help="Max token length for source.")
 parser.add_argument("--max_target_length", type=int, default=128, help="Max token length for target.")
 parser.add_argument("--test_split_size", type=float, default=0.1, help="Fraction of data for validation set (0.0 to 1.0).")
+parser.add_argument("--cache_dir", type=str, default="cache/tokenized", help="Directory for cached tokenized train/eval splits.")
+parser.add_argument("--no_cache", action="store_true", help="Always re-tokenize and don't write the tokenized dataset cache.")
+parser.add_argument("--num_proc", type=int, default=os.cpu_count(), help="Worker processes for tokenization on a cache miss.")
+parser.add_argument("--max_tokens_per_batch", type=int, default=0, help="Token budget per batch (padded size); 0 keeps fixed-size batches. Applies to training and evaluation.")
+parser.add_argument("--resume_from_checkpoint", type=str, default=None, help="Checkpoint directory to resume from, or 'auto' for the latest checkpoint in --output_dir (if any).")
+parser.add_argument("--timing_steps", type=int, default=20, help="With --max_tokens_per_batch, time this many forward/backward steps with random fixed batches and with token-budget batches before training (0 skips).")
+parser.add_argument("--group_by_length", action="store_true", help="Group fixed-size batches by length (ignored when --max_tokens_per_batch is set).")
 
 args = parser.parse_args()
 
@@ -47,6 +54,13 @@ RANDOM_SEED = args.seed
 MAX_INPUT_LENGTH = args.max_input_length
 MAX_TARGET_LENGTH = args.max_target_length
 TEST_SPLIT_SIZE = args.test_split_size
+CACHE_DIR = args.cache_dir
+USE_CACHE = not args.no_cache
+NUM_PROC = args.num_proc
+MAX_TOKENS_PER_BATCH = args.max_tokens_per_batch
+GROUP_BY_LENGTH = args.group_by_length
+TIMING_STEPS = args.timing_steps
+RESUME_FROM_CHECKPOINT = args.resume_from_checkpoint
 
 LOGGING_DIR = os.path.join(OUTPUT_DIR, "logs") # Log within output dir
 
@@ -58,19 +72,23 @@ print(f"Base Model: {BASE_MODEL_CHECKPOINT}")
 print(f"Output Directory: {OUTPUT_DIR}")
 print(f"Epochs: {NUM_TRAIN_EPOCHS}, Train Batch: {TRAIN_BATCH_SIZE}, Eval Batch: {EVAL_BATCH_SIZE}, LR: {LEARNING_RATE}")
 print(f"Seed: {RANDOM_SEED}")
+print(f"Tokenized Cache: {CACHE_DIR if USE_CACHE else 'disabled'} (num_proc={NUM_PROC})")
+if MAX_TOKENS_PER_BATCH:
+    print(f"Batching: token budget of {MAX_TOKENS_PER_BATCH} tokens per batch (length-bucketed)")
+else:
+    print(f"Batching: fixed size{' (grouped by length)' if GROUP_BY_LENGTH else ''}")
 print(f"-----------------------------\n")
 
 
-# --- Import the MODIFIED preprocess_function (ensure it accepts src/tgt args) ---
+# --- Import the tokenized dataset cache (wraps utils.preprocess.preprocess_function) ---
 try:
-    # The preprocess_function itself is needed, tokenizer loaded below
-    from utils.preprocess import preprocess_function
+    from utils.dataset_cache import load_or_build_tokenized_splits
 except ImportError:
-    print("ERROR: Could not import 'preprocess_function' from utils.preprocess.")
-    print("Ensure utils/preprocess.py exists and preprocess_function accepts 'examples, src_lang, tgt_lang'.")
+    print("ERROR: Could not import 'load_or_build_tokenized_splits' from utils.dataset_cache.")
+    print("Ensure utils/dataset_cache.py and utils/preprocess.py exist and the project root is on PYTHONPATH.")
     exit()
 except Exception as e:
-    print(f"Error during import from utils.preprocess: {e}")
+    print(f"Error during import from utils.dataset_cache: {e}")
     exit()
 
 
@@ -89,76 +107,59 @@ except Exception as e:
     exit()
 
 
-# --- 1. Load and Filter Data ---
-print(f"Loading dataset from: {TRAIN_DATA_PATH}")
+# --- 1 & 2. Load, Filter, Split and Tokenize Data (cached on disk) ---
+# See utils/dataset_cache.py: the splits are keyed by a hash of the data file, tokenizer,
+# language pair, max lengths, seed and split size, so repeated runs skip all of this.
+print(f"Loading tokenized dataset for {SRC_LANG} -> {TGT_LANG} from: {TRAIN_DATA_PATH}")
 try:
-    # Load the full dataset
-    dataset = load_dataset("json", data_files=TRAIN_DATA_PATH, split="train")
-    print(f"Initial dataset loaded with {len(dataset)} examples.")
-
-    # Filter out rows where the specific source or target language for THIS run is missing/null/empty
-    print(f"Filtering dataset for non-empty '{SRC_LANG}' and '{TGT_LANG}' columns...")
-    original_count = len(dataset)
-
-    def filter_row(example):
-        src_ok = example.get(SRC_LANG) is not None and example[SRC_LANG] != ""
-        tgt_ok = example.get(TGT_LANG) is not None and example[TGT_LANG] != ""
-        return src_ok and tgt_ok
-
-    dataset = dataset.filter(filter_row)
-    filtered_count = len(dataset)
-    print(f"Filtered dataset size: {filtered_count} (Removed {original_count - filtered_count} rows with missing data for this pair)")
-
-    if filtered_count == 0:
-        print(f"CRITICAL ERROR: No valid data found for the pair {SRC_LANG} -> {TGT_LANG} after filtering.")
-        print(f"Check your data file ('{TRAIN_DATA_PATH}') and ensure columns '{SRC_LANG}' and '{TGT_LANG}' exist and have non-empty values.")
-        exit()
-
+    tokenized_train_dataset, tokenized_eval_dataset, cache_info = load_or_build_tokenized_splits(
+        data_file=TRAIN_DATA_PATH,
+        tokenizer=tokenizer,
+        src_lang=SRC_LANG,
+        tgt_lang=TGT_LANG,
+        max_input_length=MAX_INPUT_LENGTH,
+        max_target_length=MAX_TARGET_LENGTH,
+        seed=RANDOM_SEED,
+        test_split_size=TEST_SPLIT_SIZE,
+        cache_dir=CACHE_DIR,
+        num_proc=NUM_PROC,
+        use_cache=USE_CACHE,
+    )
+    print(f"Train samples: {len(tokenized_train_dataset)}, Validation samples: {len(tokenized_eval_dataset)}")
+except KeyError as e:
+    print(f"\nPREPROCESSING ERROR: Missing key during tokenization: {e}")
+    print(f"Check that the data file has '{SRC_LANG}' and '{TGT_LANG}' keys.")
+    exit()
+except ValueError as e:
+    print(f"CRITICAL ERROR: {e}")
+    print(f"Check your data file ('{TRAIN_DATA_PATH}') and ensure columns '{SRC_LANG}' and '{TGT_LANG}' exist and have non-empty values.")
+    exit()
 except Exception as e:
-    print(f"Error loading or filtering dataset: {e}")
+    print(f"Error loading or preprocessing dataset: {e}")
     print(traceback.format_exc())
     exit()
 
-# Split dataset
-print(f"Splitting dataset ({1-TEST_SPLIT_SIZE:.0%} train / {TEST_SPLIT_SIZE:.0%} validation)...")
-if filtered_count < 2 : # Need at least 2 samples to split
-     print("Warning: Dataset too small to split. Using all data for training and evaluation (not recommended).")
-     train_dataset_raw = dataset
-     eval_dataset_raw = dataset
-else:
-    split_dataset = dataset.train_test_split(test_size=TEST_SPLIT_SIZE, seed=RANDOM_SEED)
-    train_dataset_raw = split_dataset["train"]
-    eval_dataset_raw = split_dataset["test"]
-
-print(f"Train samples: {len(train_dataset_raw)}, Validation samples: {len(eval_dataset_raw)}")
-
 
-# --- 2. Apply Preprocessing ---
-# Uses preprocess_function imported from utils.preprocess
-# Pass SRC_LANG and TGT_LANG from args to the function via fn_kwargs
-print("Applying preprocessing function to datasets...")
-fn_kwargs = {'src_lang': SRC_LANG, 'tgt_lang': TGT_LANG}
+# --- 2b. Batching Report ---
+# Padding efficiency = real tokens / padded tokens, compared against the default
+# random fixed-size batches. The step timer below reports the time side of it.
 try:
-    tokenized_train_dataset = train_dataset_raw.map(
-        preprocess_function,
-        batched=True,
-        remove_columns=train_dataset_raw.column_names, # Keep only model inputs
-        fn_kwargs=fn_kwargs # Pass the arguments here
-    )
-    tokenized_eval_dataset = eval_dataset_raw.map(
-        preprocess_function,
-        batched=True,
-        remove_columns=eval_dataset_raw.column_names, # Keep only model inputs
-        fn_kwargs=fn_kwargs # Pass the arguments here
+    from utils.batching import (
+        TokenBudgetSeq2SeqTrainer, TokenBudgetBatchSampler, StepTimerCallback,
+        example_lengths, random_fixed_batches, describe_batching, time_training_steps,
     )
-    print("Preprocessing complete.")
-except KeyError as e:
-    print(f"\nPREPROCESSING ERROR: Missing key during tokenization: {e}")
-    print("This likely means 'preprocess_function' in utils/preprocess.py is not using the passed src/tgt languages correctly.")
-    print(f"Check that it uses the passed '{SRC_LANG}' and '{TGT_LANG}' keys.")
-    exit()
+    src_lengths, tgt_lengths = example_lengths(tokenized_train_dataset)
+    fixed_batches = random_fixed_batches(len(src_lengths), TRAIN_BATCH_SIZE, RANDOM_SEED)
+    print(f"Train batching (random fixed, batch {TRAIN_BATCH_SIZE}): "
+          f"{describe_batching(fixed_batches, src_lengths, tgt_lengths)}")
+    if MAX_TOKENS_PER_BATCH:
+        budget_sampler = TokenBudgetBatchSampler(
+            [max(s, t) for s, t in zip(src_lengths, tgt_lengths)], MAX_TOKENS_PER_BATCH, seed=RANDOM_SEED)
+        budget_batches = list(budget_sampler)
+        print(f"Train batching (token budget {MAX_TOKENS_PER_BATCH}): "
+              f"{describe_batching(budget_batches, src_lengths, tgt_lengths)}")
 except Exception as e:
-    print(f"\nError during preprocessing: {e}")
+    print(f"Error setting up batching: {e}")
     print(traceback.format_exc())
     exit()
 
@@ -177,6 +178,29 @@ except Exception as e:
 data_collator = DataCollatorForSeq2Seq(tokenizer, model=model)
 print("Data collator initialized.")
 
+
+# --- 4b. Step Time: Random Fixed vs Token-Budget Batches ---
+# A short timed pass (forward + backward, weights untouched) over each batching mode,
+# printed again next to the step timer's numbers for the real run after training.
+# Per-epoch time compares the two fairly: token-budget steps differ in size and count.
+timing_report = []
+if MAX_TOKENS_PER_BATCH and TIMING_STEPS > 0:
+    try:
+        model.to("cuda" if torch.cuda.is_available() else "cpu")
+        for label, batches in ((f"random fixed, batch {TRAIN_BATCH_SIZE}", fixed_batches),
+                               (f"token budget {MAX_TOKENS_PER_BATCH}", budget_batches)):
+            summary = time_training_steps(model, tokenized_train_dataset, data_collator, batches,
+                                          steps=TIMING_STEPS, fp16=torch.cuda.is_available())
+            if summary:
+                line = (f"{label}: {summary['avg_step_seconds']:.3f}s avg, {summary['p50_step_seconds']:.3f}s p50 "
+                        f"over {summary['steps']} steps; ~{summary['avg_step_seconds'] * len(batches):.0f}s per epoch "
+                        f"({len(batches)} steps)")
+                timing_report.append(line)
+                print(f"Step time ({line})")
+    except Exception as e:
+        print(f"Warning: Could not time batching modes: {e}")
+        print(traceback.format_exc())
+
 # --- 5. Evaluation Metric (BLEU/SacreBLEU) ---
 print("Loading SacreBLEU metric...")
 metric = None # Initialize metric to None
@@ -276,27 +300,43 @@ training_args = Seq2SeqTrainingArguments(
     fp16=torch.cuda.is_available(), # Use mixed precision if GPU available
     report_to="tensorboard", # Or "none" or "wandb"
     seed=RANDOM_SEED,
+    group_by_length=GROUP_BY_LENGTH and not MAX_TOKENS_PER_BATCH,
 )
 
 # --- 7. Trainer ---
 print("Initializing Trainer...")
-trainer = Seq2SeqTrainer(
+step_timer = StepTimerCallback()
+trainer_kwargs = {}
+trainer_class = Seq2SeqTrainer
+if MAX_TOKENS_PER_BATCH:
+    # Batch size varies per batch; the train/eval batch sizes above are then unused
+    trainer_class = TokenBudgetSeq2SeqTrainer
+    trainer_kwargs["max_tokens_per_batch"] = MAX_TOKENS_PER_BATCH
+trainer = trainer_class(
     model=model,
     args=training_args,
     train_dataset=tokenized_train_dataset,
     eval_dataset=tokenized_eval_dataset,
     tokenizer=tokenizer,
     data_collator=data_collator,
-    compute_metrics=compute_metrics if metric is not None else None # Only pass if metric loaded
+    compute_metrics=compute_metrics if metric is not None else None, # Only pass if metric loaded
+    callbacks=[step_timer],
+    **trainer_kwargs,
 )
 
 # --- 8. Train ---
+resume_checkpoint = RESUME_FROM_CHECKPOINT
+if resume_checkpoint == "auto":
+    resume_checkpoint = get_last_checkpoint(OUTPUT_DIR) if os.path.isdir(OUTPUT_DIR) else None
+if resume_checkpoint:
+    print(f"Resuming training from checkpoint: {resume_checkpoint}")
+
 print("\n" + "*"*30)
 print(f"Starting Training for {SRC_LANG} -> {TGT_LANG}")
 print("*"*30 + "\n")
 train_result = None # Initialize to handle potential errors
 try:
-    train_result = trainer.train()
+    train_result = trainer.train(resume_from_checkpoint=resume_checkpoint)
     print("Training finished successfully.")
 
 except Exception as e:
@@ -316,6 +356,13 @@ if train_result is not None:
 
         # Save training metrics
         metrics = train_result.metrics
+        step_summary = step_timer.summary()
+        if step_summary:
+            print(f"Step time: {step_summary['avg_step_seconds']:.3f}s avg, {step_summary['p50_step_seconds']:.3f}s p50, "
+                  f"{step_summary['p90_step_seconds']:.3f}s p90 over {step_summary['steps']} steps")
+            for line in timing_report:
+                print(f"  before training (forward + backward only) - {line}")
+            metrics.update({key: value for key, value in step_summary.items() if key != "steps"})
         trainer.log_metrics("train", metrics)
         trainer.save_metrics("train", metrics)
 
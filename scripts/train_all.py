@@ -0,0 +1,271 @@
+# scripts/train_all.py
+# Trains every direction in model_registry.MODEL_PATHS (or a chosen subset) with scripts/train.py.
+#
+# 1. The corpus and base tokenizer are loaded once here and the tokenized splits for every
+#    direction are built into the shared cache (utils/dataset_cache.py), so the train.py
+#    runs all start from a cache hit instead of re-reading and re-tokenizing the corpus.
+# 2. The train.py runs are scheduled with at most --max_parallel running at once; the CPU
+#    cores are split between them through OMP_NUM_THREADS/MKL_NUM_THREADS.
+# 3. Each run writes to <output_root>/<src>_<tgt> (default output root: models/runs/<timestamp>),
+#    never to the serving checkpoints. Re-running with the same --output_root skips directions
+#    that have final_eval_results.json and resumes interrupted ones from their last checkpoint
+#    (train.py --resume_from_checkpoint auto).
+# 4. train/final_eval metrics of every direction are collected into one table.
+# 5. Promotion is a separate step: --promote copies finished runs (without checkpoint-* and
+#    logs) into the serving directories, swapping each in with a rename. The serving model
+#    being replaced is kept as <serving dir>.previous.
+#
+# Any arguments not listed below are passed through to train.py unchanged.
+#
+# Usage:
+#   python scripts/train_all.py
+#   python scripts/train_all.py --directions sylheti:bengali bengali:sylheti --max_parallel 2 --num_train_epochs 3
+#   python scripts/train_all.py --output_root models/runs/20260101-120000   # resume that run
+#   python scripts/train_all.py --summary_only                              # latest run
+#   python scripts/train_all.py --promote --output_root models/runs/20260101-120000
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the sys.path to allow imports from scripts and utils
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.model_registry import MODEL_PATHS, PROJECT_ROOT, training_output_dir, serving_model_dir
+
+TRAIN_SCRIPT = os.path.join(PROJECT_ROOT, "scripts", "train.py")
+RUNS_ROOT = os.path.join(PROJECT_ROOT, "models", "runs")
+DONE_MARKER = "final_eval_results.json"
+PROMOTION_MARKER = "promoted_from.json"
+# Training by-products that stay in the run directory when a model is promoted
+NOT_PROMOTED = ("checkpoint-*", "logs", "runs", "train_all.log")
+SUMMARY_METRICS = ["train_runtime", "train_loss", "avg_step_seconds", "final_eval_bleu", "final_eval_loss", "final_eval_gen_len"]
+
+
+def parse_direction(value):
+    source_lang, _, target_lang = value.partition(":")
+    if (source_lang, target_lang) not in MODEL_PATHS:
+        available = ", ".join(f"{s}:{t}" for s, t in MODEL_PATHS)
+        raise argparse.ArgumentTypeError(f"Unknown direction '{value}'. Available: {available}")
+    return source_lang, target_lang
+
+
+def prebuild_caches(directions, args):
+    """Loads the corpus and tokenizer once and builds (or confirms) each direction's tokenized cache."""
+    from datasets import load_dataset
+    from transformers import AutoTokenizer
+    from utils.dataset_cache import load_or_build_tokenized_splits
+
+    start = time.perf_counter()
+    raw_dataset = load_dataset("json", data_files=args.data_file, split="train")
+    tokenizer = AutoTokenizer.from_pretrained(args.base_model)
+    print(f"Loaded corpus ({len(raw_dataset)} rows) and tokenizer once in {time.perf_counter() - start:.2f}s")
+
+    ready = []
+    for source_lang, target_lang in directions:
+        try:
+            load_or_build_tokenized_splits(
+                data_file=args.data_file, tokenizer=tokenizer, src_lang=source_lang, tgt_lang=target_lang,
+                max_input_length=args.max_input_length, max_target_length=args.max_target_length,
+                seed=args.seed, test_split_size=args.test_split_size, cache_dir=args.cache_dir,
+                num_proc=args.num_proc, raw_dataset=raw_dataset,
+            )
+            ready.append((source_lang, target_lang))
+        except ValueError as e:
+            print(f"Error: {e} Skipping {source_lang} -> {target_lang}.")
+    print(f"Tokenized caches ready in {time.perf_counter() - start:.2f}s")
+    return ready
+
+
+def run_direction(direction, args, passthrough, threads_per_run):
+    """Runs train.py for one direction, logging to <output_dir>/train_all.log. Returns a status dict."""
+    source_lang, target_lang = direction
+    output_dir = training_output_dir(direction, args.output_root)
+    os.makedirs(output_dir, exist_ok=True)
+    log_path = os.path.join(output_dir, "train_all.log")
+
+    command = [
+        sys.executable, TRAIN_SCRIPT,
+        "--source_lang", source_lang, "--target_lang", target_lang,
+        "--output_dir", output_dir,
+        "--data_file", args.data_file, "--base_model", args.base_model,
+        "--seed", str(args.seed), "--test_split_size", str(args.test_split_size),
+        "--max_input_length", str(args.max_input_length), "--max_target_length", str(args.max_target_length),
+        "--cache_dir", args.cache_dir, "--num_proc", "1",
+    ] + passthrough
+    if args.force:
+        # Start over: drop the old done marker so a failed retrain isn't reported as finished
+        if os.path.exists(os.path.join(output_dir, DONE_MARKER)):
+            os.remove(os.path.join(output_dir, DONE_MARKER))
+    else:
+        command += ["--resume_from_checkpoint", "auto"]
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = PROJECT_ROOT + (os.pathsep + env["PYTHONPATH"] if env.get("PYTHONPATH") else "")
+    env["OMP_NUM_THREADS"] = str(threads_per_run)
+    env["MKL_NUM_THREADS"] = str(threads_per_run)
+    env["TOKENIZERS_PARALLELISM"] = "false"
+
+    print(f"[{source_lang} -> {target_lang}] started ({threads_per_run} threads), log: {log_path}")
+    start = time.perf_counter()
+    with open(log_path, "a", encoding="utf-8") as log_file:
+        log_file.write(f"\n===== {time.strftime('%Y-%m-%d %H:%M:%S')} {' '.join(command)}\n")
+        log_file.flush()
+        returncode = subprocess.run(command, cwd=PROJECT_ROOT, env=env, stdout=log_file, stderr=subprocess.STDOUT).returncode
+    elapsed = time.perf_counter() - start
+
+    # train.py exits 0 on most errors, so completion is judged by its final metrics file
+    succeeded = returncode == 0 and os.path.exists(os.path.join(output_dir, DONE_MARKER))
+    print(f"[{source_lang} -> {target_lang}] {'finished' if succeeded else 'FAILED'} in {elapsed / 60:.1f} min")
+    return {"direction": direction, "succeeded": succeeded, "seconds": elapsed, "log": log_path}
+
+
+def collect_metrics(directions, output_root):
+    rows = []
+    for direction in directions:
+        output_dir = training_output_dir(direction, output_root)
+        metrics = {}
+        for file_name in ("train_results.json", DONE_MARKER):
+            path = os.path.join(output_dir, file_name)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    metrics.update(json.load(f))
+        rows.append((direction, output_dir, metrics))
+    return rows
+
+
+def latest_run_root():
+    """The newest directory under models/runs, or None."""
+    if not os.path.isdir(RUNS_ROOT):
+        return None
+    runs = sorted(name for name in os.listdir(RUNS_ROOT) if os.path.isdir(os.path.join(RUNS_ROOT, name)))
+    return os.path.join(RUNS_ROOT, runs[-1]) if runs else None
+
+
+def promote(direction, output_root):
+    """
+    Copies a finished run into the direction's serving directory. The copy is staged next to
+    it and swapped in with renames, so the model watcher never sees a half-written checkpoint.
+    Returns True when promoted.
+    """
+    source_lang, target_lang = direction
+    run_dir = training_output_dir(direction, output_root)
+    if not os.path.exists(os.path.join(run_dir, DONE_MARKER)):
+        print(f"[{source_lang} -> {target_lang}] no finished run in {run_dir}; not promoted")
+        return False
+    serving_dir = serving_model_dir(direction)
+    staging_dir = serving_dir + ".promoting"
+    previous_dir = serving_dir + ".previous"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    shutil.copytree(run_dir, staging_dir, ignore=shutil.ignore_patterns(*NOT_PROMOTED))
+    with open(os.path.join(staging_dir, PROMOTION_MARKER), "w", encoding="utf-8") as f:
+        json.dump({"run_dir": run_dir, "promoted_at": time.strftime("%Y-%m-%d %H:%M:%S")}, f, indent=2)
+    if os.path.exists(serving_dir):
+        shutil.rmtree(previous_dir, ignore_errors=True)
+        os.replace(serving_dir, previous_dir)
+    os.replace(staging_dir, serving_dir)
+    print(f"[{source_lang} -> {target_lang}] promoted {run_dir} -> {serving_dir}"
+          f"{f' (previous model kept in {previous_dir})' if os.path.exists(previous_dir) else ''}")
+    return True
+
+
+def write_summary(rows, summary_path):
+    header = ["direction", "status"] + SUMMARY_METRICS
+    lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+    for (source_lang, target_lang), _, metrics in rows:
+        cells = [f"{source_lang} -> {target_lang}", "done" if "final_eval_loss" in metrics else "incomplete"]
+        for key in SUMMARY_METRICS:
+            value = metrics.get(key)
+            cells.append(f"{value:.4f}" if isinstance(value, float) else ("" if value is None else str(value)))
+        lines.append("| " + " | ".join(cells) + " |")
+    table = "\n".join(lines)
+
+    os.makedirs(os.path.dirname(summary_path), exist_ok=True)
+    with open(summary_path, "w", encoding="utf-8") as f:
+        f.write(table + "\n")
+    with open(os.path.splitext(summary_path)[0] + ".json", "w", encoding="utf-8") as f:
+        json.dump([{"source_lang": d[0], "target_lang": d[1], "output_dir": out, **m} for d, out, m in rows], f, indent=2)
+    print(table)
+    print(f"Summary written to {summary_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train all configured translation directions with scripts/train.py.")
+    parser.add_argument("--directions", nargs="*", type=parse_direction, help="Subset to train, e.g. sylheti:bengali (default: all in MODEL_PATHS).")
+    parser.add_argument("--max_parallel", type=int, default=None, help="Concurrent train.py runs (default: cores // 4, at most the number of directions).")
+    parser.add_argument("--output_root", type=str, default=None,
+                        help="Run directory; each direction trains into <output_root>/<src>_<tgt>. Default: a new "
+                             "models/runs/<timestamp> when training, the latest run for --summary_only / --promote.")
+    parser.add_argument("--force", action="store_true", help="Retrain directions that already finished in --output_root.")
+    parser.add_argument("--summary_only", action="store_true", help="Only rebuild the metrics table from existing results.")
+    parser.add_argument("--promote", action="store_true", help="Don't train: copy the finished runs in --output_root into the serving model directories.")
+    parser.add_argument("--summary_file", type=str, default=None, help="Default: <output_root>/training_summary.md.")
+    # Settings that determine the tokenized cache; forwarded to train.py so its cache key matches
+    parser.add_argument("--data_file", type=str, default="data/sylheti_translation.json")
+    parser.add_argument("--base_model", type=str, default="Helsinki-NLP/opus-mt-bn-en")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--test_split_size", type=float, default=0.1)
+    parser.add_argument("--max_input_length", type=int, default=128)
+    parser.add_argument("--max_target_length", type=int, default=128)
+    parser.add_argument("--cache_dir", type=str, default="cache/tokenized")
+    parser.add_argument("--num_proc", type=int, default=os.cpu_count(), help="Worker processes for tokenization while pre-building caches.")
+    args, passthrough = parser.parse_known_args()
+
+    # Relative paths are relative to the project root (where the train.py runs execute)
+    args.data_file = os.path.join(PROJECT_ROOT, args.data_file)
+    args.cache_dir = os.path.join(PROJECT_ROOT, args.cache_dir)
+    directions = args.directions or list(MODEL_PATHS)
+    if args.output_root is None:
+        if args.summary_only or args.promote:
+            args.output_root = latest_run_root()
+            if args.output_root is None:
+                sys.exit(f"No training runs under {RUNS_ROOT}; pass --output_root.")
+        else:
+            args.output_root = os.path.join(RUNS_ROOT, time.strftime("%Y%m%d-%H%M%S"))
+    args.output_root = os.path.join(PROJECT_ROOT, args.output_root)
+    args.summary_file = args.summary_file or os.path.join(args.output_root, "training_summary.md")
+
+    print("--- Running train_all.py ---")
+    print(f"Run directory: {args.output_root}")
+    if args.promote:
+        promoted = [d for d in directions if promote(d, args.output_root)]
+        print(f"Promoted {len(promoted)} of {len(directions)} directions.")
+        print("--- Finished train_all.py ---")
+        return
+    if not args.summary_only:
+        pending = [d for d in directions
+                   if args.force or not os.path.exists(os.path.join(training_output_dir(d, args.output_root), DONE_MARKER))]
+        for direction in directions:
+            if direction not in pending:
+                print(f"[{direction[0]} -> {direction[1]}] already trained, skipping (use --force to retrain)")
+
+        if pending:
+            pending = prebuild_caches(pending, args)
+        if pending:
+            cores = os.cpu_count() or 1
+            max_parallel = args.max_parallel or max(1, cores // 4)
+            max_parallel = max(1, min(max_parallel, len(pending)))
+            threads_per_run = max(1, cores // max_parallel)
+            print(f"Training {len(pending)} directions, {max_parallel} at a time, {threads_per_run} threads each")
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+                results = list(pool.map(lambda d: run_direction(d, args, passthrough, threads_per_run), pending))
+            failed = [r for r in results if not r["succeeded"]]
+            print(f"All runs finished in {(time.perf_counter() - start) / 60:.1f} min; {len(failed)} failed.")
+            for result in failed:
+                print(f"  {result['direction'][0]} -> {result['direction'][1]}: see {result['log']} "
+                      f"(re-run with --output_root {args.output_root} to resume)")
+            print(f"Serving models are unchanged; promote with: python scripts/train_all.py --promote --output_root {args.output_root}")
+
+    write_summary(collect_metrics(directions, args.output_root), args.summary_file)
+    print("--- Finished train_all.py ---")
+
+
+if __name__ == "__main__":
+    main()
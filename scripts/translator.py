@@ -1,33 +1,40 @@
 # scripts/translator.py
 
+import json
 import os
+import queue
+import threading
+import time
 import traceback
 import torch
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
 
 LOADED_MODELS = {}
+LOADED_DRAFT_MODELS = {} # direction -> (main model, its draft model) for assisted generation (shares the main tokenizer)
+LOADED_MODEL_FINGERPRINTS = {} # direction -> fingerprint of the checkpoint files it was loaded from (see reload_models)
+_RELOAD_LISTENERS = [] # Called with the list of swapped directions after reload_models() (e.g. to drop cached translations)
 
-HF_USERNAME = "ShakhawatTuhin" # Your HF username
+# Directions and their model paths/Hub IDs live in model_registry.py (shared with train_all.py)
+try:
+    from scripts.model_registry import HF_USERNAME, MODEL_PATHS, DRAFT_MODEL_PATHS, SCRIPTS_DIR, PROJECT_ROOT, is_local_path, resolve_model_paths
+except ImportError: # Running translator.py directly from scripts/
+    from model_registry import HF_USERNAME, MODEL_PATHS, DRAFT_MODEL_PATHS, SCRIPTS_DIR, PROJECT_ROOT, is_local_path, resolve_model_paths
+try:
+    from utils.translation_table import TranslationTable
+except ImportError: # Running translator.py directly from scripts/ (no precomputed table lookups)
+    TranslationTable = None
 
-# Define MODEL_PATHS. For each entry, the value is the model identifier.
-# If it's a Hugging Face Hub ID, use "username/repo_name".
-# If it's a local path, use a relative path like "../models/your_model_dir".
-MODEL_PATHS = {
-    # --- SYLHETI AS SOURCE ---
-    ("sylheti", "bengali"): "../models/sy_bn_1396",  # Using local path that matches directory structure
-
-    ("sylheti", "english"): "../models/sy_en_1396",  # Using local path that matches directory structure
-
-    # --- SYLHETI AS TARGET ---
-    ("bengali", "sylheti"): "../models/bn_sy_1396",  # Using local path that matches directory structure
-
-    # Use local path for English to Sylheti
-    ("english", "sylheti"): "../models/en_sy_1396",  # Using local path that matches directory structure
-    
-    # English to Bengali and Bengali to English will fall back to Hugging Face if we can't find them locally
-    ("english", "bengali"): f"{HF_USERNAME}/sylheti_translator_en_bn_1396",
-    ("bengali", "english"): f"{HF_USERNAME}/sylheti_translator_bn_en_1396",
-}
+# "teacher" serves MODEL_PATHS; "student" serves the distilled STUDENT_MODEL_PATHS where one exists
+TRANSLATOR_BACKEND = os.environ.get("TRANSLATOR_BACKEND", "teacher")
+# TRANSLATOR_ASSISTED=1: decode greedily with a draft model proposing tokens that the main model
+# verifies in one forward pass. The output is identical to greedy decoding with the main model
+# alone (not to the default 4-beam search); see scripts/bench_speculative.py.
+TRANSLATOR_ASSISTED = os.environ.get("TRANSLATOR_ASSISTED", "0") == "1"
+STREAM_TOKEN_TIMEOUT_SECONDS = 60 # Longest wait for the next streamed piece before giving up
+DEADLINE_ERROR = "Error: Request deadline exceeded" # Prefix of the error returned when a deadline cuts a request short
+# Precomputed corpus translations (scripts/build_translation_table.py), answered without the models
+TRANSLATION_TABLE_PATH = os.environ.get("TRANSLATION_TABLE_PATH", os.path.join(PROJECT_ROOT, "cache", "translation_table.bin"))
+TABLE_CHECK_INTERVAL_SECONDS = 5 # How often to check whether the table file was rebuilt
 
 # --- Helper Function to Load a Single Model ---
 def _load_model_and_tokenizer(model_path_or_hub_id, direction_key_for_logging="N/A"):
@@ -42,9 +49,7 @@ def _load_model_and_tokenizer(model_path_or_hub_id, direction_key_for_logging="N
 
     # Heuristic: If it starts with '../' or './' or contains os path separators,
     # treat it as a potential local path first.
-    if model_path_or_hub_id.startswith(("../", "./")) or \
-       os.path.sep in model_path_or_hub_id or \
-       (os.altsep and os.altsep in model_path_or_hub_id):
+    if is_local_path(model_path_or_hub_id):
 
         potential_local_path = os.path.abspath(os.path.join(current_script_dir, model_path_or_hub_id))
         print(f"({direction_key_for_logging}) Path '{model_path_or_hub_id}' looks like a local path. Resolved to: {potential_local_path}")
@@ -90,11 +95,17 @@ def load_all_models():
     global LOADED_MODELS
     print("\n--- Loading all translation models ---")
     if LOADED_MODELS:
-        print("Models appear to be already loaded or an attempt was made. Skipping reload. Restart app to force reload.")
+        print("Models appear to be already loaded or an attempt was made. Skipping reload. Use reload_models() to swap in new checkpoints.")
         return
 
     available_directions = []
-    for direction_key, path_or_hub_id_from_config in MODEL_PATHS.items():
+    try:
+        model_paths = resolve_model_paths(TRANSLATOR_BACKEND)
+        print(f"Translator backend: {TRANSLATOR_BACKEND}")
+    except ValueError as e:
+        print(f"WARNING: {e}. Using the teacher models (MODEL_PATHS).")
+        model_paths = MODEL_PATHS
+    for direction_key, path_or_hub_id_from_config in model_paths.items():
         # Ensure direction_key is a tuple of two strings for logging
         if isinstance(direction_key, tuple) and len(direction_key) == 2:
             direction_str = f"{direction_key[0]} -> {direction_key[1]}"
@@ -106,10 +117,14 @@ def load_all_models():
 
         if model and tokenizer:
             LOADED_MODELS[direction_key] = (model, tokenizer)
+            LOADED_MODEL_FINGERPRINTS[direction_key] = model_fingerprint(path_or_hub_id_from_config)
             available_directions.append(direction_str)
         else:
             print(f"--> FAILED to load model for direction {direction_str}")
 
+    if TRANSLATOR_ASSISTED:
+        load_draft_models()
+
     print("\n--------------------------------------")
     if available_directions:
         print(f"Finished loading models. Available translation directions: {', '.join(available_directions)}")
@@ -118,8 +133,225 @@ def load_all_models():
     print("--------------------------------------\n")
 
 
+# --- Draft Models for Assisted Generation ---
+def _normalized_model_path(model_path_or_hub_id):
+    if is_local_path(model_path_or_hub_id):
+        return os.path.normcase(os.path.abspath(os.path.join(SCRIPTS_DIR, model_path_or_hub_id)))
+    return model_path_or_hub_id
+
+
+def _serves_draft_path(direction, draft_path):
+    """True when TRANSLATOR_BACKEND already serves 'direction' from 'draft_path' (e.g. the student backend)."""
+    try:
+        serving_path = resolve_model_paths(TRANSLATOR_BACKEND).get(direction)
+    except ValueError:
+        serving_path = MODEL_PATHS.get(direction)
+    return serving_path is not None and _normalized_model_path(serving_path) == _normalized_model_path(draft_path)
+
+
+def _load_draft(direction, main_model):
+    """
+    The draft model for 'direction' if one is trained, isn't the model already serving the
+    direction, and shares 'main_model's vocabulary; else None.
+    """
+    draft_path = DRAFT_MODEL_PATHS.get(direction)
+    direction_str = f"{direction[0]} -> {direction[1]}"
+    if not draft_path or not os.path.isdir(os.path.join(SCRIPTS_DIR, draft_path)):
+        print(f"({direction_str}) No draft model at '{draft_path}'; assisted generation off for this direction.")
+        return None
+    if _serves_draft_path(direction, draft_path):
+        # Drafting with the serving model itself doubles the work and accepts every token
+        print(f"({direction_str}) The draft model '{draft_path}' is the serving model ({TRANSLATOR_BACKEND} backend); "
+              f"assisted generation off for this direction.")
+        return None
+    draft, _ = _load_model_and_tokenizer(draft_path, direction_key_for_logging=f"{direction_str} draft")
+    if draft is None:
+        return None
+    if draft.config.vocab_size != main_model.config.vocab_size:
+        print(f"({direction_str}) WARNING: Draft vocabulary ({draft.config.vocab_size}) differs from the main model's "
+              f"({main_model.config.vocab_size}); assisted generation off for this direction.")
+        return None
+    draft.to(main_model.device)
+    return draft
+
+
+def load_draft_model(direction, main_model):
+    """Loads the draft model for 'direction' into LOADED_DRAFT_MODELS (see _load_draft). Returns the draft or None."""
+    draft = _load_draft(direction, main_model)
+    if draft is not None:
+        LOADED_DRAFT_MODELS[direction] = (main_model, draft)
+    return draft
+
+
+def load_draft_models():
+    print("\n--- Loading draft models for assisted generation ---")
+    for direction, (model, _) in LOADED_MODELS.items():
+        load_draft_model(direction, model)
+    if LOADED_DRAFT_MODELS:
+        print(f"Assisted generation enabled for: {', '.join(f'{s}->{t}' for s, t in LOADED_DRAFT_MODELS)}")
+
+
+# --- Hot Reload ---
+# reload_models() loads new checkpoints next to the serving ones, warms them up and then
+# swaps them into LOADED_MODELS one direction at a time. translate() looks its model up once
+# per call, so requests already running finish on the old model, which is freed afterwards.
+_RELOAD_LOCK = threading.Lock()
+CHECKPOINT_FILES = ("config.json", "model.safetensors", "pytorch_model.bin", "tokenizer_config.json")
+
+
+def model_fingerprint(model_path_or_hub_id):
+    """
+    (path, ((file, size, mtime), ...)) for the checkpoint files of a local model directory
+    (no files for a Hub ID). A changed fingerprint means a different or new checkpoint.
+    """
+    if not is_local_path(model_path_or_hub_id):
+        return (model_path_or_hub_id, ())
+    model_dir = os.path.abspath(os.path.join(SCRIPTS_DIR, model_path_or_hub_id))
+    fingerprint = []
+    for name in CHECKPOINT_FILES:
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            fingerprint.append((name, stat.st_size, stat.st_mtime_ns))
+    return (model_path_or_hub_id, tuple(fingerprint))
+
+
+def add_reload_listener(listener):
+    """Registers listener(directions) to be called after reload_models() swaps models in."""
+    _RELOAD_LISTENERS.append(listener)
+
+
+def _warm_up(model, tokenizer):
+    """One short generation so the first real request doesn't pay for lazy initialisation."""
+    inputs = tokenizer("warm up", return_tensors="pt")
+    inputs = {k: v.to(model.device) for k, v in inputs.items()}
+    with torch.no_grad():
+        model.generate(**inputs, max_length=8, num_beams=1)
+
+
+def reload_models(directions=None, only_changed=False):
+    """
+    Reloads the models for 'directions' (default: every configured direction) without
+    taking the service down. With only_changed=True, directions whose local checkpoint
+    files haven't changed since they were loaded are skipped (used by the file watcher).
+    A direction whose new model fails to load or warm up keeps serving the old one.
+    Returns a report: {"directions": {"<src> -> <tgt>": {"status", "load_ms", "warmup_ms"}}, "total_ms"}.
+    """
+    start = time.perf_counter()
+    report = {"directions": {}}
+    try:
+        model_paths = resolve_model_paths(TRANSLATOR_BACKEND)
+    except ValueError:
+        model_paths = MODEL_PATHS
+    with _RELOAD_LOCK:
+        swapped = []
+        for direction in directions or list(model_paths):
+            direction_str = f"{direction[0]} -> {direction[1]}"
+            path = model_paths.get(direction)
+            if path is None:
+                report["directions"][direction_str] = {"status": "unknown direction"}
+                continue
+            fingerprint = model_fingerprint(path)
+            if only_changed and direction in LOADED_MODELS and fingerprint == LOADED_MODEL_FINGERPRINTS.get(direction):
+                report["directions"][direction_str] = {"status": "unchanged"}
+                continue
+
+            print(f"\n--- Reloading model for {direction_str} from '{path}' ---")
+            stage_start = time.perf_counter()
+            model, tokenizer = _load_model_and_tokenizer(path, direction_key_for_logging=direction_str)
+            result = {"load_ms": round((time.perf_counter() - stage_start) * 1000, 1)}
+            if model is None:
+                result["status"] = "failed (kept the current model)"
+                report["directions"][direction_str] = result
+                continue
+            stage_start = time.perf_counter()
+            try:
+                _warm_up(model, tokenizer)
+            except Exception as e:
+                print(f"--- ERROR warming up the new model for {direction_str}: {e} ---")
+                print(traceback.format_exc())
+                result["status"] = "failed warm-up (kept the current model)"
+                report["directions"][direction_str] = result
+                continue
+            result["warmup_ms"] = round((time.perf_counter() - stage_start) * 1000, 1)
+            draft = _load_draft(direction, model) if TRANSLATOR_ASSISTED else None
+
+            # Swap: each assignment is atomic. A draft is stored with the model it was checked
+            # against, and translate() only uses it with that model, so a request that read the
+            # old model never pairs it with the new draft (or the other way round)
+            LOADED_DRAFT_MODELS.pop(direction, None)
+            LOADED_MODELS[direction] = (model, tokenizer)
+            LOADED_MODEL_FINGERPRINTS[direction] = fingerprint
+            if draft is not None:
+                LOADED_DRAFT_MODELS[direction] = (model, draft)
+            result["status"] = "swapped"
+            report["directions"][direction_str] = result
+            swapped.append(direction)
+            print(f"--- Swapped in new model for {direction_str} (load {result['load_ms']} ms, warm-up {result['warmup_ms']} ms) ---")
+
+        if swapped:
+            for listener in _RELOAD_LISTENERS:
+                try:
+                    listener(swapped)
+                except Exception as e:
+                    print(f"--- ERROR in reload listener {listener}: {e} ---")
+    report["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return report
+
+
+# --- Precomputed Translation Table ---
+_TABLE_STATE = {"table": None, "identity": None, "checked_at": float("-inf")}
+
+
+def _current_table():
+    """The mapped translation table, reopened when the file has been rebuilt (checked every few seconds)."""
+    if TranslationTable is None:
+        return None
+    now = time.monotonic()
+    if now - _TABLE_STATE["checked_at"] >= TABLE_CHECK_INTERVAL_SECONDS:
+        _TABLE_STATE["checked_at"] = now
+        try:
+            stat = os.stat(TRANSLATION_TABLE_PATH)
+            identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            identity = None
+        if identity != _TABLE_STATE["identity"]:
+            # The old mapping is closed once no running lookup references it
+            _TABLE_STATE["table"] = TranslationTable.open(TRANSLATION_TABLE_PATH) if identity else None
+            _TABLE_STATE["identity"] = identity
+            if _TABLE_STATE["table"] is not None:
+                print(f"Opened translation table '{TRANSLATION_TABLE_PATH}' ({_TABLE_STATE['table'].count} entries).")
+    return _TABLE_STATE["table"]
+
+
+def lookup_precomputed(direction, text):
+    """
+    The precomputed translation of 'text', or None. Entries only count if they were built
+    by the model now serving the direction, so a hot reload (or a new backend) invalidates
+    that direction's entries until the table is rebuilt.
+    """
+    table = _current_table()
+    if table is None:
+        return None
+    built_with = table.meta.get("directions", {}).get(f"{direction[0]}:{direction[1]}")
+    if built_with is None or json.dumps(built_with) != json.dumps(LOADED_MODEL_FINGERPRINTS.get(direction)):
+        return None
+    return table.lookup(direction[0], direction[1], text)
+
+
 # --- Main Translation Function --- (This should remain largely unchanged from your working version)
-def translate(text: str, source_lang: str, target_lang: str) -> str:
+def _time_left(deadline):
+    """Seconds left before a time.monotonic() deadline, or None when there is no deadline."""
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def translate(text: str, source_lang: str, target_lang: str, assisted: bool = None, deadline: float = None) -> str:
+    """
+    Translates 'text'. 'assisted' overrides TRANSLATOR_ASSISTED for this call; assisted
+    generation only happens when a draft model is loaded for the direction.
+    'deadline' (a time.monotonic() value) caps generation time; when it passes, generation
+    stops and a DEADLINE_ERROR string is returned instead of a truncated translation.
+    """
     direction = (source_lang, target_lang)
     print(f"\n--- Attempting translation: {source_lang} -> {target_lang} ---")
 
@@ -139,10 +371,21 @@ def translate(text: str, source_lang: str, target_lang: str) -> str:
         return error_msg
 
     model, tokenizer = LOADED_MODELS[direction]
+    # Read once: a concurrent reload may replace or remove the entry
+    draft_entry = LOADED_DRAFT_MODELS.get(direction)
+    draft = draft_entry[1] if draft_entry is not None and draft_entry[0] is model else None
 
     if not cleaned_text:
         print("--- Input text is empty or invalid. Returning empty string. ---")
         return ""
+    precomputed = lookup_precomputed(direction, cleaned_text)
+    if precomputed is not None:
+        print(f"--- Precomputed translation found for {direction}. Returning: '{precomputed}'")
+        return precomputed
+    time_left = _time_left(deadline)
+    if time_left is not None and time_left <= 0:
+        print(f"--- Deadline passed before translation started for {direction}; skipping. ---")
+        return f"{DEADLINE_ERROR} before translation started."
     try:
         print(f"--- Using model for {direction}...")
         
@@ -157,14 +400,33 @@ def translate(text: str, source_lang: str, target_lang: str) -> str:
         print(f"--- Input tensors moved to device: {device} ---")
         print(f"--- Calling model.generate...")
         
+        use_assisted = (TRANSLATOR_ASSISTED if assisted is None else assisted) and draft is not None
+        # max_time makes generate() stop once the request's deadline has passed
+        deadline_kwargs = {} if deadline is None else {"max_time": max(_time_left(deadline), 0.001)}
         with torch.no_grad():
-            translated_ids = model.generate(
-                inputs['input_ids'],
-                attention_mask=inputs['attention_mask'],
-                max_length=128,
-                num_beams=4,
-                early_stopping=True
-            )
+            if use_assisted:
+                print(f"--- Using assisted generation (greedy, draft model proposes tokens)...")
+                translated_ids = model.generate(
+                    inputs['input_ids'],
+                    attention_mask=inputs['attention_mask'],
+                    max_length=128,
+                    num_beams=1,
+                    do_sample=False,
+                    assistant_model=draft,
+                    **deadline_kwargs,
+                )
+            else:
+                translated_ids = model.generate(
+                    inputs['input_ids'],
+                    attention_mask=inputs['attention_mask'],
+                    max_length=128,
+                    num_beams=4,
+                    early_stopping=True,
+                    **deadline_kwargs,
+                )
+        if deadline is not None and _time_left(deadline) <= 0:
+            print(f"--- Deadline passed during generation for {direction}; discarding partial output. ---")
+            return f"{DEADLINE_ERROR} during translation."
         print(f"--- Decoding model output...")
         translation = tokenizer.decode(translated_ids[0], skip_special_tokens=True)
         
@@ -188,9 +450,106 @@ def translate(text: str, source_lang: str, target_lang: str) -> str:
         return f"Error: Translation failed internally for direction {direction}."
 
 
+# --- Streaming Translation ---
+class _StopWhenSet(StoppingCriteria):
+    """Stops generation once 'event' is set (e.g. the streaming client went away)."""
+
+    def __init__(self, event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return self.event.is_set()
+
+
+def translate_stream(text: str, source_lang: str, target_lang: str, deadline: float = None):
+    """
+    Streaming variant of translate(). Decodes greedily (token streaming can't be combined
+    with beam search) in a background thread and yields events as text is produced:
+      {"event": "delta", "text": "<new text>"} ... then
+      {"event": "done", "translation": "<full text>"}, or {"event": "error", "error": "Error: ..."}
+    A 'deadline' that passes mid-stream ends it with a DEADLINE_ERROR error event.
+    """
+    direction = (source_lang, target_lang)
+    print(f"\n--- Attempting streaming translation: {source_lang} -> {target_lang} ---")
+    cleaned_text = text.strip() if isinstance(text, str) else ""
+
+    if direction not in LOADED_MODELS:
+        error_msg = f"Error: Translation direction ({source_lang} -> {target_lang}) not supported or its model failed to load."
+        print(f"--- ERROR: {error_msg} ---")
+        yield {"event": "error", "error": error_msg}
+        return
+    if not cleaned_text:
+        yield {"event": "done", "translation": ""}
+        return
+    precomputed = lookup_precomputed(direction, cleaned_text)
+    if precomputed is not None:
+        yield {"event": "delta", "text": precomputed}
+        yield {"event": "done", "translation": precomputed}
+        return
+
+    time_left = _time_left(deadline)
+    if time_left is not None and time_left <= 0:
+        yield {"event": "error", "error": f"{DEADLINE_ERROR} before translation started."}
+        return
+
+    model, tokenizer = LOADED_MODELS[direction]
+    inputs = tokenizer(cleaned_text, return_tensors="pt", truncation=True, max_length=128)
+    inputs = {k: v.to(model.device) for k, v in inputs.items()}
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=STREAM_TOKEN_TIMEOUT_SECONDS)
+    stop_event = threading.Event()
+    failures = []
+
+    def run_generate():
+        try:
+            with torch.no_grad():
+                model.generate(
+                    **inputs,
+                    max_length=128,
+                    num_beams=1,
+                    do_sample=False,
+                    streamer=streamer,
+                    stopping_criteria=StoppingCriteriaList([_StopWhenSet(stop_event)]),
+                    **({} if deadline is None else {"max_time": max(_time_left(deadline), 0.001)}),
+                )
+        except Exception as e:
+            print(f"--- ERROR during streaming inference for {direction} with input '{text}': {e}")
+            print(traceback.format_exc())
+            failures.append(e)
+            streamer.end() # Unblocks the consumer below
+
+    thread = threading.Thread(target=run_generate, name=f"translate-stream-{source_lang}-{target_lang}", daemon=True)
+    thread.start()
+    pieces = []
+    try:
+        for piece in streamer:
+            if piece:
+                pieces.append(piece)
+                yield {"event": "delta", "text": piece}
+    except queue.Empty:
+        failures.append(TimeoutError("No output from the model within the stream timeout"))
+    finally:
+        # Also reached when the consumer stops early (client disconnected): stop generating
+        stop_event.set()
+
+    if failures:
+        yield {"event": "error", "error": f"Error: Translation failed internally for direction {direction}."}
+        return
+    if deadline is not None and _time_left(deadline) <= 0:
+        yield {"event": "error", "error": f"{DEADLINE_ERROR} during translation."}
+        return
+    translation = "".join(pieces).strip()
+    print(f"--- Streaming inference successful for {direction}. Returning: '{translation}'")
+    yield {"event": "done", "translation": translation}
+
+
 # --- Trigger Model Loading on Import ---
+# Set TRANSLATOR_AUTOLOAD=0 to import this module without loading every model
+# (offline tools that load only what they need, benchmarks that don't translate).
 if __name__ != '__main__':
-    load_all_models()
+    if os.environ.get("TRANSLATOR_AUTOLOAD", "1") != "0":
+        load_all_models()
+    else:
+        print("TRANSLATOR_AUTOLOAD=0: skipping model loading on import.")
 else:
     print("Running translator.py directly (for testing purposes only).")
     if not LOADED_MODELS:
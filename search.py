@@ -0,0 +1,251 @@
+# search.py
+# Full-text search index over the 'phrases' table.
+#
+# The index lives in a side table, 'phrases_search', holding normalised copies of the
+# three text columns keyed by PhraseID:
+#   - SQLite:   an FTS5 virtual table with the trigram tokenizer (ranked with bm25()).
+#   - Postgres: a regular table with pg_trgm GIN indexes (ranked with similarity()).
+# ORM inserts/updates/deletes of Phrase keep it in sync through mapper events, so the
+# POST/DELETE /phrases routes need no extra code. Bulk Core writes (e.g. the importer)
+# should call index_phrases() for the rows they touch, or rebuild_search_index().
+
+import sys
+import time
+from sqlalchemy import event, inspect, text
+
+from config import db
+from models import Phrase
+from utils.text_normalize import normalize_text
+
+SEARCH_TABLE = "phrases_search"
+
+# Maps the public 'lang' values to the index columns and Phrase attributes
+SEARCH_COLUMNS = {
+    "sylheti": "SylhetiText",
+    "bengali": "BengaliText",
+    "english": "EnglishText",
+}
+
+# FTS5's trigram tokenizer cannot match terms shorter than this
+_TRIGRAM_MIN_CHARS = 3
+
+# Engine URLs whose index table exists. Only a positive result is cached: a missing table
+# is looked for again (at most every INDEX_RECHECK_SECONDS), so an index created by
+# init_db.py while the app is running is picked up without a restart.
+_INDEX_READY = {}
+_INDEX_MISSING_CHECKED_AT = {}
+INDEX_RECHECK_SECONDS = 5.0
+
+
+# --- Index creation ---
+def ensure_search_index():
+    """
+    Creates the search table and its indexes for the current database if missing, and
+    backfills it when it doesn't hold every phrase (a new index on an existing database,
+    or phrases written while the index was missing).
+    """
+    if not _create_search_table():
+        return
+    indexed = db.session.execute(text(f"SELECT COUNT(*) FROM {SEARCH_TABLE}")).scalar()
+    phrases = db.session.execute(db.select(db.func.count()).select_from(Phrase)).scalar()
+    db.session.commit()
+    if indexed != phrases:
+        print(f"--- search.py: '{SEARCH_TABLE}' holds {indexed} of {phrases} phrases; rebuilding ---")
+        _populate_search_index()
+
+
+def _create_search_table():
+    """Creates the search table and its indexes if missing. False when the database has no index support."""
+    engine = db.engine
+    print(f"--- search.py: ensuring '{SEARCH_TABLE}' exists ({engine.dialect.name}) ---")
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+                f"USING fts5(sylheti, bengali, english, tokenize='trigram')"
+            ))
+        elif engine.dialect.name == "postgresql":
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                f'CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ('
+                f'phrase_id INTEGER PRIMARY KEY REFERENCES phrases("PhraseID") ON DELETE CASCADE, '
+                f'sylheti TEXT, bengali TEXT, english TEXT)'
+            ))
+            for column in SEARCH_COLUMNS:
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_{column}_trgm "
+                    f"ON {SEARCH_TABLE} USING gin ({column} gin_trgm_ops)"
+                ))
+        else:
+            print(f"--- search.py: WARNING: no search index support for '{engine.dialect.name}'; "
+                  f"/phrases/search will fall back to a table scan ---")
+            return False
+    _INDEX_READY[str(engine.url)] = True
+    return True
+
+
+def rebuild_search_index(batch_size=5000):
+    """Re-populates the search table from 'phrases' (after bulk imports or on existing databases)."""
+    if not _create_search_table():
+        return 0
+    return _populate_search_index(batch_size)
+
+
+def _populate_search_index(batch_size=5000):
+    conn = db.session.connection()
+    conn.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    total = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(Phrase.PhraseID, Phrase.SylhetiText, Phrase.BengaliText, Phrase.EnglishText)
+            .where(Phrase.PhraseID > last_id).order_by(Phrase.PhraseID).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        _insert_rows(conn, [_index_params(*row) for row in rows])
+        total += len(rows)
+        last_id = rows[-1].PhraseID
+    db.session.commit()
+    print(f"--- search.py: indexed {total} phrases ---")
+    return total
+
+
+def _index_ready(connection):
+    key = str(connection.engine.url)
+    if key in _INDEX_READY:
+        return True
+    now = time.monotonic()
+    if now - _INDEX_MISSING_CHECKED_AT.get(key, float("-inf")) < INDEX_RECHECK_SECONDS:
+        return False
+    if inspect(connection).has_table(SEARCH_TABLE):
+        _INDEX_READY[key] = True
+        _INDEX_MISSING_CHECKED_AT.pop(key, None)
+        return True
+    _INDEX_MISSING_CHECKED_AT[key] = now
+    return False
+
+
+# --- Index maintenance ---
+def _index_params(phrase_id, sylheti, bengali, english):
+    return {
+        "id": phrase_id,
+        "sylheti": normalize_text(sylheti),
+        "bengali": normalize_text(bengali),
+        "english": normalize_text(english),
+    }
+
+
+def _insert_rows(connection, params):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, sylheti, bengali, english) "
+            f"VALUES (:id, :sylheti, :bengali, :english)"
+        ), params)
+    else:
+        connection.execute(text(
+            f"INSERT INTO {SEARCH_TABLE} (phrase_id, sylheti, bengali, english) "
+            f"VALUES (:id, :sylheti, :bengali, :english) "
+            f"ON CONFLICT (phrase_id) DO UPDATE SET "
+            f"sylheti = EXCLUDED.sylheti, bengali = EXCLUDED.bengali, english = EXCLUDED.english"
+        ), params)
+
+
+def _delete_row(connection, phrase_id):
+    id_column = "rowid" if connection.dialect.name == "sqlite" else "phrase_id"
+    connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE {id_column} = :id"), {"id": phrase_id})
+
+
+def index_phrases(connection, phrases, replace=True):
+    """
+    Adds or replaces index rows for (PhraseID, SylhetiText, BengaliText, EnglishText) tuples.
+    For bulk Core writes that bypass the ORM mapper events below. Pass replace=False
+    for freshly inserted phrases to skip clearing old rows.
+    """
+    if not phrases or not _index_ready(connection):
+        return
+    if replace and connection.dialect.name == "sqlite":
+        # FTS5 has no upsert; replace the rows
+        connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :id"), [{"id": p[0]} for p in phrases])
+    _insert_rows(connection, [_index_params(*p) for p in phrases])
+
+
+@event.listens_for(Phrase, "after_insert")
+@event.listens_for(Phrase, "after_update")
+def _index_phrase(mapper, connection, target):
+    index_phrases(connection, [(target.PhraseID, target.SylhetiText, target.BengaliText, target.EnglishText)])
+
+
+@event.listens_for(Phrase, "after_delete")
+def _unindex_phrase(mapper, connection, target):
+    if _index_ready(connection):
+        _delete_row(connection, target.PhraseID)
+
+
+# --- Querying ---
+def _fts5_match_expression(terms, column):
+    """Builds an FTS5 MATCH string: every term must appear (as a substring) in the column(s)."""
+    quoted = " AND ".join('"' + term.replace('"', '""') + '"' for term in terms)
+    return f"{column} : ({quoted})" if column else quoted
+
+
+def search_phrases(query, lang=None, limit=20):
+    """
+    Ranked substring/fuzzy search over the phrase book.
+    Returns a list of (PhraseID, score) tuples, best match first. Scores are only
+    comparable within one result list (bm25 on SQLite, trigram similarity on Postgres).
+    """
+    normalized_query = normalize_text(query)
+    if not normalized_query:
+        return []
+    columns = [lang] if lang else list(SEARCH_COLUMNS)
+    conn = db.session.connection()
+    params = {"limit": limit}
+
+    if not _index_ready(conn):
+        # No index table (e.g. not created yet): plain scan over the raw columns
+        conditions = db.or_(*[getattr(Phrase, SEARCH_COLUMNS[c]).icontains(query.strip(), autoescape=True) for c in columns])
+        rows = db.session.execute(db.select(Phrase.PhraseID).where(conditions).order_by(Phrase.PhraseID).limit(limit)).all()
+        return [(row.PhraseID, 0.0) for row in rows]
+
+    terms = normalized_query.split()
+    if conn.dialect.name == "sqlite":
+        if all(len(term) >= _TRIGRAM_MIN_CHARS for term in terms):
+            params["match"] = _fts5_match_expression(terms, lang)
+            # bm25() is lower-is-better; negate so larger scores are better on every backend
+            sql = (f"SELECT rowid AS phrase_id, -bm25({SEARCH_TABLE}) AS score FROM {SEARCH_TABLE} "
+                   f"WHERE {SEARCH_TABLE} MATCH :match ORDER BY bm25({SEARCH_TABLE}) LIMIT :limit")
+        else:
+            # Short terms: LIKE scan over the normalised index, shortest text first.
+            # The unary '+' stops FTS5 from routing short patterns to the trigram
+            # index, which cannot match them and would return no rows.
+            like_clauses = []
+            for i, term in enumerate(terms):
+                params[f"t{i}"] = f"%{term}%"
+                like_clauses.append("(" + " OR ".join(f"+{c} LIKE :t{i}" for c in columns) + ")")
+            lengths = " + ".join(f"length({c})" for c in columns)
+            sql = (f"SELECT rowid AS phrase_id, -({lengths}) AS score FROM {SEARCH_TABLE} "
+                   f"WHERE {' AND '.join(like_clauses)} ORDER BY score DESC LIMIT :limit")
+    else:
+        params["q"] = normalized_query
+        like_clauses = []
+        for i, term in enumerate(terms):
+            params[f"t{i}"] = f"%{term}%"
+            like_clauses.append("(" + " OR ".join(f"{c} LIKE :t{i}" for c in columns) + ")")
+        fuzzy_clause = " OR ".join(f"{c} % :q" for c in columns)
+        score = f"GREATEST({', '.join(f'similarity({c}, :q)' for c in columns)})" if len(columns) > 1 else f"similarity({columns[0]}, :q)"
+        sql = (f"SELECT phrase_id, {score} AS score FROM {SEARCH_TABLE} "
+               f"WHERE ({' AND '.join(like_clauses)}) OR {fuzzy_clause} ORDER BY score DESC LIMIT :limit")
+
+    return [(row.phrase_id, float(row.score)) for row in conn.execute(text(sql), params)]
+
+
+# Script Execution Block
+if __name__ == "__main__":
+    from config import app
+    with app.app_context():
+        if "--rebuild" in sys.argv:
+            rebuild_search_index()
+        else:
+            ensure_search_index()
+            print("Run 'python search.py --rebuild' to (re)index existing phrases.")
@@ -26,8 +26,11 @@ document.addEventListener('DOMContentLoaded', () => {
     const sourceCharCount = document.getElementById('sourceCharCount');
     const targetCharCount = document.getElementById('targetCharCount');
 
-    // Store all phrases for search functionality
-    let allPhrases = [];
+    // Phrase book paging state (the server filters and paginates; see GET /phrases)
+    const PHRASE_PAGE_SIZE = 200;
+    let phraseQuery = '';
+    let phraseNextCursor = null;
+    let isLoadingPhrases = false;
     let translationTimeout = null;
     let translationHistory = JSON.parse(localStorage.getItem('translationHistory') || '[]');
     let isListening = false;
@@ -180,10 +183,23 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     // --- Function to load phrases into the table ---
-    async function loadPhrases() {
+    // Loads one page of phrases; pass append=true to add the next page below the current rows.
+    async function loadPhrases(append = false) {
+        if (isLoadingPhrases) return;
         console.log("Loading phrases...");
+        isLoadingPhrases = true;
+
+        const params = new URLSearchParams({ limit: PHRASE_PAGE_SIZE });
+        if (append && phraseNextCursor !== null) {
+            params.set('after_id', phraseNextCursor);
+        }
+        if (phraseQuery) {
+            params.set('q', phraseQuery);
+            params.set('match', 'contains');
+        }
+
         try {
-            const response = await fetch('/phrases');
+            const response = await fetch(`/phrases?${params.toString()}`);
             if (!response.ok) {
                 console.error("Failed to load phrases:", response.status);
                 phraseTableBody.innerHTML = '<tr><td colspan="4" class="text-danger">Could not load phrases.</td></tr>';
@@ -191,14 +207,16 @@ document.addEventListener('DOMContentLoaded', () => {
             }
             
             const data = await response.json();
+            const nextCursor = response.headers.get('X-Next-Cursor');
+            phraseNextCursor = nextCursor !== null ? nextCursor : null;
             
             // Check if data is an array and has items
             if (Array.isArray(data)) {
-                allPhrases = data;
-                if (data.length === 0) {
-                    phraseTableBody.innerHTML = '<tr><td colspan="4" class="text-center">No phrases available in the database.</td></tr>';
+                if (!append && data.length === 0) {
+                    const message = phraseQuery ? 'No phrases found.' : 'No phrases available in the database.';
+                    phraseTableBody.innerHTML = `<tr><td colspan="4" class="text-center">${message}</td></tr>`;
                 } else {
-                    displayPhrases(allPhrases);
+                    displayPhrases(data, append);
                 }
             } else {
                 console.error("Invalid data format received:", data);
@@ -208,14 +226,29 @@ document.addEventListener('DOMContentLoaded', () => {
         } catch (error) {
             console.error("Error loading phrases:", error);
             phraseTableBody.innerHTML = '<tr><td colspan="4" class="text-center text-danger">Error connecting to server. Please try refreshing the page.</td></tr>';
+        } finally {
+            isLoadingPhrases = false;
         }
     }
+
+    // Load the next page when the phrase table is scrolled near the bottom
+    const phraseTableContainer = phraseTableBody ? phraseTableBody.closest('.card-body') : null;
+    if (phraseTableContainer) {
+        phraseTableContainer.addEventListener('scroll', () => {
+            const nearBottom = phraseTableContainer.scrollTop + phraseTableContainer.clientHeight >= phraseTableContainer.scrollHeight - 50;
+            if (nearBottom && phraseNextCursor !== null) {
+                loadPhrases(true);
+            }
+        });
+    }
     
     // Function to display phrases in the table
-    function displayPhrases(phrases) {
-        phraseTableBody.innerHTML = ''; // Clear previous entries
+    function displayPhrases(phrases, append = false) {
+        if (!append) {
+            phraseTableBody.innerHTML = ''; // Clear previous entries
+        }
 
-        if (!Array.isArray(phrases) || phrases.length === 0) {
+        if (!append && (!Array.isArray(phrases) || phrases.length === 0)) {
             phraseTableBody.innerHTML = '<tr><td colspan="4" class="text-center">No phrases found.</td></tr>';
             return;
         }
@@ -276,20 +309,28 @@ document.addEventListener('DOMContentLoaded', () => {
     }
     
     // --- Search Phrases ---
-    function searchPhrases(query) {
-        if (!query.trim()) {
-            displayPhrases(allPhrases);
+    // Uses the ranked server-side search; an empty query goes back to the paged listing.
+    async function searchPhrases(query) {
+        phraseQuery = query.trim();
+        phraseNextCursor = null;
+        if (!phraseQuery) {
+            loadPhrases(false);
             return;
         }
-        
-        query = query.toLowerCase();
-        const filteredPhrases = allPhrases.filter(phrase => 
-            phrase.SylhetiText.toLowerCase().includes(query) ||
-            phrase.BengaliText.toLowerCase().includes(query) ||
-            phrase.EnglishText.toLowerCase().includes(query)
-        );
-        
-        displayPhrases(filteredPhrases);
+
+        try {
+            const params = new URLSearchParams({ q: phraseQuery, limit: 100 });
+            const response = await fetch(`/phrases/search?${params.toString()}`);
+            if (!response.ok) {
+                console.error("Phrase search failed:", response.status);
+                phraseTableBody.innerHTML = '<tr><td colspan="4" class="text-danger">Could not search phrases.</td></tr>';
+                return;
+            }
+            displayPhrases(await response.json());
+        } catch (error) {
+            console.error("Error searching phrases:", error);
+            phraseTableBody.innerHTML = '<tr><td colspan="4" class="text-center text-danger">Error connecting to server. Please try again.</td></tr>';
+        }
     }
     
     if (phraseSearchBtn) {
@@ -320,7 +361,12 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     // Modify handleTranslate to accept a parameter for showing loading UI
+    let translateRequestSeq = 0;
+
     async function handleTranslate(showLoadingUI = true) {
+        // Live translation can start a new request before the previous one has finished;
+        // only the latest request is allowed to write to the target box.
+        const requestSeq = ++translateRequestSeq;
         const sourceText = sourceTextArea.value;
         const sourceLang = sourceLanguageSelect.value;
         const targetLang = targetLanguageSelect.value;
@@ -349,11 +395,13 @@ document.addEventListener('DOMContentLoaded', () => {
         }
 
         try {
-            const response = await fetch('/translate', {
+            // The server streams Server-Sent Events (delta ... done) so the translation
+            // appears as it is generated instead of all at once at the end.
+            const response = await fetch('/translate_stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
-                    'Accept': 'application/json'
+                    'Accept': 'text/event-stream'
                 },
                 body: JSON.stringify({
                     text: sourceText,
@@ -362,28 +410,68 @@ document.addEventListener('DOMContentLoaded', () => {
                 })
             });
 
-            let responseData;
-            try {
-                responseData = await response.json();
-            } catch (jsonError) {
-                console.error("Failed to parse JSON response:", jsonError);
-                showError(`Server returned non-JSON response (Status: ${response.status}). Check backend logs.`);
-                return;
-            }
-
             if (!response.ok) {
+                let responseData = {};
+                try {
+                    responseData = await response.json();
+                } catch (jsonError) {
+                    console.error("Failed to parse JSON response:", jsonError);
+                }
                 console.error('Translation API Error:', responseData);
                 showError(responseData.error || `Translation failed with status: ${response.status}`);
                 return;
             }
 
-            targetTextArea.value = responseData.translation;
-            updateCharCount(targetTextArea, targetCharCount);
-            targetTextArea.classList.add('highlight-success');
-            setTimeout(() => targetTextArea.classList.remove('highlight-success'), 1000);
-
-            // Add to history
-            addToHistory(sourceText, responseData.translation, sourceLang, targetLang);
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let partial = '';
+            let finished = false;
+
+            while (!finished) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                if (requestSeq !== translateRequestSeq) {
+                    reader.cancel(); // A newer translation superseded this one
+                    return;
+                }
+                buffer += decoder.decode(value, { stream: true });
+
+                let separatorIndex;
+                while ((separatorIndex = buffer.indexOf('\n\n')) >= 0) {
+                    const rawEvent = buffer.slice(0, separatorIndex);
+                    buffer = buffer.slice(separatorIndex + 2);
+
+                    let eventName = 'message';
+                    let data = '';
+                    rawEvent.split('\n').forEach(line => {
+                        if (line.startsWith('event:')) eventName = line.slice(6).trim();
+                        else if (line.startsWith('data:')) data += line.slice(5).trim();
+                    });
+                    if (!data) continue;
+                    const payload = JSON.parse(data);
+
+                    if (eventName === 'delta') {
+                        partial += payload.text;
+                        targetTextArea.value = partial;
+                        updateCharCount(targetTextArea, targetCharCount);
+                    } else if (eventName === 'done') {
+                        console.log('Translation timings (ms):', payload.timings);
+                        targetTextArea.value = payload.translation;
+                        updateCharCount(targetTextArea, targetCharCount);
+                        targetTextArea.classList.add('highlight-success');
+                        setTimeout(() => targetTextArea.classList.remove('highlight-success'), 1000);
+
+                        // Add to history
+                        addToHistory(sourceText, payload.translation, sourceLang, targetLang);
+                        finished = true;
+                    } else if (eventName === 'error') {
+                        console.error('Translation API Error:', payload);
+                        showError(payload.error);
+                        finished = true;
+                    }
+                }
+            }
 
         } catch (error) {
             console.error('Translation request failed:', error);
@@ -467,57 +555,102 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // Applies the detected language to the dropdowns (swapping the target if needed)
+    function applyDetectedLanguage(detectedLanguage) {
+        if (!detectedLanguage) return;
+        console.log(`Detected language: ${detectedLanguage}`);
+        // Update the source language dropdown to match the detected language
+        sourceLanguageSelect.value = detectedLanguage;
+
+        // If the detected language is the same as the target language, swap them
+        if (sourceLanguageSelect.value === targetLanguageSelect.value) {
+            // Find a different language to use as target
+            const availableLanguages = Array.from(targetLanguageSelect.options)
+                .map(option => option.value)
+                .filter(lang => lang !== detectedLanguage);
+
+            if (availableLanguages.length > 0) {
+                targetLanguageSelect.value = availableLanguages[0];
+            }
+        }
+    }
+
     async function sendAudioToBackend(audioBlob) {
         console.log('Sending audio to backend...', audioBlob);
         sourceTextArea.value = 'Transcribing...'; // Provide immediate feedback
 
+        const sourceLangBeforeRecording = sourceLanguageSelect.value;
         const formData = new FormData();
         formData.append('audio_file', audioBlob, 'recording.webm'); // Changed filename extension
-        formData.append('source_language', sourceLanguageSelect.value);
+        formData.append('source_language', sourceLangBeforeRecording);
+        formData.append('target_language', targetLanguageSelect.value);
+        formData.append('stream', '1');
 
         try {
-            const response = await fetch('/stt', {
+            // Transcription and translation happen in one request; the server streams
+            // one JSON object per line so the transcript shows up before the translation.
+            const response = await fetch('/speech_translate', {
                 method: 'POST',
                 body: formData,
             });
 
-            const responseData = await response.json();
-
             if (!response.ok) {
-                console.error('STT API Error:', responseData);
+                const responseData = await response.json();
+                console.error('Speech translation API Error:', responseData);
                 showError(responseData.error || `Speech-to-Text failed with status: ${response.status}`);
                 sourceTextArea.value = ''; // Clear transcription status on error
                 return;
             }
 
-            // Set the transcription text
-            sourceTextArea.value = responseData.transcription;
-            updateCharCount(sourceTextArea, sourceCharCount);
-            
-            // Check if we have detected language information and update the dropdown
-            if (responseData.detected_language) {
-                console.log(`Detected language: ${responseData.detected_language}`);
-                // Update the source language dropdown to match the detected language
-                sourceLanguageSelect.value = responseData.detected_language;
-                
-                // If the detected language is the same as the target language, swap them
-                if (sourceLanguageSelect.value === targetLanguageSelect.value) {
-                    // Find a different language to use as target
-                    const availableLanguages = Array.from(targetLanguageSelect.options)
-                        .map(option => option.value)
-                        .filter(lang => lang !== responseData.detected_language);
-                    
-                    if (availableLanguages.length > 0) {
-                        targetLanguageSelect.value = availableLanguages[0];
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let finished = false;
+
+            while (!finished) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                let newlineIndex;
+                while ((newlineIndex = buffer.indexOf('\n')) >= 0) {
+                    const line = buffer.slice(0, newlineIndex).trim();
+                    buffer = buffer.slice(newlineIndex + 1);
+                    if (!line) continue;
+
+                    const event = JSON.parse(line);
+                    if (event.event === 'transcript') {
+                        // Set the transcription text
+                        sourceTextArea.value = event.transcription;
+                        updateCharCount(sourceTextArea, sourceCharCount);
+                        targetTextArea.value = 'Translating...';
+                    } else if (event.event === 'result') {
+                        console.log('Speech translation timings (ms):', event.timings);
+                        applyDetectedLanguage(event.detected_language);
+                        if (event.translation === null) {
+                            // Detected language matched the target; translate to the swapped target instead
+                            debouncedTranslate();
+                        } else {
+                            targetTextArea.value = event.translation;
+                            updateCharCount(targetTextArea, targetCharCount);
+                            addToHistory(event.transcription, event.translation, event.detected_language, event.target_language);
+                        }
+                        finished = true;
+                    } else if (event.event === 'error') {
+                        console.error('Speech translation error:', event);
+                        showError(event.error);
+                        if (event.stage === 'transcription') {
+                            sourceTextArea.value = ''; // Clear transcription status on error
+                        } else {
+                            targetTextArea.value = '';
+                        }
+                        finished = true;
                     }
                 }
             }
-            
-            // Trigger translation with the new transcription
-            debouncedTranslate();
 
         } catch (error) {
-            console.error('STT request failed:', error);
+            console.error('Speech translation request failed:', error);
             showError('Failed to connect to speech recognition service. Please try again.');
             sourceTextArea.value = ''; // Clear transcription status on error
         }
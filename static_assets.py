@@ -0,0 +1,74 @@
+# static_assets.py
+# URLs and serving for the fingerprinted assets built by scripts/build_assets.py.
+#
+# Templates call asset_url('script.js'). After a build this returns
+# /static/dist/script.<hash>.js (from static/dist/manifest.json); without a build it falls
+# back to the plain /static/ URL, so a fresh checkout still works. A built file's name
+# changes whenever its content does, so send_built_asset() marks it immutable for a year and
+# serves the pre-compressed .br / .gz copy the client accepts.
+# The manifest is re-read when its modification time changes, so a rebuild needs no restart.
+
+import json
+import mimetypes
+import os
+import threading
+
+from flask import abort, request, send_from_directory, url_for
+from werkzeug.security import safe_join
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.json")
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz")) # In order of preference
+
+_manifest = {"mtime_ns": None, "assets": {}}
+_manifest_lock = threading.Lock()
+
+
+def _built_assets():
+    try:
+        mtime_ns = os.stat(MANIFEST_PATH).st_mtime_ns
+    except OSError:
+        return {}
+    if mtime_ns != _manifest["mtime_ns"]:
+        with _manifest_lock:
+            if mtime_ns != _manifest["mtime_ns"]:
+                try:
+                    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+                        assets = json.load(f).get("assets", {})
+                except (OSError, ValueError) as e:
+                    print(f"--- static_assets.py: WARNING: could not read '{MANIFEST_PATH}': {e} ---")
+                    assets = {}
+                _manifest["assets"] = assets
+                _manifest["mtime_ns"] = mtime_ns
+                print(f"--- static_assets.py: loaded {len(assets)} built assets ---")
+    return _manifest["assets"]
+
+
+def asset_url(name):
+    """URL of the built (fingerprinted) copy of static/<name>, or its plain static URL before a build."""
+    built = _built_assets().get(name)
+    if built is None:
+        return url_for("static", filename=name)
+    return url_for("static", filename=built)
+
+
+def send_built_asset(filename):
+    """Serves static/dist/<filename> with immutable caching, pre-compressed when possible."""
+    path = safe_join(DIST_DIR, filename)
+    if path is None or os.path.basename(filename) == "manifest.json" or not os.path.isfile(path):
+        abort(404)
+    served, encoding = filename, None
+    for candidate, suffix in PRECOMPRESSED:
+        if request.accept_encodings[candidate] and os.path.isfile(path + suffix):
+            served, encoding = filename + suffix, candidate
+            break
+
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    response = send_from_directory(DIST_DIR, served, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    response.headers["Cache-Control"] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    response.vary.add("Accept-Encoding")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
@@ -0,0 +1,226 @@
+# sylheti_translator_backend/utils/batching.py
+#
+# Length-bucketed, token-budget batching for scripts/train.py.
+# The corpus is mostly short phrases with the occasional long sentence, so random
+# fixed-size batches pad most items up to a much longer neighbour. Here examples are
+# grouped with others of similar length and each batch is filled up to a token budget
+# (batch_size * longest_item <= max_tokens), so short batches hold many items and long
+# batches hold few.
+
+import math
+import random
+import time
+
+import torch
+from torch.utils.data import DataLoader, Sampler
+from transformers import Seq2SeqTrainer, TrainerCallback
+
+
+def example_lengths(dataset):
+    """Returns (source_lengths, target_lengths) token counts for a tokenized dataset."""
+    source_lengths = [len(ids) for ids in dataset["input_ids"]]
+    target_lengths = [len(ids) for ids in dataset["labels"]] if "labels" in dataset.column_names else [0] * len(source_lengths)
+    return source_lengths, target_lengths
+
+
+class TokenBudgetBatchSampler(Sampler):
+    """
+    Yields lists of indices whose padded size stays within 'max_tokens'.
+
+    The padded size of a batch is len(batch) * max(length) where length is
+    max(source, target) tokens. The batch boundaries are packed once over the
+    length-sorted dataset, so every epoch has the same number of batches (the step
+    count the Trainer plans its schedule with) and the same batch sizes. With
+    shuffle=True, each epoch breaks ties between equal lengths at random, so items of
+    the same length trade places across batches, and then shuffles the batch order.
+    With shuffle=False (evaluation) batches follow the sorted order.
+    """
+
+    def __init__(self, lengths, max_tokens, max_batch_size=None, shuffle=True, seed=42):
+        self.lengths = [max(length, 1) for length in lengths]
+        self.max_tokens = max_tokens
+        self.max_batch_size = max_batch_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+        self._bounds = self._pack(sorted(self.lengths))
+        self._batches = self._build_batches(self.epoch)
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+        self._batches = self._build_batches(epoch)
+
+    def _pack(self, sorted_lengths):
+        """(start, end) positions of each batch in the length-sorted order."""
+        bounds = []
+        start = 0
+        for position, length in enumerate(sorted_lengths):
+            # Sorted, so 'length' is the longest item of the batch being filled
+            size = position - start + 1
+            full = size * length > self.max_tokens or (
+                self.max_batch_size is not None and size > self.max_batch_size)
+            if position > start and full:
+                bounds.append((start, position))
+                start = position
+        if start < len(sorted_lengths):
+            bounds.append((start, len(sorted_lengths)))
+        return bounds
+
+    def _build_batches(self, epoch):
+        if not self.shuffle:
+            order = sorted(range(len(self.lengths)), key=lambda i: self.lengths[i])
+            return [order[start:end] for start, end in self._bounds]
+
+        rng = random.Random(self.seed + epoch)
+        tie_break = [rng.random() for _ in self.lengths]
+        order = sorted(range(len(self.lengths)), key=lambda i: (self.lengths[i], tie_break[i]))
+        batches = [order[start:end] for start, end in self._bounds]
+        rng.shuffle(batches)
+        return batches
+
+    def __iter__(self):
+        batches = self._batches
+        # Prepare a different order for the next pass in case set_epoch() is never called
+        self.epoch += 1
+        self._batches = self._build_batches(self.epoch)
+        return iter(batches)
+
+    def __len__(self):
+        return len(self._bounds)
+
+
+def random_fixed_batches(num_items, batch_size, seed=42):
+    """Index batches as the default Trainer sampler would produce them (shuffled, fixed size)."""
+    indices = list(range(num_items))
+    random.Random(seed).shuffle(indices)
+    return [indices[i:i + batch_size] for i in range(0, num_items, batch_size)]
+
+
+def padding_efficiency(batches, source_lengths, target_lengths):
+    """
+    Fraction of tokens in the padded batches that are real tokens, with source and
+    labels each padded to the longest item in the batch (as DataCollatorForSeq2Seq does).
+    """
+    real = padded = 0
+    for batch in batches:
+        if not batch:
+            continue
+        src = [source_lengths[i] for i in batch]
+        tgt = [target_lengths[i] for i in batch]
+        real += sum(src) + sum(tgt)
+        padded += len(batch) * (max(src) + max(tgt))
+    return real / padded if padded else 1.0
+
+
+def describe_batching(batches, source_lengths, target_lengths):
+    sizes = [len(b) for b in batches] or [0]
+    return (f"{len(batches)} batches, size min/mean/max {min(sizes)}/{sum(sizes) / len(sizes):.1f}/{max(sizes)}, "
+            f"padding efficiency {padding_efficiency(batches, source_lengths, target_lengths):.1%}")
+
+
+class StepTimerCallback(TrainerCallback):
+    """Records wall-clock time per optimizer step so batching modes can be compared."""
+
+    def __init__(self):
+        self.step_seconds = []
+        self._step_start = None
+
+    def on_step_begin(self, args, state, control, **kwargs):
+        self._step_start = time.perf_counter()
+
+    def on_step_end(self, args, state, control, **kwargs):
+        if self._step_start is not None:
+            self.step_seconds.append(time.perf_counter() - self._step_start)
+            self._step_start = None
+
+    def summary(self):
+        return step_time_summary(self.step_seconds)
+
+
+def step_time_summary(step_seconds):
+    """Step count and avg/p50/p90 seconds per step ({} when nothing was timed)."""
+    if not step_seconds:
+        return {}
+    ordered = sorted(step_seconds)
+    return {
+        "steps": len(ordered),
+        "avg_step_seconds": sum(ordered) / len(ordered),
+        "p50_step_seconds": ordered[len(ordered) // 2],
+        "p90_step_seconds": ordered[min(len(ordered) - 1, math.ceil(len(ordered) * 0.9) - 1)],
+    }
+
+
+def time_training_steps(model, dataset, data_collator, batches, steps=20, warmup_steps=2, fp16=False):
+    """
+    Times forward + backward passes over the first 'steps' of 'batches' (after
+    'warmup_steps' untimed ones) and returns step_time_summary(). Gradients are
+    discarded, so the model's weights are unchanged. 'fp16' runs the forward pass under
+    CUDA autocast, as the Trainer does with fp16=True. Used by scripts/train.py to put
+    random fixed batches and token-budget batches side by side before training.
+    """
+    device = next(model.parameters()).device
+    columns = [c for c in ("input_ids", "attention_mask", "labels") if c in dataset.column_names]
+    was_training = model.training
+    model.train()
+    step_seconds = []
+    try:
+        for step, batch in enumerate(batches[:warmup_steps + steps]):
+            features = data_collator([{c: dataset[i][c] for c in columns} for i in batch])
+            features = {k: v.to(device) for k, v in features.items()}
+            if device.type == "cuda":
+                torch.cuda.synchronize()
+            start = time.perf_counter()
+            with torch.autocast("cuda", dtype=torch.float16, enabled=fp16):
+                loss = model(**features).loss
+            loss.backward()
+            if device.type == "cuda":
+                torch.cuda.synchronize()
+            elapsed = time.perf_counter() - start
+            model.zero_grad(set_to_none=True)
+            if step >= warmup_steps:
+                step_seconds.append(elapsed)
+    finally:
+        model.zero_grad(set_to_none=True)
+        model.train(was_training)
+    return step_time_summary(step_seconds)
+
+
+class TokenBudgetSeq2SeqTrainer(Seq2SeqTrainer):
+    """
+    Seq2SeqTrainer whose train and eval dataloaders use TokenBudgetBatchSampler.
+    Evaluation (including predict_with_generate) batches are sorted by length, so
+    generation runs on batches of similar-length inputs.
+    """
+
+    def __init__(self, *args, max_tokens_per_batch, max_batch_size=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.max_batch_size = max_batch_size
+
+    def _token_budget_dataloader(self, dataset, description, shuffle):
+        dataset = self._remove_unused_columns(dataset, description=description)
+        source_lengths, target_lengths = example_lengths(dataset)
+        lengths = [max(s, t) for s, t in zip(source_lengths, target_lengths)]
+        batch_sampler = TokenBudgetBatchSampler(
+            lengths, self.max_tokens_per_batch, max_batch_size=self.max_batch_size,
+            shuffle=shuffle, seed=self.args.seed,
+        )
+        dataloader = DataLoader(
+            dataset,
+            batch_sampler=batch_sampler,
+            collate_fn=self.data_collator,
+            num_workers=self.args.dataloader_num_workers,
+            pin_memory=self.args.dataloader_pin_memory,
+        )
+        return self.accelerator.prepare(dataloader)
+
+    def get_train_dataloader(self):
+        if self.train_dataset is None:
+            raise ValueError("Trainer: training requires a train_dataset.")
+        return self._token_budget_dataloader(self.train_dataset, "training", shuffle=True)
+
+    def get_eval_dataloader(self, eval_dataset=None):
+        eval_dataset = eval_dataset if eval_dataset is not None else self.eval_dataset
+        if eval_dataset is None:
+            raise ValueError("Trainer: evaluation requires an eval_dataset.")
+        return self._token_budget_dataloader(eval_dataset, "evaluation", shuffle=False)
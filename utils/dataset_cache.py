@@ -0,0 +1,152 @@
+# sylheti_translator_backend/utils/dataset_cache.py
+#
+# On-disk cache of tokenized train/eval splits for scripts/train.py.
+# A cache entry is keyed by a hash of everything that affects its contents:
+# the data file's bytes, the tokenizer (class, name and vocabulary), the language
+# pair, the max lengths, the split seed and the split size. On a miss the splits are
+# built with a multi-process datasets.map() and saved with save_to_disk(); on a hit
+# they are memory-mapped back with load_from_disk() and preprocessing is skipped.
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from datasets import load_dataset, load_from_disk, DatasetDict
+
+from utils.preprocess import preprocess_function
+
+CACHE_FORMAT_VERSION = 1
+METADATA_FILE = "cache_metadata.json"
+
+
+def _hash_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _tokenizer_fingerprint(tokenizer):
+    """Identifies a tokenizer by class, name and vocabulary (so a retrained vocab busts the cache)."""
+    digest = hashlib.sha256()
+    digest.update(type(tokenizer).__name__.encode())
+    digest.update(str(getattr(tokenizer, "name_or_path", "")).encode())
+    for token, token_id in sorted(tokenizer.get_vocab().items(), key=lambda item: item[1]):
+        digest.update(f"{token_id}:{token}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def compute_cache_key(data_file, tokenizer, src_lang, tgt_lang, max_input_length, max_target_length, seed, test_split_size):
+    key_material = {
+        "version": CACHE_FORMAT_VERSION,
+        "data_sha256": _hash_file(data_file),
+        "tokenizer": _tokenizer_fingerprint(tokenizer),
+        "src_lang": src_lang,
+        "tgt_lang": tgt_lang,
+        "max_input_length": max_input_length,
+        "max_target_length": max_target_length,
+        "seed": seed,
+        "test_split_size": test_split_size,
+    }
+    return hashlib.sha256(json.dumps(key_material, sort_keys=True).encode()).hexdigest()[:24]
+
+
+def filter_and_split(dataset, src_lang, tgt_lang, seed, test_split_size):
+    """
+    Keeps rows where both languages are present and non-empty, then splits them.
+    Returns (train_dataset, eval_dataset); tiny datasets (< 2 rows) use all data for both.
+    """
+    original_count = len(dataset)
+
+    def filter_row(example):
+        src_ok = example.get(src_lang) is not None and example[src_lang] != ""
+        tgt_ok = example.get(tgt_lang) is not None and example[tgt_lang] != ""
+        return src_ok and tgt_ok
+
+    dataset = dataset.filter(filter_row)
+    filtered_count = len(dataset)
+    print(f"Filtered dataset size: {filtered_count} (Removed {original_count - filtered_count} rows with missing data for this pair)")
+
+    if filtered_count == 0:
+        raise ValueError(f"No valid data found for the pair {src_lang} -> {tgt_lang} after filtering.")
+    if filtered_count < 2: # Need at least 2 samples to split
+        print("Warning: Dataset too small to split. Using all data for training and evaluation (not recommended).")
+        return dataset, dataset
+    split_dataset = dataset.train_test_split(test_size=test_split_size, seed=seed)
+    return split_dataset["train"], split_dataset["test"]
+
+
+def load_or_build_tokenized_splits(data_file, tokenizer, src_lang, tgt_lang, max_input_length, max_target_length,
+                                   seed, test_split_size, cache_dir, num_proc=None, use_cache=True, raw_dataset=None):
+    """
+    Returns (tokenized_train, tokenized_eval, info) for one language pair.
+    'info' has 'cache_hit', 'cache_path' and 'seconds' (time spent here), plus
+    'build_seconds' (how long preprocessing took when the entry was built).
+    'raw_dataset' lets a caller that already loaded the corpus skip re-reading it.
+    """
+    start = time.perf_counter()
+    cache_key = compute_cache_key(data_file, tokenizer, src_lang, tgt_lang,
+                                  max_input_length, max_target_length, seed, test_split_size)
+    cache_path = os.path.join(cache_dir, f"{src_lang}_{tgt_lang}_{cache_key}")
+    metadata_path = os.path.join(cache_path, METADATA_FILE)
+
+    if use_cache and os.path.exists(metadata_path):
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        splits = load_from_disk(cache_path)
+        elapsed = time.perf_counter() - start
+        print(f"Tokenized dataset cache HIT: {cache_path}")
+        print(f"Loaded in {elapsed:.2f}s; preprocessing originally took {metadata['build_seconds']:.2f}s "
+              f"(saved ~{max(metadata['build_seconds'] - elapsed, 0):.2f}s).")
+        return splits["train"], splits["eval"], {
+            "cache_hit": True, "cache_path": cache_path, "seconds": elapsed, "build_seconds": metadata["build_seconds"],
+        }
+
+    print(f"Tokenized dataset cache MISS for {src_lang} -> {tgt_lang}; building with num_proc={num_proc}...")
+    if raw_dataset is None:
+        raw_dataset = load_dataset("json", data_files=data_file, split="train")
+        print(f"Initial dataset loaded with {len(raw_dataset)} examples.")
+    train_raw, eval_raw = filter_and_split(raw_dataset, src_lang, tgt_lang, seed, test_split_size)
+    print(f"Train samples: {len(train_raw)}, Validation samples: {len(eval_raw)}")
+
+    fn_kwargs = {
+        'src_lang': src_lang,
+        'tgt_lang': tgt_lang,
+        'tokenizer': tokenizer,
+        'max_input_length': max_input_length,
+        'max_target_length': max_target_length,
+    }
+    # Small splits are not worth the worker start-up cost
+    map_procs = num_proc if num_proc and num_proc > 1 and len(train_raw) >= 1000 else None
+    splits = DatasetDict({
+        "train": train_raw.map(preprocess_function, batched=True, remove_columns=train_raw.column_names,
+                               fn_kwargs=fn_kwargs, num_proc=map_procs),
+        "eval": eval_raw.map(preprocess_function, batched=True, remove_columns=eval_raw.column_names,
+                             fn_kwargs=fn_kwargs, num_proc=map_procs),
+    })
+    build_seconds = time.perf_counter() - start
+    print(f"Preprocessing complete in {build_seconds:.2f}s.")
+
+    if use_cache:
+        # Write to a temporary directory first so an interrupted run never leaves a half-written entry
+        tmp_path = cache_path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        splits.save_to_disk(tmp_path)
+        with open(os.path.join(tmp_path, METADATA_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "src_lang": src_lang, "tgt_lang": tgt_lang, "data_file": os.path.abspath(data_file),
+                "train_rows": len(splits["train"]), "eval_rows": len(splits["eval"]),
+                "build_seconds": build_seconds, "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }, f, indent=2)
+        shutil.rmtree(cache_path, ignore_errors=True)
+        os.replace(tmp_path, cache_path)
+        print(f"Saved tokenized splits to cache: {cache_path}")
+        # Reload from disk so the returned datasets are memory-mapped like on a cache hit
+        splits = load_from_disk(cache_path)
+
+    return splits["train"], splits["eval"], {
+        "cache_hit": False, "cache_path": cache_path, "seconds": build_seconds, "build_seconds": build_seconds,
+    }
@@ -0,0 +1,256 @@
+# sylheti_translator_backend/utils/feature_store.py
+#
+# Precomputed Whisper log-mel feature store for scripts/fine_tune_whisper.py.
+#
+# Decoding/resampling the mp3s and computing log-mel features is the dominant cost of a
+# fine-tuning run on CPU, and the result only depends on the audio file and the feature
+# extractor settings. The store keeps those features on disk:
+#
+#   <store_dir>/index.json          path -> shard/row, file mtime/size, transcription and label ids
+#   <store_dir>/shard_00000.npy     float32 array [rows, n_mels, frames], opened with mmap_mode="r"
+#
+# update_feature_store() extracts features only for files that are new or whose mtime/size
+# changed, in a process pool, into new shards; label ids are re-tokenized on every update
+# (cheap) so transcription edits never need re-extraction. FeatureStoreDataset serves rows
+# straight out of the memory-mapped shards.
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+INDEX_FILE = "index.json"
+STORE_FORMAT_VERSION = 1
+SAMPLING_RATE = 16000 # What Whisper expects
+SHARD_ROWS = 256 # ~250 MB per shard for whisper-small (80 x 3000 float32 per row)
+
+_worker_feature_extractor = None
+
+
+# --- Extraction workers ---
+def _init_worker(feature_extractor):
+    global _worker_feature_extractor
+    _worker_feature_extractor = feature_extractor
+
+
+def _load_audio(abs_path):
+    import librosa # Imported in the workers only
+    array, _ = librosa.load(abs_path, sr=SAMPLING_RATE)
+    return array
+
+
+def _extract_features(abs_path):
+    """Returns (features, error) for one audio file; runs in a worker process."""
+    try:
+        array = _load_audio(abs_path)
+        features = _worker_feature_extractor(array, sampling_rate=SAMPLING_RATE, return_tensors="np").input_features[0]
+        return features.astype(np.float32, copy=False), None
+    except Exception as e:
+        return None, str(e)
+
+
+# --- Index ---
+def extractor_fingerprint(feature_extractor):
+    """The feature extractor settings the stored features depend on."""
+    return {
+        "class": type(feature_extractor).__name__,
+        "feature_size": feature_extractor.feature_size,
+        "sampling_rate": feature_extractor.sampling_rate,
+        "n_fft": feature_extractor.n_fft,
+        "hop_length": feature_extractor.hop_length,
+        "nb_max_frames": feature_extractor.nb_max_frames,
+    }
+
+
+def load_index(store_dir):
+    index_path = os.path.join(store_dir, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_index(store_dir, index):
+    tmp_path = os.path.join(store_dir, INDEX_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, os.path.join(store_dir, INDEX_FILE))
+
+
+def _new_index(store_dir, fingerprint):
+    # Start over: remove shards left by a previous layout
+    for name in os.listdir(store_dir):
+        if name.startswith("shard_"):
+            os.remove(os.path.join(store_dir, name))
+    return {"version": STORE_FORMAT_VERSION, "extractor": fingerprint, "next_shard": 0, "shards": {}, "entries": {}}
+
+
+def _write_shard(store_dir, index, rows, shape):
+    """
+    Writes 'rows' (a list of (path, meta, features)) into a new shard file and
+    points their index entries at it. Returns the number of rows written.
+    """
+    shard_name = f"shard_{index['next_shard']:05d}.npy"
+    index["next_shard"] += 1
+    tmp_path = os.path.join(store_dir, shard_name + ".tmp")
+    shard = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(len(rows),) + shape)
+    for row, (_, _, features) in enumerate(rows):
+        shard[row] = features
+    shard.flush()
+    del shard
+    os.replace(tmp_path, os.path.join(store_dir, shard_name))
+
+    index["shards"][shard_name] = {"rows": len(rows)}
+    for row, (path, meta, _) in enumerate(rows):
+        index["entries"][path] = {**meta, "shard": shard_name, "row": row}
+    return len(rows)
+
+
+def _drop_unreferenced_shards(store_dir, index):
+    live_rows = {name: 0 for name in index["shards"]}
+    for entry in index["entries"].values():
+        live_rows[entry["shard"]] += 1
+    for name, count in live_rows.items():
+        if count == 0:
+            os.remove(os.path.join(store_dir, name))
+            del index["shards"][name]
+    return live_rows
+
+
+def compact_store(store_dir, index, shard_rows=SHARD_ROWS):
+    """Copies the live rows into fresh shards (no re-extraction) and deletes the old ones."""
+    shape = (index["extractor"]["feature_size"], index["extractor"]["nb_max_frames"])
+    old_shards = {name: np.load(os.path.join(store_dir, name), mmap_mode="r") for name in index["shards"]}
+    old_names = list(old_shards)
+    paths = sorted(index["entries"])
+    for start in range(0, len(paths), shard_rows):
+        rows = []
+        for path in paths[start:start + shard_rows]:
+            entry = index["entries"][path]
+            meta = {k: v for k, v in entry.items() if k not in ("shard", "row")}
+            rows.append((path, meta, old_shards[entry["shard"]][entry["row"]]))
+        _write_shard(store_dir, index, rows, shape)
+    old_shards.clear()
+    for name in old_names:
+        os.remove(os.path.join(store_dir, name))
+        del index["shards"][name]
+    _save_index(store_dir, index)
+
+
+def update_feature_store(store_dir, records, processor, workers=None, shard_rows=SHARD_ROWS, rebuild=False):
+    """
+    Brings the store in line with 'records', a list of (absolute_audio_path, transcription).
+    Features are extracted only for files that are new or changed; entries for files no
+    longer in 'records' are dropped. Returns the index dict.
+    """
+    start = time.perf_counter()
+    os.makedirs(store_dir, exist_ok=True)
+    feature_extractor = processor.feature_extractor
+    fingerprint = extractor_fingerprint(feature_extractor)
+    shape = (fingerprint["feature_size"], fingerprint["nb_max_frames"])
+
+    index = None if rebuild else load_index(store_dir)
+    if index is not None and (index.get("version") != STORE_FORMAT_VERSION or index.get("extractor") != fingerprint):
+        print("Feature extractor settings changed; rebuilding the feature store.")
+        index = None
+    if index is None:
+        index = _new_index(store_dir, fingerprint)
+    entries = index["entries"]
+
+    transcriptions = dict(records) # Last transcription wins for duplicate paths
+    for path in list(entries):
+        if path not in transcriptions:
+            del entries[path]
+
+    pending = []
+    for path in transcriptions:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            print(f"WARNING: Audio file not found, skipping: {path}")
+            entries.pop(path, None)
+            continue
+        entry = entries.get(path)
+        if entry is None or entry["mtime_ns"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+            pending.append((path, {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}))
+    print(f"Feature store: {len(transcriptions)} files, {len(pending)} new or changed.")
+
+    if pending:
+        workers = workers or os.cpu_count() or 1
+        extract_start = time.perf_counter()
+        extracted = failed = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(feature_extractor,)) as pool:
+            for chunk_start in range(0, len(pending), shard_rows):
+                chunk = pending[chunk_start:chunk_start + shard_rows]
+                rows = []
+                results = pool.map(_extract_features, [path for path, _ in chunk], chunksize=4)
+                for (path, meta), (features, error) in zip(chunk, results):
+                    if error is not None:
+                        print(f"WARNING: Could not extract features for '{path}': {error}")
+                        entries.pop(path, None)
+                        failed += 1
+                        continue
+                    rows.append((path, meta, features))
+                if rows:
+                    extracted += _write_shard(store_dir, index, rows, shape)
+                # Save after every shard so an interrupted run keeps its progress
+                _save_index(store_dir, index)
+                elapsed = time.perf_counter() - extract_start
+                print(f"  {extracted + failed}/{len(pending)} files processed ({extracted / max(elapsed, 1e-9):.1f} files/sec)")
+        print(f"Extracted features for {extracted} files ({failed} failed) with {workers} workers "
+              f"in {time.perf_counter() - extract_start:.2f}s.")
+
+    # Labels are cheap to recompute, so transcription edits don't trigger re-extraction
+    paths = sorted(entries)
+    if paths:
+        label_ids = processor.tokenizer([transcriptions[path] for path in paths]).input_ids
+        for path, labels in zip(paths, label_ids):
+            entries[path]["text"] = transcriptions[path]
+            entries[path]["labels"] = labels
+
+    live_rows = _drop_unreferenced_shards(store_dir, index)
+    stale_rows = sum(index["shards"][name]["rows"] - live_rows[name] for name in index["shards"])
+    _save_index(store_dir, index)
+    if stale_rows > len(entries):
+        print(f"Compacting feature store ({stale_rows} stale rows)...")
+        compact_store(store_dir, index, shard_rows)
+
+    print(f"Feature store ready: {len(entries)} entries in {len(index['shards'])} shards "
+          f"({time.perf_counter() - start:.2f}s).")
+    return index
+
+
+def split_store_paths(index, is_test):
+    """
+    (train_paths, test_paths) of the store's entries, split by 'is_test(path)'. Pass a stable
+    per-path rule (a hash of the path), so adding recordings never moves existing ones between splits.
+    """
+    train_paths, test_paths = [], []
+    for path in sorted(index["entries"]):
+        (test_paths if is_test(path) else train_paths).append(path)
+    return train_paths, test_paths
+
+
+class FeatureStoreDataset:
+    """
+    Map-style dataset over a feature store. 'input_features' is a read-only view into
+    the memory-mapped shard, so nothing is copied until the collator builds the batch.
+    """
+
+    def __init__(self, store_dir, paths=None, index=None):
+        index = index or load_index(store_dir)
+        if index is None:
+            raise FileNotFoundError(f"No feature store index found in {store_dir}")
+        self._shards = {name: np.load(os.path.join(store_dir, name), mmap_mode="r") for name in index["shards"]}
+        entries = index["entries"]
+        self._items = [(entries[path]["shard"], entries[path]["row"], entries[path]["labels"])
+                       for path in (paths if paths is not None else sorted(entries))]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, i):
+        shard_name, row, labels = self._items[i]
+        return {"input_features": self._shards[shard_name][row], "labels": labels}
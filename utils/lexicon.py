@@ -0,0 +1,111 @@
+# sylheti_translator_backend/utils/lexicon.py
+# A phrase-table translator built from the parallel corpus, for when the neural models can't
+# answer (see lexicon_fallback.py). Quality is word-for-word, but a lookup takes microseconds.
+#
+# Phrase pairs come from two places:
+#   - every corpus sentence pair, so corpus sentences come back whole;
+#   - sub-sentence alignments: each source n-gram (n <= 3) is paired with the target n-gram it
+#     co-occurs with most consistently across sentence pairs (Dice coefficient, penalised
+#     for length mismatch), seen together in at least 'min_count' sentences.
+# translate() walks a token trie from left to right, always taking the longest phrase that
+# matches. Unmatched words are copied through as the caller wrote them (case and punctuation
+# kept; Sylheti and Bengali share most vocabulary).
+
+from collections import Counter
+
+from utils.text_normalize import normalize_text
+
+
+def _ngrams(tokens, max_n):
+    return {" ".join(tokens[i:i + n]) for n in range(1, max_n + 1) for i in range(len(tokens) - n + 1)}
+
+
+def align_phrases(pairs, max_ngram=3, min_count=2, min_score=0.5):
+    """
+    {source phrase: target phrase} aligned from tokenised (source_tokens, target_tokens)
+    sentence pairs.
+    """
+    source_counts = Counter()
+    target_counts = Counter()
+    pair_counts = Counter()
+    for source_tokens, target_tokens in pairs:
+        source_grams = _ngrams(source_tokens, max_ngram)
+        target_grams = _ngrams(target_tokens, max_ngram)
+        source_counts.update(source_grams)
+        target_counts.update(target_grams)
+        pair_counts.update((s, t) for s in source_grams for t in target_grams)
+
+    best = {}
+    for (source, target), count in pair_counts.items():
+        if count < min_count:
+            continue
+        dice = 2 * count / (source_counts[source] + target_counts[target])
+        score = dice / (1 + 0.5 * abs(source.count(" ") - target.count(" ")))
+        if score >= min_score and score > best.get(source, (0.0, None))[0]:
+            best[source] = (score, target)
+    return {source: target for source, (_, target) in best.items()}
+
+
+class Lexicon:
+    """Longest-match phrase translation over a token trie."""
+
+    def __init__(self):
+        self._root = {}
+        self.size = 0
+
+    def add(self, source_phrase, target_phrase, overwrite=False):
+        node = self._root
+        for token in source_phrase.split():
+            node = node.setdefault(token, {})
+        if None not in node or overwrite:
+            self.size += None not in node
+            node[None] = target_phrase
+
+    @classmethod
+    def from_sentence_pairs(cls, sentence_pairs, **align_kwargs):
+        """Builds a lexicon from raw (source_text, target_text) pairs."""
+        pairs = []
+        for source_text, target_text in sentence_pairs:
+            source_tokens = normalize_text(source_text).split()
+            target_tokens = normalize_text(target_text).split()
+            if source_tokens and target_tokens:
+                pairs.append((source_tokens, target_tokens))
+        lexicon = cls()
+        for source_tokens, target_tokens in pairs:
+            lexicon.add(" ".join(source_tokens), " ".join(target_tokens))
+        for source, target in align_phrases(pairs, **align_kwargs).items():
+            lexicon.add(source, target)
+        return lexicon
+
+    def translate(self, text):
+        """Returns (translation, coverage): coverage is the fraction of input words matched by a phrase."""
+        # Normalised tokens for matching, each remembering the input word it came from
+        words = text.split()
+        tokens, origins = [], []
+        for index, word in enumerate(words):
+            for token in normalize_text(word).split():
+                tokens.append(token)
+                origins.append(index)
+        output = []
+        matched = 0
+        copied_word = None
+        i = 0
+        while i < len(tokens):
+            node = self._root
+            match_end, match_target = None, None
+            j = i
+            while j < len(tokens) and tokens[j] in node:
+                node = node[tokens[j]]
+                j += 1
+                if None in node:
+                    match_end, match_target = j, node[None]
+            if match_end is None:
+                if origins[i] != copied_word: # Unknown word: copy it through as written (once per input word)
+                    copied_word = origins[i]
+                    output.append(words[copied_word])
+                i += 1
+            else:
+                output.append(match_target)
+                matched += match_end - i
+                i = match_end
+        return " ".join(output), (matched / len(tokens) if tokens else 1.0)
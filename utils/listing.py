@@ -0,0 +1,119 @@
+# sylheti_translator_backend/utils/listing.py
+
+import json
+from sqlalchemy import select
+
+from config import db
+
+# --- Constants ---
+# Largest page a client can ask for with ?limit=
+MAX_PAGE_SIZE = 1000
+# Rows fetched per round trip when streaming a whole table (no ?limit=)
+STREAM_BATCH_SIZE = 500
+
+
+class ListingArgsError(ValueError):
+    """Raised when the pagination/projection query-string arguments are invalid."""
+
+
+def parse_listing_args(args, model, id_column_name, allowed_fields):
+    """
+    Parses the shared listing arguments from a request's query string.
+
+    Supported arguments:
+        limit    - page size (1..MAX_PAGE_SIZE). Omit to stream every matching row.
+        after_id - keyset cursor; only rows with a primary key greater than this are returned.
+        fields   - comma separated column projection, e.g. "PhraseID,SylhetiText".
+
+    Returns a dict with 'limit', 'after_id' and 'columns' (SQLAlchemy column objects,
+    always including the primary key so the cursor can be computed).
+    """
+    limit = args.get("limit")
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ListingArgsError("'limit' must be an integer")
+        if limit < 1:
+            raise ListingArgsError("'limit' must be at least 1")
+        limit = min(limit, MAX_PAGE_SIZE)
+
+    after_id = args.get("after_id")
+    if after_id is not None:
+        try:
+            after_id = int(after_id)
+        except ValueError:
+            raise ListingArgsError("'after_id' must be an integer")
+
+    requested_fields = args.get("fields")
+    if requested_fields:
+        field_names = [f.strip() for f in requested_fields.split(",") if f.strip()]
+        unknown = [f for f in field_names if f not in allowed_fields]
+        if unknown:
+            raise ListingArgsError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed_fields)}")
+        if id_column_name not in field_names:
+            field_names.insert(0, id_column_name)
+    else:
+        field_names = list(allowed_fields)
+
+    return {
+        "limit": limit,
+        "after_id": after_id,
+        "columns": [getattr(model, name) for name in field_names],
+    }
+
+
+def fetch_batch(columns, id_column, filters, after_id, size):
+    """Fetches up to 'size' rows after the keyset cursor (WHERE id > after_id ORDER BY id LIMIT size)."""
+    stmt = select(*columns).where(*filters)
+    if after_id is not None:
+        stmt = stmt.where(id_column > after_id)
+    return db.session.execute(stmt.order_by(id_column).limit(size)).all()
+
+
+def fetch_page(columns, id_column, filters, after_id, limit):
+    """
+    Fetches a single keyset page.
+    Returns (rows, next_cursor); next_cursor is None when there are no more rows.
+    One extra row is fetched to find out whether another page exists.
+    """
+    rows = fetch_batch(columns, id_column, filters, after_id, limit + 1)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1]._mapping[id_column.key]
+    return rows, next_cursor
+
+
+def iter_keyset_batches(columns, id_column, filters, after_id, first_batch=None, batch_size=STREAM_BATCH_SIZE):
+    """
+    Yields lists of rows for every matching record, walking the primary key index
+    one batch at a time so memory stays bounded regardless of table size.
+    'first_batch' lets the caller pre-fetch the first batch (to surface DB errors
+    before the response starts streaming).
+    """
+    last_id = after_id
+    batch = first_batch
+    while True:
+        if batch is None:
+            batch = fetch_batch(columns, id_column, filters, last_id, batch_size)
+        if not batch:
+            return
+        yield batch
+        if len(batch) < batch_size:
+            return
+        last_id = batch[-1]._mapping[id_column.key]
+        batch = None
+
+
+def stream_json_array(batches):
+    """Serialises batches of result rows as one JSON array, one chunk per batch."""
+    yield "["
+    first = True
+    for batch in batches:
+        chunk = ",".join(json.dumps(dict(row._mapping), ensure_ascii=False) for row in batch)
+        if not chunk:
+            continue
+        yield chunk if first else "," + chunk
+        first = False
+    yield "]"
@@ -0,0 +1,138 @@
+# sylheti_translator_backend/utils/minify.py
+# Conservative JavaScript and CSS minifiers for scripts/build_assets.py (used when rjsmin /
+# rcssmin are not installed).
+#
+# Both strip comments and collapse whitespace while copying strings (and, for JavaScript,
+# template and regex literals) verbatim. The JavaScript minifier keeps a line break wherever
+# automatic semicolon insertion could depend on it, so it never changes what a script means;
+# it does not rename identifiers.
+
+_IDENTIFIER_CHARS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$\\")
+# A '/' after one of these (or after a keyword below) starts a regex literal, not a division
+_REGEX_AFTER_CHARS = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_AFTER_WORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw",
+                      "instanceof", "yield", "await"}
+# A line break next to these can't end a statement, so it can go
+_NO_BREAK_AFTER = set("{;,([")
+_NO_BREAK_BEFORE = set("}),].")
+
+
+def _skip_quoted(source, i, quote):
+    """Index just past the string/template literal starting at source[i]."""
+    i += 1
+    while i < len(source):
+        if source[i] == "\\":
+            i += 2
+            continue
+        if source[i] == quote:
+            return i + 1
+        i += 1
+    return i
+
+
+def _skip_regex(source, i):
+    """Index just past the regex literal (and its flags) starting at source[i]."""
+    i += 1
+    in_class = False
+    while i < len(source) and source[i] != "\n":
+        char = source[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == "[":
+            in_class = True
+        elif char == "]":
+            in_class = False
+        elif char == "/" and not in_class:
+            i += 1
+            while i < len(source) and source[i] in _IDENTIFIER_CHARS:
+                i += 1
+            return i
+        i += 1
+    return i
+
+
+def _last_word(output):
+    end = len(output)
+    start = end
+    while start > 0 and output[start - 1] in _IDENTIFIER_CHARS:
+        start -= 1
+    return "".join(output[start:end])
+
+
+def _needs_space(previous, following):
+    if previous in _IDENTIFIER_CHARS and following in _IDENTIFIER_CHARS:
+        return True
+    return previous == following and previous in "+-" # 'a - -b' must not become 'a--b'
+
+
+def minify_js(source):
+    output = []
+    i = 0
+    pending_space = pending_break = False
+    while i < len(source):
+        char = source[i]
+        if char in " \t\r\n\f\v":
+            pending_break = pending_break or char == "\n"
+            pending_space = True
+            i += 1
+            continue
+        if source.startswith("//", i):
+            end = source.find("\n", i)
+            i = len(source) if end == -1 else end
+            continue
+        if source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            end = len(source) if end == -1 else end + 2
+            pending_break = pending_break or "\n" in source[i:end]
+            pending_space = True
+            i = end
+            continue
+
+        if pending_space and output:
+            previous = output[-1][-1]
+            if pending_break and previous not in _NO_BREAK_AFTER and char not in _NO_BREAK_BEFORE:
+                output.append("\n")
+            elif _needs_space(previous, char):
+                output.append(" ")
+        pending_space = pending_break = False
+
+        if char in "'\"`":
+            end = _skip_quoted(source, i, char)
+        elif char == "/" and (not output or output[-1] in _REGEX_AFTER_CHARS or output[-1] == "\n"
+                              or _last_word(output) in _REGEX_AFTER_WORDS):
+            end = _skip_regex(source, i)
+        else:
+            end = i + 1
+        output.append(source[i:end])
+        i = end
+    return "".join(output).strip() + "\n"
+
+
+def minify_css(source):
+    output = []
+    i = 0
+    pending_space = False
+    while i < len(source):
+        char = source[i]
+        if char in " \t\r\n\f":
+            pending_space = True
+            i += 1
+            continue
+        if source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            i = len(source) if end == -1 else end + 2
+            pending_space = True
+            continue
+        if char == "}" and output and output[-1] == ";":
+            output.pop() # The last declaration in a block needs no ';'
+        if pending_space and output and output[-1] not in "{};,>~:" and char not in "{};,>~)!":
+            output.append(" ") # Kept before ':' - 'a :hover' is not 'a:hover'
+        pending_space = False
+        if char in "'\"":
+            end = _skip_quoted(source, i, char)
+        else:
+            end = i + 1
+        output.append(source[i:end])
+        i = end
+    return "".join(output).strip() + "\n"
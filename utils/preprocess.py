@@ -8,31 +8,36 @@ from transformers import AutoTokenizer
 MAX_INPUT_LENGTH = 128
 MAX_TARGET_LENGTH = 128
 
-# --- Load Tokenizer ---
-# Load the tokenizer associated with the *base* model you are fine-tuning from.
-# This tokenizer will be saved later *with* the fine-tuned model.
-
-# Use the base model defined in the train script (or load dynamically if needed)
-# For simplicity, we assume train.py loads and passes the correct tokenizer instance
-# Or, we keep loading the base tokenizer here:
+# --- Default Tokenizer ---
+# train.py loads the tokenizer for its --base_model and passes it in via fn_kwargs.
+# The base tokenizer below is only a fallback for callers that don't pass one, and is
+# loaded lazily so importing this module stays cheap (and multi-process map() workers
+# don't each load their own copy).
 BASE_MODEL_CHECKPOINT = "Helsinki-NLP/opus-mt-bn-en"  # Make sure this is the model you start fine-tuning from in train.py
 
-try:
-    tokenizer = AutoTokenizer.from_pretrained(BASE_MODEL_CHECKPOINT)
-    print(f"(preprocess.py) Tokenizer loaded for base model: {BASE_MODEL_CHECKPOINT}")
-except Exception as e:
-    print(f"(preprocess.py) Error loading base tokenizer ({BASE_MODEL_CHECKPOINT}): {e}")
-    tokenizer = None
+_default_tokenizer = None
+
+
+def get_default_tokenizer():
+    """Loads (once) and returns the tokenizer for BASE_MODEL_CHECKPOINT."""
+    global _default_tokenizer
+    if _default_tokenizer is None:
+        _default_tokenizer = AutoTokenizer.from_pretrained(BASE_MODEL_CHECKPOINT)
+        print(f"(preprocess.py) Tokenizer loaded for base model: {BASE_MODEL_CHECKPOINT}")
+    return _default_tokenizer
+
+
 # --- MODIFIED Preprocessing Function ---
 # Accepts source and target language keys as arguments
-def preprocess_function(examples, src_lang, tgt_lang):
+def preprocess_function(examples, src_lang, tgt_lang, tokenizer=None,
+                        max_input_length=MAX_INPUT_LENGTH, max_target_length=MAX_TARGET_LENGTH):
     """
     Tokenizes the source and target text for the seq2seq model.
     Assumes input 'examples' is a dictionary-like object (like a dataset batch).
     Uses the provided src_lang and tgt_lang keys to access the correct text.
     """
-    if not tokenizer:
-        raise ValueError("Tokenizer is not loaded.")
+    if tokenizer is None:
+        tokenizer = get_default_tokenizer()
 
     # Check if the REQUIRED keys exist in the input data batch using the passed arguments
     if src_lang not in examples:
@@ -46,14 +51,13 @@ def preprocess_function(examples, src_lang, tgt_lang):
     targets = examples[tgt_lang]
 
     # Tokenize inputs
-    model_inputs = tokenizer(inputs, max_length=MAX_INPUT_LENGTH, truncation=True)
+    model_inputs = tokenizer(inputs, max_length=max_input_length, truncation=True)
 
     # Tokenize targets (labels)
-    with tokenizer.as_target_tokenizer():
-        labels = tokenizer(targets, max_length=MAX_TARGET_LENGTH, truncation=True)
+    labels = tokenizer(text_target=targets, max_length=max_target_length, truncation=True)
 
     model_inputs["labels"] = labels["input_ids"]
     return model_inputs
 # --- Data Loading and Mapping ---
 # This part is MOVED to train.py. This script only defines the function.
-# DO NOT load_dataset or dataset.map here.
\ No newline at end of file
+# DO NOT load_dataset or dataset.map here.
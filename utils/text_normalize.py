@@ -0,0 +1,38 @@
+# sylheti_translator_backend/utils/text_normalize.py
+
+import unicodedata
+
+# --- Character tables ---
+# Zero-width and invisible characters that keyboards/IMEs insert inconsistently,
+# plus the Unicode replacement character Whisper sometimes emits.
+_INVISIBLE_CHARS = "\u200b\u200c\u200d\u2060\ufeff\ufffd"
+# Punctuation that should not affect matching (includes the Bengali danda/double danda)
+_PUNCTUATION_CHARS = "।॥?!.,;:\"'()[]{}-–—‘’“”"
+
+_TRANSLATE_TABLE = dict.fromkeys(map(ord, _INVISIBLE_CHARS), None)
+_TRANSLATE_TABLE.update(dict.fromkeys(map(ord, _PUNCTUATION_CHARS), " "))
+
+# Legacy khanda ta (TA + VIRAMA + ZWJ) -> U+09CE BENGALI LETTER KHANDA TA.
+# Must run before the ZWJ is stripped.
+_KHANDA_TA_LEGACY = "\u09a4\u09cd\u200d"
+_KHANDA_TA = "\u09ce"
+
+
+def normalize_text(text):
+    """
+    Normalises Bengali-script (Sylheti/Bengali) and English text for search and lookups.
+
+    - NFC normalisation. U+09DC/U+09DD/U+09DF (ড় ঢ় য়) are composition exclusions, so
+      both their precomposed and base+nukta spellings end up as base+nukta.
+    - Legacy khanda ta spelling is mapped to U+09CE.
+    - Zero-width joiners/non-joiners and similar invisible characters are removed.
+    - Punctuation (including the danda) is treated as whitespace.
+    - Latin text is case-folded and runs of whitespace are collapsed.
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFC", text)
+    text = text.replace(_KHANDA_TA_LEGACY, _KHANDA_TA)
+    text = text.translate(_TRANSLATE_TABLE)
+    text = text.casefold()
+    return " ".join(text.split())
@@ -0,0 +1,118 @@
+# sylheti_translator_backend/utils/translation_table.py
+# A read-only, memory-mapped table of precomputed translations.
+#
+# File layout (little-endian):
+#   header  8s magic, Q entry count, Q index offset, Q pool offset, Q meta offset, Q meta length
+#   index   one (I key offset, I key length, I value offset, I value length) record per
+#           entry, sorted by key bytes; offsets are relative to the pool
+#   pool    UTF-8 keys and translations, back to back
+#   meta    JSON: which model (and checkpoint fingerprint) produced each direction
+# A key is "<source_lang>\t<target_lang>\t<normalize_text(source text)>".
+#
+# Lookups binary-search the index straight from the mapping, so every worker process shares
+# the file through the page cache instead of holding its own copy. Written by
+# scripts/build_translation_table.py; read by scripts/translator.py.
+
+import json
+import mmap
+import os
+import struct
+
+from utils.text_normalize import normalize_text
+
+MAGIC = b"SYLTT001"
+_HEADER = struct.Struct("<8sQQQQQ")
+_RECORD = struct.Struct("<IIII")
+
+
+def table_key(source_lang, target_lang, text):
+    return f"{source_lang}\t{target_lang}\t{normalize_text(text)}".encode("utf-8")
+
+
+def write_table(path, entries, meta):
+    """
+    Writes {(source_lang, target_lang, normalized_text): translation} to 'path' (via a
+    temporary file, so readers never see a partial table). Returns the entry count.
+    """
+    items = sorted((f"{s}\t{t}\t{k}".encode("utf-8"), v.encode("utf-8")) for (s, t, k), v in entries.items())
+    pool = bytearray()
+    records = bytearray()
+    for key, value in items:
+        records += _RECORD.pack(len(pool), len(key), len(pool) + len(key), len(value))
+        pool += key
+        pool += value
+    meta_bytes = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+
+    index_offset = _HEADER.size
+    pool_offset = index_offset + len(records)
+    meta_offset = pool_offset + len(pool)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(items), index_offset, pool_offset, meta_offset, len(meta_bytes)))
+        f.write(records)
+        f.write(pool)
+        f.write(meta_bytes)
+    os.replace(tmp_path, path)
+    return len(items)
+
+
+class TranslationTable:
+    """A mapped table file. Use TranslationTable.open(path), which returns None if it is missing or invalid."""
+
+    def __init__(self, path, file, mapping):
+        self.path = path
+        self._file = file
+        self._mm = mapping
+        magic, self.count, self._index_offset, self._pool_offset, meta_offset, meta_length = _HEADER.unpack_from(mapping, 0)
+        if magic != MAGIC:
+            raise ValueError(f"'{path}' is not a translation table")
+        self.meta = json.loads(mapping[meta_offset:meta_offset + meta_length].decode("utf-8"))
+        stat = os.fstat(file.fileno())
+        self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    @classmethod
+    def open(cls, path):
+        if not os.path.exists(path) or os.path.getsize(path) < _HEADER.size:
+            return None
+        f = open(path, "rb")
+        try:
+            return cls(path, f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except Exception as e:
+            f.close()
+            print(f"WARNING: Could not open translation table '{path}': {e}")
+            return None
+
+    def _record(self, i):
+        return _RECORD.unpack_from(self._mm, self._index_offset + i * _RECORD.size)
+
+    def _bytes(self, offset, length):
+        start = self._pool_offset + offset
+        return self._mm[start:start + length]
+
+    def lookup(self, source_lang, target_lang, text):
+        """The stored translation of 'text' (matched after normalize_text), or None."""
+        key = table_key(source_lang, target_lang, text)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_length, value_offset, value_length = self._record(middle)
+            probe = self._bytes(key_offset, key_length)
+            if probe < key:
+                low = middle + 1
+            elif probe > key:
+                high = middle
+            else:
+                return self._bytes(value_offset, value_length).decode("utf-8")
+        return None
+
+    def entries(self):
+        """Yields ((source_lang, target_lang, normalized_text), translation) for every entry."""
+        for i in range(self.count):
+            key_offset, key_length, value_offset, value_length = self._record(i)
+            source_lang, target_lang, text = self._bytes(key_offset, key_length).decode("utf-8").split("\t", 2)
+            yield (source_lang, target_lang, text), self._bytes(value_offset, value_length).decode("utf-8")
+
+    def close(self):
+        self._mm.close()
+        self._file.close()